@@ -0,0 +1,85 @@
+"""
+Manager approval workflow.
+
+Pending clients that employees have submitted form a queue ordered by
+``submitted_at`` (backed by the ``(approval_status, submitted_at, id)``
+index). Managers decide on batches of clients with one locking SELECT and
+one ``UPDATE ... WHERE id IN (...)``; rows already locked by another
+manager's batch are skipped rather than waited on. Notifications about
+submissions and decisions are queued as background jobs in the same
+transaction.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import notifications
+from .models import ApprovalHistory, Client
+from .signals import clients_status_changed
+
+DECISIONS = {
+    "approve": "approved",
+    "reject": "rejected",
+}
+
+
+def pending_queue():
+    return Client.objects.filter(approval_status="pending", submitted_at__isnull=False)
+
+
+def submit(client, employee):
+    """ Put ``client`` on the approval queue. """
+    from_status = client.approval_status
+    client.approval_status = "pending"
+    client.submitted_at = timezone.now()
+    with transaction.atomic():
+        client.save(update_fields=["approval_status", "submitted_at"])
+        ApprovalHistory.objects.create(
+            client=client, action="submitted", from_status=from_status, to_status="pending", actor=employee
+        )
+        notifications.approval_requested(client, employee)
+
+
+def record_decision(client, from_status, manager, note=""):
+    """ Log a single-client status change made outside ``decide()``. """
+    if client.approval_status != from_status and client.approval_status in DECISIONS.values():
+        ApprovalHistory.objects.create(
+            client=client, action=client.approval_status, from_status=from_status,
+            to_status=client.approval_status, actor=manager, note=note,
+        )
+        notifications.decided([client.pk], client.approval_status)
+
+
+def decide(ids, action, manager, note=""):
+    """
+    Approve or reject the pending clients among ``ids``.
+
+    Returns ``(processed_ids, skipped_ids)``; skipped ids are not pending,
+    do not exist, or are being decided by someone else right now.
+    """
+    to_status = DECISIONS[action]
+    with transaction.atomic():
+        clients = list(
+            pending_queue()
+            .select_for_update(skip_locked=True)
+            .filter(id__in=ids)
+            .only("id", *Client.TRACKED_FIELDS)
+        )
+        processed = [client.id for client in clients]
+        if clients:
+            Client.objects.filter(id__in=processed).update(approval_status=to_status)
+            ApprovalHistory.objects.bulk_create([
+                ApprovalHistory(
+                    client_id=client.id, action=to_status, from_status=client.approval_status,
+                    to_status=to_status, actor=manager, note=note,
+                )
+                for client in clients
+            ])
+            notifications.decided(processed, to_status)
+            for client in clients:
+                client.approval_status = to_status
+            clients_status_changed.send(sender=Client, clients=clients)
+            for client in clients:
+                client._loaded_state = client.tracked_state()
+
+    processed_set = set(processed)
+    return processed, [client_id for client_id in dict.fromkeys(ids) if client_id not in processed_set]
@@ -0,0 +1,338 @@
+"""
+Archive tier for decided clients.
+
+A client whose ``approval_status`` is a key of ``ARCHIVE_AFTER_DAYS`` and
+that was created more than that many days ago leaves the hot tables.
+``archive()`` moves such clients in batches of ``ARCHIVE_BATCH_SIZE``, with
+one transaction per batch. Each client becomes an ``ArchivedClient`` row
+with the same id, which keeps the profile and the ``EmployeeClientDetails``
+as JSON. Document files are copied to the ``ARCHIVE_STORAGE`` storage under
+``ARCHIVE_FILE_PREFIX<client id>/``. Deleting the details releases their
+references to the content-addressed originals, which are collected once no
+live client uses them; files from before content addressing are deleted
+after the batch commits, unless a live row still uses them.
+
+Deleting the client rows cascades to their profile, details, uploads,
+search terms, blocking keys and duplicate flags. Approval history has no FK
+constraint and stays. The dashboard keeps counting archived clients:
+deletes never change its buckets, and ``stats.rebuild()`` reads both tables.
+
+Managers read archived clients through the client detail endpoints and list
+them at ``clients/archived/``. ``as_clients()`` rebuilds unsaved ``Client``
+instances, which ``ClientSerializer`` renders like the live client.
+``restore()`` moves a client back. ``report()`` measures the hot table, so
+``manage.py archive_clients --report`` shows what a run changed.
+"""
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import storages
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+from . import approvals, caching, dedup, documents, search
+from .models import (
+    ArchivedClient, Client, ClientBlockingKey, ClientProfile, ClientSearchTerm, DocumentUpload,
+    EmployeeClientDetails, User,
+)
+from .serializers import ClientSummarySerializer
+from .storage import PREFIX, digest, document_storage
+
+TERMINAL_STATUSES = ("approved", "rejected")
+
+# Client columns the archive row keeps as columns (ids, list fields, timestamps)
+CLIENT_COLUMNS = [field.attname for field in Client._meta.concrete_fields]
+DOCUMENT_FIELDS = EmployeeClientDetails.DOCUMENT_FIELDS
+
+HOT_TABLES = (Client, ClientProfile, EmployeeClientDetails, ClientSearchTerm, ClientBlockingKey)
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def archive_storage():
+    return storages[setting("ARCHIVE_STORAGE", "default")]
+
+
+def cutoffs(now=None):
+    """ ``{status: created_at bound}`` from ``ARCHIVE_AFTER_DAYS``. """
+    now = now or timezone.now()
+    ages = setting("ARCHIVE_AFTER_DAYS", {"rejected": 90, "approved": 365})
+    unknown = set(ages) - set(TERMINAL_STATUSES)
+    if unknown:
+        raise ArchiveError(f"Only decided clients can be archived, not {sorted(unknown)}.")
+    return {status: now - timedelta(days=days) for status, days in ages.items()}
+
+
+def eligible(now=None):
+    """ Clients due for archiving; one range of the ``(approval_status, created_at, id)`` index per status. """
+    condition = Q()
+    for status, cutoff in cutoffs(now).items():
+        condition |= Q(approval_status=status, created_at__lt=cutoff)
+    return Client.objects.filter(condition) if condition else Client.objects.none()
+
+
+def archive(batch_size=None, limit=None, now=None):
+    """ Archive every eligible client (at most ``limit``). Returns the number archived. """
+    batch_size = batch_size or setting("ARCHIVE_BATCH_SIZE", 500)
+    moved = 0
+    for status, cutoff in cutoffs(now).items():
+        position = None
+        while limit is None or moved < limit:
+            rows = Client.objects.filter(approval_status=status, created_at__lt=cutoff)
+            if position is not None:
+                rows = rows.filter(Q(created_at__gt=position[0]) | Q(created_at=position[0], id__gt=position[1]))
+            size = batch_size if limit is None else min(batch_size, limit - moved)
+            batch = list(rows.order_by("created_at", "id").values_list("created_at", "id")[:size])
+            if not batch:
+                break
+            moved += archive_batch([client_id for _, client_id in batch], now)
+            position = batch[-1]
+    return moved
+
+
+def archive_batch(ids, now=None):
+    """
+    Archive the clients among ``ids`` that are still eligible, in one
+    transaction. Clients locked by another transaction are left for the next
+    run. Returns the number archived.
+    """
+    storage, copied, originals = archive_storage(), [], []
+    try:
+        with transaction.atomic():
+            locked = list(eligible(now).select_for_update(skip_locked=True).filter(pk__in=ids).values_list("pk", flat=True))
+            clients = list(Client.objects.filter(pk__in=locked).select_related("profile", "extra_details"))
+            rows = []
+            for client in clients:
+                details = client._state.fields_cache.get("extra_details")
+                if details is not None:
+                    details = _columns(details, exclude=("client",))
+                    for name in DOCUMENT_FIELDS:
+                        archived = _archive_file(storage, client.pk, details[name])
+                        if archived != details[name]:
+                            copied.append(archived)
+                            originals.append(details[name])
+                            details[name] = archived
+                profile = client._state.fields_cache.get("profile")
+                rows.append(ArchivedClient(
+                    **{name: getattr(client, name) for name in CLIENT_COLUMNS},
+                    profile=_columns(profile, exclude=("client",)) if profile is not None else {},
+                    details=details,
+                ))
+            ArchivedClient.objects.bulk_create(rows)
+            thumbnails = list(
+                DocumentUpload.objects.filter(details__client_id__in=locked).exclude(thumbnail="")
+                .values_list("thumbnail", flat=True)
+            )
+            Client.objects.filter(pk__in=locked).delete()
+            transaction.on_commit(lambda: _delete_unreferenced(originals, thumbnails))
+    except BaseException:
+        for name in copied:
+            storage.delete(name)
+        raise
+    return len(rows)
+
+
+def _columns(instance, exclude=()):
+    """ Concrete column values of ``instance`` by attname; files as their names. """
+    values = {}
+    for field in instance._meta.concrete_fields:
+        if field.name not in exclude:
+            value = getattr(instance, field.attname)
+            values[field.attname] = value.name if isinstance(value, FieldFile) else value
+    return values
+
+
+def _from_columns(model, values):
+    return {
+        field.attname: field.to_python(values[field.attname])
+        for field in model._meta.concrete_fields if field.attname in values
+    }
+
+
+def _archive_file(storage, client_id, name):
+    """ Copy a document to the archive storage; returns its archived name (``name`` if there is no file). """
+    if not name or not document_storage().exists(name):
+        return name
+    target = f"{setting('ARCHIVE_FILE_PREFIX', 'archive/')}{client_id}/{name}"
+    storage.delete(target)  # a partial copy left by an interrupted run
+    with document_storage().open(name) as source:
+        return storage.save(target, source)
+
+
+def _delete_unreferenced(names, thumbnails):
+    """
+    Delete original files from before content addressing that no live
+    details row or upload uses any more (content-addressed files are
+    reference counted, see ``documents.release()``).
+    """
+    names = {name for name in names if digest(name) is None}
+    thumbnails = {name for name in thumbnails if not name.startswith(PREFIX)}
+    if names:
+        used = Q()
+        for field in DOCUMENT_FIELDS:
+            used |= Q(**{f"{field}__in": names})
+        for row in EmployeeClientDetails.objects.filter(used).values_list(*DOCUMENT_FIELDS):
+            names.difference_update(row)
+    if thumbnails:
+        thumbnails.difference_update(
+            DocumentUpload.objects.filter(thumbnail__in=thumbnails).values_list("thumbnail", flat=True)
+        )
+    for name in names | thumbnails:
+        document_storage().delete(name)
+
+
+def as_clients(archived):
+    """
+    Unsaved ``Client`` instances for ``ArchivedClient`` rows, with their
+    profile and details attached, so serializers render them without queries
+    (besides one for the users who filled in details). Each has ``archived_at``.
+    """
+    archived = list(archived)
+    filled_by = User.objects.in_bulk(
+        {row.details["filled_by_id"] for row in archived if row.details and row.details.get("filled_by_id")}
+    )
+    storage, prefix = archive_storage(), setting("ARCHIVE_FILE_PREFIX", "archive/")
+    clients = []
+    for row in archived:
+        client = Client(**{name: getattr(row, name) for name in CLIENT_COLUMNS})
+        client._state.adding, client._state.db = False, row._state.db
+        client.archived_at = row.archived_at
+        cache = client._state.fields_cache
+        if "assigned_employee" in row._state.fields_cache:
+            cache["assigned_employee"] = row.assigned_employee
+        cache["profile"] = ClientProfile(client_id=row.pk, **_from_columns(ClientProfile, row.profile))
+        cache["profile"]._state.adding = False
+
+        details = None
+        if row.details is not None:
+            details = EmployeeClientDetails(client_id=row.pk, **_from_columns(EmployeeClientDetails, row.details))
+            details._state.adding = False
+            details._state.fields_cache["filled_by"] = filled_by.get(details.filled_by_id)
+            for name in DOCUMENT_FIELDS:
+                document = getattr(details, name)
+                if document.name and document.name.startswith(prefix):
+                    document.storage = storage
+        cache["extra_details"] = details
+        clients.append(client)
+    return clients
+
+
+def lookup(client_id):
+    """ The archived client ``client_id`` as an unsaved ``Client``, or ``None``. """
+    row = ArchivedClient.objects.select_related("assigned_employee").filter(pk=client_id).first()
+    return as_clients([row])[0] if row is not None else None
+
+
+def restore(client_id):
+    """ Move an archived client back to the live tables, under its old id. """
+    storage, prefix = archive_storage(), f"{setting('ARCHIVE_FILE_PREFIX', 'archive/')}{client_id}/"
+    restored, archived_files = [], []
+    try:
+        with transaction.atomic():
+            row = ArchivedClient.objects.select_for_update().filter(pk=client_id).first()
+            if row is None:
+                raise ArchiveError(f"Client {client_id} is not archived.")
+            if Client.objects.filter(Q(contact_number=row.contact_number) | Q(gmail=row.gmail)).exists():
+                raise ArchiveError(f"A live client now has the contact number or email of client {client_id}.")
+
+            client = as_clients([row])[0]
+            profile, details = client.profile, client._state.fields_cache["extra_details"]
+            # bulk_create: no post_save, so the dashboard (which still counts the client) is left alone
+            Client.objects.bulk_create([client])
+            ClientProfile.objects.bulk_create([profile])
+            if details is not None:
+                for name in DOCUMENT_FIELDS:
+                    document = getattr(details, name)
+                    if document.name and document.name.startswith(prefix):
+                        original = document.name[len(prefix):]
+                        if not documents.keep(original):
+                            with storage.open(document.name) as source:
+                                original = document_storage().save(original, source)
+                            restored.append(original)
+                        archived_files.append(document.name)
+                        setattr(details, name, original)
+                details.save(force_insert=True)  # counts its document references again
+            row.delete()
+            search.index_clients([client.pk])
+            dedup.index_clients([client.pk])
+            caching.bump_version()
+            transaction.on_commit(lambda: [storage.delete(name) for name in archived_files])
+    except BaseException:
+        for name in restored:
+            document_storage().delete(name)
+        raise
+    return Client.objects.get(pk=client_id)
+
+
+def table_size(model):
+    """ Bytes used by ``model``'s table and its indexes, or ``None`` where the backend cannot tell. """
+    table = model._meta.db_table
+    queries = {
+        "postgresql": ("SELECT pg_total_relation_size(%s)", [table]),
+        "mysql": (
+            "SELECT data_length + index_length FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s",
+            [table],
+        ),
+        # Needs SQLite built with the dbstat table (most builds are)
+        "sqlite": (
+            "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE tbl_name = %s)",
+            [table],
+        ),
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(*queries[connection.vendor])
+            row = cursor.fetchone()
+    except Exception:
+        return None
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def hot_queries():
+    """ ``(name, callable)`` for the queries that every working day runs against ``Client``. """
+    columns = ClientSummarySerializer.Meta.fields
+    busiest = (
+        Client.objects.exclude(assigned_employee=None).values("assigned_employee")
+        .annotate(total=Count("id")).order_by("-total").values_list("assigned_employee", flat=True).first()
+    )
+    newest = Client.objects.order_by("-created_at", "-id").values(*columns)
+    return [
+        ("manager list", lambda: list(newest[:50])),
+        ("employee list", lambda: list(newest.filter(assigned_employee=busiest)[:50])),
+        ("pending list", lambda: list(newest.filter(approval_status="pending")[:50])),
+        ("approval queue", lambda: list(approvals.pending_queue().order_by("submitted_at", "id").values(*columns)[:50])),
+        ("pending count", lambda: Client.objects.filter(approval_status="pending").count()),
+        ("client count", lambda: Client.objects.count()),
+    ]
+
+
+def report(repeat=5):
+    """ Rows and bytes of the hot and archive tables, and the median latency of ``hot_queries()``. """
+    tables = {
+        model._meta.db_table: {"rows": model.objects.count(), "bytes": table_size(model)}
+        for model in (*HOT_TABLES, ArchivedClient)
+    }
+    latency = {}
+    for name, query in hot_queries():
+        query()  # warm the caches
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            query()
+            samples.append(time.perf_counter() - start)
+        latency[name] = round(statistics.median(samples) * 1000, 3)
+    return {"tables": tables, "latency_ms": latency}
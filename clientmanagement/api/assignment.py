@@ -0,0 +1,118 @@
+"""
+Employee auto-assignment.
+
+Each employee carries a denormalized ``open_client_count`` (pending clients
+assigned to them), kept up to date from the ``Client`` save/delete signals.
+Picking an employee is then a single ``LIMIT 1`` read from the
+``(role, open_client_count, id)`` index, no matter how many
+employees exist.
+"""
+import heapq
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Client, User
+
+OPEN_STATUSES = ("pending",)
+
+
+def candidate_employees():
+    return User.objects.filter(role="employee", is_active=True).order_by("open_client_count", "id")
+
+
+def pick_employee():
+    """
+    Return the least-loaded active employee, or ``None`` if there are none.
+
+    Call this inside ``transaction.atomic()`` and save the client in the same
+    transaction: the chosen row stays locked until commit, and concurrent
+    submissions skip it and take the next least-loaded employee instead of
+    piling onto the same one.
+    """
+    employee = candidate_employees().select_for_update(skip_locked=True).first()
+    if employee is None:
+        # Every employee is locked by an in-flight assignment; wait for one.
+        employee = candidate_employees().select_for_update().first()
+    return employee
+
+
+def assign_client(client_id):
+    """
+    Give an unassigned client to the least-loaded employee; used when the
+    client was created first and assigned afterwards (async applications).
+    Returns the employee, or ``None`` if the client was already assigned or
+    there are no employees.
+    """
+    with transaction.atomic():
+        client = Client.objects.select_for_update().filter(pk=client_id, assigned_employee__isnull=True).first()
+        if client is None:
+            return None
+        employee = pick_employee()
+        if employee is not None:
+            client.assigned_employee = employee
+            client.save(update_fields=["assigned_employee"])
+        return employee
+
+
+def distribute(count):
+    """
+    Spread ``count`` new clients over active employees, least-loaded first.
+
+    Returns one employee id (or ``None`` if there are no employees) per new
+    client, using a single query for the whole batch.
+    """
+    heap = list(candidate_employees().values_list("open_client_count", "id"))
+    if not heap:
+        return [None] * count
+    heapq.heapify(heap)
+    assigned = []
+    for _ in range(count):
+        load, employee_id = heapq.heappop(heap)
+        assigned.append(employee_id)
+        heapq.heappush(heap, (load + 1, employee_id))
+    return assigned
+
+
+def open_owner(state):
+    """ Employee whose workload a client with ``state`` counts towards, if any. """
+    if state and state.get("approval_status") in OPEN_STATUSES:
+        return state.get("assigned_employee_id")
+    return None
+
+
+def adjust_open_counts(deltas):
+    """ Apply ``{employee_id: delta}`` to the workload counters. """
+    for employee_id, delta in deltas.items():
+        if employee_id and delta:
+            User.objects.filter(pk=employee_id).update(open_client_count=F("open_client_count") + delta)
+
+
+def record_transition(before, after):
+    """ Update workload counters for a client moving from state ``before`` to ``after``. """
+    if before is not None and not all(name in before for name in Client.TRACKED_FIELDS):
+        return  # Loaded with deferred tracked fields, which the save cannot have changed.
+    old, new = open_owner(before), open_owner(after)
+    if old != new:
+        adjust_open_counts(Counter({old: -1, new: 1}))
+
+
+def record_bulk_create(clients):
+    """ Count freshly bulk-inserted clients towards their employees' workload. """
+    adjust_open_counts(Counter(open_owner(client.tracked_state()) for client in clients))
+
+
+def rebuild_open_counts():
+    """ Recompute every employee's counter from the ``Client`` table. """
+    open_clients = (
+        Client.objects.filter(assigned_employee=OuterRef("pk"), approval_status__in=OPEN_STATUSES)
+        .order_by()
+        .values("assigned_employee")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return User.objects.filter(Q(role="employee") | Q(open_client_count__gt=0)).update(
+        open_client_count=Coalesce(Subquery(open_clients), Value(0))
+    )
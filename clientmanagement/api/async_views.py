@@ -0,0 +1,196 @@
+"""
+Async variants of the public application endpoint and the read-heavy client
+views, for deployments served through ``clientmanagement/asgi.py``.
+
+Queries go through Django's async ORM (``acreate``, ``aget``, ``async for``),
+so a worker keeps serving other requests while it waits on the database.
+Validation (the serializers' unique checks query the database) and JWT
+authentication are synchronous DRF code and run via ``sync_to_async``.
+
+A public application is stored unassigned and answered right away; picking
+the least-loaded employee (a row-locking transaction) runs afterwards as a
+background task. ``manage.py assign_unassigned_clients`` picks up any
+application whose task never ran, e.g. because the process was restarted.
+"""
+import asyncio
+import functools
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import exceptions, status
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import archive, notifications
+from .assignment import assign_client
+from .authentication import CachedJWTAuthentication
+from .fieldsets import ClientFieldset
+from .filters import filter_clients
+from .idempotency import IdempotentRequest
+from .models import Client
+from .pagination import ClientCursorPagination
+from .routers import replica_reads
+from .serializers import ClientSerializer
+from .views import ClientApplicationView
+
+logger = logging.getLogger(__name__)
+
+# Strong references: the event loop only keeps weak ones to running tasks.
+_background_tasks = set()
+
+# Everything ClientSerializer renders from the new client and its profile (no query needed)
+APPLICATION_RESPONSE_FIELDS = [
+    name for name in ClientSerializer().fields if name not in ("assigned_employee_detail", "extra_details")
+]
+
+
+def respond(data, status_code=status.HTTP_200_OK):
+    return JsonResponse(data, status=status_code, encoder=JSONEncoder, safe=False)
+
+
+def api_view(view):
+    """ Wrap ``request`` in a DRF ``Request`` and render API errors like DRF does. """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        request = Request(request, parsers=[JSONParser(), FormParser(), MultiPartParser()])
+        try:
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+            return respond(detail, exc.status_code)
+    return wrapper
+
+
+def idempotent(view):
+    """ ``Idempotency-Key`` handling (see ``api/idempotency.py``) for an ``api_view``. """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        idempotency = IdempotentRequest(request)
+        if idempotency.key is None:
+            return await view(request, *args, **kwargs)
+
+        answer = await sync_to_async(idempotency.begin)()
+        if answer is not None:
+            status_code, data, headers = answer
+            response = respond(data, status_code)
+            for name, value in headers.items():
+                response[name] = value
+            return response
+        try:
+            response = await view(request, *args, **kwargs)
+        except BaseException:
+            await sync_to_async(idempotency.release)()
+            raise
+        await sync_to_async(idempotency.finish)(response.status_code, json.loads(response.content))
+        return response
+    return wrapper
+
+
+async def authenticate(request):
+    result = await sync_to_async(CachedJWTAuthentication().authenticate)(request._request)
+    if result is None:
+        raise exceptions.NotAuthenticated()
+    request.user = result[0]  # also sets it on the Django request, for middleware
+    return result[0]
+
+
+def _run_in_thread(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Background task %s%r failed", func.__name__, args)
+    finally:
+        connections.close_all()
+
+
+async def after_response(request, func, *args):
+    """
+    Run blocking ``func`` once the response is on its way. Only an ASGI
+    server's event loop outlives the request; under WSGI it runs inline.
+    """
+    if not isinstance(request._request, ASGIRequest):
+        await sync_to_async(func)(*args)
+        return
+    task = asyncio.create_task(sync_to_async(_run_in_thread, thread_sensitive=False)(func, *args))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def drain_background_tasks():
+    """ Wait for pending ``after_response`` work (used by the load test before cleaning up). """
+    while _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+
+
+# ✅ Public client application (no login); employee assignment happens after the response
+@csrf_exempt
+@require_POST
+@api_view
+@idempotent
+async def client_apply(request):
+    required_fields = ClientApplicationView.required_fields
+    data = {key: request.data.get(key) for key in required_fields if key in request.data}
+    if len(data) != len(required_fields):
+        return respond({"error": "Missing required fields"}, status.HTTP_400_BAD_REQUEST)
+
+    data["client_type"] = "direct"
+    serializer = ClientSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return respond(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    client = await Client.objects.acreate(**ClientSerializer.model_kwargs(serializer.validated_data))
+    await sync_to_async(notifications.application_received)(client)
+    await after_response(request, assign_client, client.pk)
+    return respond(
+        {
+            "message": "Client application submitted successfully",
+            "client": ClientSerializer(client, fields=APPLICATION_RESPONSE_FIELDS).data,
+            "assigned_employee": "Not assigned yet",
+        },
+        status.HTTP_201_CREATED,
+    )
+
+
+# ✅ Employee: a page of their own clients (same parameters as employee/clients/)
+@require_GET
+@api_view
+async def employee_clients(request):
+    user = await authenticate(request)
+    if user.role != 'employee':
+        return respond({"error": "Access denied"}, status.HTTP_403_FORBIDDEN)
+
+    fieldset = ClientFieldset(request.query_params, default_view="summary")
+    clients = filter_clients(Client.objects.all(), request.query_params)
+    clients = fieldset.apply(clients.filter(assigned_employee=user), "id", "created_at")
+    paginator = ClientCursorPagination()
+    with replica_reads(request):  # sync_to_async carries the context into the ORM's thread
+        page = await paginator.apaginate_queryset(fieldset.rows(clients, "id", "created_at"), request)
+    return respond({"next": paginator.get_next_link(), "results": fieldset.render(page)})
+
+
+# ✅ One client: any client for managers, assigned clients for employees
+@require_GET
+@api_view
+async def client_detail(request, pk):
+    user = await authenticate(request)
+    clients = Client.objects.all()
+    if user.role == 'employee':
+        clients = clients.filter(assigned_employee=user)
+    elif user.role != 'manager':
+        return respond({"error": "Access denied"}, status.HTTP_403_FORBIDDEN)
+
+    fieldset = ClientFieldset(request.query_params, default_view="full")
+    try:
+        client = await fieldset.apply(clients, "id").aget(pk=pk)
+    except Client.DoesNotExist:
+        client = await sync_to_async(archive.lookup)(pk) if user.role == 'manager' else None
+        if client is None:
+            return respond({"detail": "No Client matches the given query."}, status.HTTP_404_NOT_FOUND)
+    return respond(fieldset.serializer(client).data)
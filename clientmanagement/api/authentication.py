@@ -0,0 +1,115 @@
+"""
+JWT authentication with an in-process user cache.
+
+The stock ``JWTAuthentication`` loads the full ``User`` row on every request.
+``CachedJWTAuthentication`` keeps the handful of columns the API reads
+(id, role, is_active, ...) in a small per-process LRU with a TTL, so hot
+endpoints skip that query. Saving or deleting a ``User`` evicts its entry in
+the current process; the TTL bounds staleness in other worker processes and
+after queryset ``.update()`` calls, which send no signals.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+# Columns the API reads from request.user; everything else (password, ...) stays deferred.
+# Kept in model field order, which Model.from_db() expects.
+CACHED_USER_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in {"id", "username", "email", "phone_number", "dob", "role", "is_active", "is_staff", "is_superuser"}
+)
+
+
+class UserCache:
+    """ Thread-safe LRU of user rows whose entries expire after ``ttl`` seconds. """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, row = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return row
+
+    def set(self, user_id, row):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, row)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(
+    max_size=getattr(settings, "AUTH_USER_CACHE_SIZE", 10000),
+    ttl=getattr(settings, "AUTH_USER_CACHE_TTL", 60),
+)
+
+
+def load_user_row(user_id):
+    key = str(user_id)  # token claims may carry the id as a string
+    row = user_cache.get(key)
+    if row is None:
+        row = User.objects.filter(pk=user_id).values_list(*CACHED_USER_FIELDS).first()
+        if row is None:
+            return None
+        user_cache.set(key, row)
+    return row
+
+
+def evict_user(user_id):
+    user_cache.invalidate(str(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares password hashes, which are not cached.
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+        row = load_user_row(user_id)
+        if row is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+        # A fresh instance per request, built like a .only() query result:
+        # saving it can only ever write the cached columns.
+        user = User.from_db(DEFAULT_DB_ALIAS, CACHED_USER_FIELDS, row)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        role = validated_token.get("role")
+        if role is not None and role != user.role:
+            raise AuthenticationFailed("User role has changed; log in again.", code="role_changed")
+        return user
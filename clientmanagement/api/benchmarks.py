@@ -0,0 +1,237 @@
+"""
+Endpoint benchmark suite used by ``manage.py bench_api``.
+
+Every route in ``api/urls.py`` (and ``/metrics``) has at least one entry in
+``endpoints()``. Requests go through Django's test client, i.e. the full
+middleware, authentication, view, serializer and renderer stack, without a
+network. Each sample records its wall time and the number of SQL queries
+it ran; writes run inside a transaction that is rolled back, so the data
+set stays the same from run to run.
+
+The suite needs a populated database (``manage.py seed_synthetic``): it
+picks its users, clients and details from what is there.
+"""
+import csv
+import io
+import itertools
+import statistics
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client as TestClient
+from django.utils import timezone
+
+from . import documents, metrics, synthetic
+from .models import ApprovalHistory, Client, DocumentUpload, DuplicateFlag, EmployeeClientDetails, User
+from .views import ClientApplicationView, get_tokens_for_user
+
+
+class NotSeeded(Exception):
+    pass
+
+
+# ``path`` and ``data`` may be callables, evaluated per request inside its transaction.
+# ``throttled`` endpoints get their rate-limit history cleared before every request.
+Endpoint = namedtuple(
+    "Endpoint", "name method path role data expected throttled", defaults=(None, None, 200, False)
+)
+Result = namedtuple("Result", "name samples queries errors")
+
+
+class Fixture:
+    """ Existing rows the endpoints work on, picked from the seeded database. """
+
+    def __init__(self, password):
+        self.password = password
+        self.numbers = itertools.count(1)
+        self.manager = User.objects.filter(role="manager").order_by("id").first()
+        ready = (
+            EmployeeClientDetails.objects
+            .filter(client__client_type="employee_registered", client__assigned_employee__isnull=False)
+            .exclude(aadhaar_front="").exclude(pan_card="").exclude(cibil_report="")
+            .select_related("client", "client__assigned_employee").order_by("id").first()
+        )
+        if self.manager is None or ready is None:
+            raise NotSeeded("Seed the database first, e.g. `manage.py seed_synthetic --clients 100000`.")
+        self.details = ready
+        self.client = ready.client
+        self.employee = ready.client.assigned_employee
+        self.pending_ids = list(
+            Client.objects.filter(approval_status="pending", submitted_at__isnull=False)
+            .order_by("submitted_at", "id").values_list("id", flat=True)[:50]
+        )
+        self.history_client_id = ApprovalHistory.objects.order_by("id").values_list("client_id", flat=True).first()
+        self.flag = DuplicateFlag.objects.order_by("id").first()
+        self.name_prefix = self.client.name.split()[0][:4]
+
+    def number(self):
+        """ A fresh number for unique columns (usernames, phone numbers, emails). """
+        return 900_000_000 + next(self.numbers)
+
+    def application(self):
+        applicant = synthetic.client(self.number())
+        data = {field: getattr(applicant, field) for field in ClientApplicationView.required_fields}
+        data["expected_loan_amount"] = str(data["expected_loan_amount"])
+        return data
+
+    def direct_client(self):
+        return dict(self.application(), client_type="direct")
+
+    def import_file(self, rows=50):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=ClientApplicationView.required_fields)
+        writer.writeheader()
+        for _ in range(rows):
+            writer.writerow(self.application())
+        upload = io.BytesIO(output.getvalue().encode())
+        upload.name = "clients.csv"
+        return {"file": upload}
+
+    def registration(self):
+        number = self.number()
+        return {
+            "username": f"bench{number}", "email": f"bench{number}@example.com", "phone_number": f"{number}",
+            "dob": "1990-01-01", "role": "employee", "password": self.password,
+        }
+
+    def login(self):
+        user = self.employee
+        return {
+            "email": user.email, "phone_number": user.phone_number, "dob": str(user.dob),
+            "role": user.role, "password": self.password,
+        }
+
+    def upload(self):
+        """ A fresh upload expecting two 1 KiB chunks. """
+        return documents.start(self.details, "gas_bill", "bill.jpg", 2 * 1024, self.employee)
+
+
+def endpoints(fixture):
+    f = fixture
+    client, details = f.client.pk, f.details.pk
+    suite = [
+        Endpoint("clients list", "get", "/manage/clients/", "manager"),
+        Endpoint("clients list full", "get", "/manage/clients/?view=full&page_size=50", "manager"),
+        Endpoint("clients list filtered", "get",
+                 "/manage/clients/?approval_status=pending&client_type=employee_registered", "manager"),
+        Endpoint("client create", "post", "/manage/clients/", "employee", f.direct_client, 201),
+        Endpoint("client import", "post", "/manage/clients/import/", "manager", f.import_file),
+        Endpoint("client export csv", "get", f"/manage/clients/export/csv/?assigned_employee={f.employee.pk}",
+                 "manager"),
+        Endpoint("client search name", "get", f"/manage/clients/search/?q={f.name_prefix}", "manager"),
+        Endpoint("client search phone", "get", f"/manage/clients/search/?q={f.client.contact_number[-6:]}",
+                 "manager"),
+        Endpoint("duplicate flags", "get", "/manage/clients/duplicates/", "manager"),
+        Endpoint("archived clients", "get", "/manage/clients/archived/", "manager"),
+        Endpoint("employee client get", "get", f"/manage/clients/{client}/update/", "employee"),
+        Endpoint("employee client patch", "patch", f"/manage/clients/{client}/update/", "employee",
+                 {"loan_purpose": "Benchmark"}),
+        Endpoint("manager client get", "get", f"/manage/clients/{client}/manager-update/", "manager"),
+        Endpoint("manager client patch", "patch", f"/manage/clients/{client}/manager-update/", "manager",
+                 {"loan_purpose": "Benchmark"}),
+        Endpoint("details get", "get", f"/manage/clients/{details}/details-update/", "employee"),
+        Endpoint("details patch", "patch", f"/manage/clients/{details}/details-update/", "employee",
+                 {"cibil_score": 750}),
+        Endpoint("register", "post", "/manage/register/", None, f.registration, 201),
+        Endpoint("login", "post", "/manage/login/", None, f.login, throttled=True),
+        Endpoint("employee clients", "get", "/manage/employee/clients/", "employee"),
+        Endpoint("employee client create", "post", "/manage/employee/clients/", "employee", f.application, 201),
+        Endpoint("employee client put", "put", f"/manage/employee/clients/{client}/", "employee",
+                 {"loan_purpose": "Benchmark"}),
+        Endpoint("client apply", "post", "/manage/client/apply/", None, f.application, 201),
+        Endpoint("send approval", "post", f"/manage/employee/clients/{client}/send-approval/", "employee"),
+        Endpoint("approval queue", "get", "/manage/approvals/pending/", "manager"),
+        Endpoint("dashboard stats", "get", "/manage/dashboard/stats/?group_by=approval_status,client_type",
+                 "manager"),
+        Endpoint("dashboard stats by day", "get", "/manage/dashboard/stats/?group_by=day", "manager"),
+        Endpoint("document upload start", "post", "/manage/documents/uploads/", "employee",
+                 {"details": details, "field": "gas_bill", "filename": "bill.jpg", "size": 2048}, 201),
+        Endpoint("document upload status", "get", lambda: f"/manage/documents/uploads/{f.upload().pk}/", "employee"),
+        Endpoint("document upload chunk", "put", lambda: f"/manage/documents/uploads/{f.upload().pk}/", "employee",
+                 b"x" * 1024),
+        Endpoint("document get", "get", f"/manage/documents/{details}/pan_card/", "employee"),
+        Endpoint("document thumbnail", "get", f"/manage/documents/{details}/pan_card/?size=256", "employee"),
+        Endpoint("async client apply", "post", "/manage/async/client/apply/", None, f.application, 201),
+        Endpoint("async employee clients", "get", "/manage/async/employee/clients/", "employee"),
+        Endpoint("async client detail", "get", f"/manage/async/clients/{client}/", "manager"),
+        Endpoint("metrics", "get", "/metrics", None),
+    ]
+    if f.pending_ids:
+        suite.append(Endpoint("approval batch", "post", "/manage/approvals/batch/", "manager",
+                              {"ids": f.pending_ids[:20], "action": "approve"}))
+    if f.history_client_id:
+        suite.append(Endpoint("approval history", "get", f"/manage/approvals/history/{f.history_client_id}/",
+                              "manager"))
+    if f.flag:
+        suite.append(Endpoint("duplicate flag patch", "patch", f"/manage/clients/duplicates/{f.flag.pk}/",
+                              "manager", {"status": "dismissed"}))
+    return suite
+
+
+class Runner:
+    def __init__(self, fixture):
+        self.clients = {None: TestClient(raise_request_exception=False)}
+        for role, user in (("manager", fixture.manager), ("employee", fixture.employee)):
+            token = get_tokens_for_user(user)["access"]
+            self.clients[role] = TestClient(raise_request_exception=False, headers={"Authorization": f"Bearer {token}"})
+
+    def request(self, endpoint):
+        """ ``(seconds, queries, status)`` for one request; writes are rolled back. """
+        client = self.clients[endpoint.role]
+        began = timezone.now()
+        with transaction.atomic():
+            path = endpoint.path() if callable(endpoint.path) else endpoint.path
+            data = endpoint.data() if callable(endpoint.data) else endpoint.data
+            kwargs = {}
+            if isinstance(data, bytes):
+                kwargs = {"data": data, "content_type": "application/octet-stream", "HTTP_UPLOAD_OFFSET": "0"}
+            elif isinstance(data, dict) and any(hasattr(value, "read") for value in data.values()):
+                kwargs = {"data": data}  # multipart
+            elif data is not None:
+                kwargs = {"data": data, "content_type": "application/json"}
+
+            record = metrics.RequestMetrics()
+            start = time.perf_counter()
+            with metrics.watching_queries(record):
+                response = getattr(client, endpoint.method)(path, **kwargs)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+            seconds = time.perf_counter() - start
+
+            # Uploads vanish with the rollback; their staging files would not
+            for upload in DocumentUpload.objects.filter(created_at__gte=began):
+                documents.staging_path(upload).unlink(missing_ok=True)
+            transaction.set_rollback(True)
+        return seconds, len(record.queries), response.status_code
+
+    def run(self, endpoint, iterations, warmup=2):
+        samples, queries, errors = [], [], []
+        for n in range(warmup + iterations):
+            if endpoint.throttled:
+                cache.clear()
+            seconds, count, status = self.request(endpoint)
+            if n < warmup:
+                continue
+            samples.append(seconds)
+            queries.append(count)
+            if status != endpoint.expected:
+                errors.append(status)
+        return Result(endpoint.name, samples, max(queries), errors)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summary(result):
+    return {
+        "p50_ms": round(statistics.median(result.samples) * 1000, 3),
+        "p95_ms": round(percentile(result.samples, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(result.samples, 0.99) * 1000, 3),
+        "queries": result.queries,
+        "errors": len(result.errors),
+    }
+
@@ -0,0 +1,101 @@
+"""
+Response cache for the read-only client endpoints.
+
+Every cached response is keyed by (data version, user, role, path, query
+params). The data version is a single counter in the cache that is bumped
+after every committed write to ``Client`` or ``EmployeeClientDetails``
+(see ``api/signals.py``), so a write makes every older entry unreachable at
+once; entries only carry a timeout so that unreachable ones get reclaimed.
+
+The key doubles as a weak ETag: a request whose ``If-None-Match`` matches the
+current key is answered with 304 before the view touches the database or a
+serializer.
+
+A response read from a lagging replica may predate a write that already
+bumped the version, so responses served by a replica within
+``REPLICA_LAG_WINDOW`` seconds of any write are not stored (nor tagged).
+
+The version must live in a cache shared by every worker process (the
+local-memory backend is only exact with a single process, e.g. in tests).
+"""
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import routers
+
+VERSION_KEY = "api:data-version"
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seeded from the clock so a version lost to eviction never repeats an old one.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _bump():
+    routers.record_data_write()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # evicted: reseeding from the clock also invalidates
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def bump_version():
+    """ Invalidate every cached response once the current transaction commits. """
+    transaction.on_commit(_bump)
+
+
+def response_key(request):
+    user = request.user
+    params = sorted((name, sorted(values)) for name, values in request.query_params.lists())
+    identity = repr((user.pk, getattr(user, "role", None), request.path, params))
+    return f"{current_version()}-{hashlib.blake2b(identity.encode(), digest_size=12).hexdigest()}"
+
+
+def cache_response(get):
+    """
+    Decorator for a view's ``get`` method. Runs after authentication and
+    permission checks, so a 304 or a cache hit never bypasses them.
+    """
+    @functools.wraps(get)
+    def wrapper(view, request, *args, **kwargs):
+        if not setting("API_RESPONSE_CACHE_ENABLED", True):
+            return get(view, request, *args, **kwargs)
+
+        key = response_key(request)
+        etag = f'W/"{key}"'
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = cache.get(f"api:response:{key}")
+            if data is None:
+                response = get(view, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                if routers.served_by_replica(request) and routers.replicas_may_lag():
+                    return response  # possibly older than the current version
+                cache.set(f"api:response:{key}", response.data, setting("API_RESPONSE_CACHE_TIMEOUT", 3600))
+            else:
+                response = Response(data)
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"  # always revalidate with If-None-Match
+        return response
+
+    return wrapper
@@ -0,0 +1,268 @@
+"""
+Compiled, read-only form of a ``ModelSerializer`` for large lists.
+
+For every row and field, ``serializer.data`` calls ``get_attribute()`` and
+``to_representation()``, after the ORM has built a model instance (and the
+related ones) from the row. ``compile_serializer()`` does the field analysis
+once per serializer class and ``?fields=`` selection instead. It works out
+
+- the ``values_list()`` columns the serializer reads (related columns as
+  ``a__b``, nested serializers through their joins), and
+- a generated ``render(row, converters)`` that builds the representation
+  dict straight from the row tuple. Only fields whose database value differs
+  from what DRF renders get a converter (decimals, datetimes, choices, file
+  URLs); strings, integers and booleans are copied as they are.
+
+The result equals the DRF serializer's, key order included, so rendering it
+gives the same bytes. A serializer this module cannot compile (a method
+field without ``compiled_methods``, ``many=True`` nesting, custom relations)
+compiles to ``None`` and callers keep using the serializer. Set
+``API_COMPILED_SERIALIZERS = False`` to always use the serializers.
+
+A serializer opts a ``SerializerMethodField`` in with ``compiled_methods =
+{field name: (method name, columns)}``: the compiled form calls that method
+of a serializer instance with the row's ``columns`` as arguments.
+"""
+import decimal
+import functools
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from . import metrics
+from .fields import CompactChoiceField
+
+
+class NotCompilable(Exception):
+    pass
+
+
+def enabled():
+    return getattr(settings, "API_COMPILED_SERIALIZERS", True)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_serializer(serializer_class, fields=None):
+    """
+    The ``CompiledSerializer`` of ``serializer_class`` restricted to
+    ``fields`` (a tuple, as ``SparseFieldsetMixin`` takes it), or ``None``.
+    """
+    serializer = serializer_class(fields=list(fields)) if fields is not None else serializer_class()
+    compiler = Compiler()
+    try:
+        expression = compiler.serializer(serializer, serializer.Meta.model, "")
+    except NotCompilable:
+        return None
+    return CompiledSerializer(serializer_class.__name__, compiler.columns, compiler.factories, expression)
+
+
+class CompiledSerializer:
+    def __init__(self, name, columns, factories, expression):
+        self.columns = list(columns)
+        self.factories = factories
+        namespace = {}
+        exec(compile(f"def render(row, c):\n    return {expression}\n", f"<compiled {name}>", "exec"), namespace)
+        self.render = namespace["render"]
+
+    def rows(self, queryset, *required):
+        """
+        ``queryset`` as ``values_list()`` rows for ``data()``. ``required``
+        columns (e.g. the pagination key) are added, readable as attributes.
+        """
+        return queryset.values_list(*dict.fromkeys([*self.columns, *required]), named=True)
+
+    def data(self, rows, context=None):
+        """ What ``Serializer(instances, many=True, context=context).data`` gives for these rows. """
+        context = context or {}
+        with metrics.serializing():
+            converters = [factory(context) for factory in self.factories]
+            render = self.render
+            return [render(row, converters) for row in rows]
+
+
+class Compiler:
+    """ Builds the ``render()`` expression of one serializer, collecting its columns and converters. """
+
+    def __init__(self):
+        self.columns = {}  # path -> index in the row
+        self.factories = []  # context -> converter, by slot
+
+    def column(self, path):
+        return f"row[{self.columns.setdefault(path, len(self.columns))}]"
+
+    def converter(self, factory):
+        self.factories.append(factory)
+        return f"c[{len(self.factories) - 1}]"
+
+    def serializer(self, serializer, model, prefix):
+        if isinstance(serializer, serializers.ListSerializer) or not isinstance(serializer, serializers.ModelSerializer):
+            raise NotCompilable(serializer)
+        items = [
+            f"{field.field_name!r}: {self.field(serializer, field, model, prefix)}"
+            for field in serializer._readable_fields
+        ]
+        return "{" + ", ".join(items) + "}"
+
+    def field(self, serializer, field, model, prefix):
+        if isinstance(field, serializers.SerializerMethodField):
+            return self.method(serializer, field, prefix)
+        attrs = field.source_attrs
+        if not attrs or len(attrs) > 2:
+            raise NotCompilable(field)
+        model_field = model_field_of(model, attrs[0])
+
+        if isinstance(field, serializers.BaseSerializer):
+            if len(attrs) != 1 or not (model_field.many_to_one or model_field.one_to_one):
+                raise NotCompilable(field)
+            related = model_field.related_model
+            nested_prefix = f"{prefix}{attrs[0]}__"
+            key = self.column(f"{nested_prefix}{related._meta.pk.name}")  # NULL when there is no related row
+            return f"(None if {key} is None else {self.serializer(field, related, nested_prefix)})"
+
+        if len(attrs) == 2:
+            # A column of a one-to-one row, e.g. ``source="profile.father_name"``: a missing row renders None
+            if not (model_field.one_to_one and model_field.auto_created):
+                raise NotCompilable(field)
+            path, model_field = f"{prefix}{attrs[0]}__{attrs[1]}", model_field_of(model_field.related_model, attrs[1])
+        else:
+            path = f"{prefix}{attrs[0]}"
+
+        if isinstance(field, serializers.RelatedField):
+            if not isinstance(field, serializers.PrimaryKeyRelatedField) or field.pk_field is not None \
+                    or not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+                raise NotCompilable(field)
+            return self.column(path)  # the foreign key column is the primary key DRF renders
+        if model_field.is_relation or not model_field.concrete:
+            raise NotCompilable(field)
+
+        factory = converter_factory(field, model_field)
+        value = self.column(path)
+        if factory is None:
+            return value
+        return f"(None if {value} is None else {self.converter(factory)}({value}))"
+
+    def method(self, serializer, field, prefix):
+        try:
+            method_name, columns = type(serializer).compiled_methods[field.field_name]
+        except (AttributeError, KeyError):
+            raise NotCompilable(field) from None
+        serializer_class = type(serializer)
+
+        def factory(context):
+            return getattr(serializer_class(context=context), method_name)
+
+        arguments = ", ".join(self.column(f"{prefix}{column}") for column in columns)
+        return f"{self.converter(factory)}({arguments})"
+
+
+def model_field_of(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        raise NotCompilable(name) from None
+
+
+def constant(converter):
+    return lambda context: converter
+
+
+def converter_factory(field, model_field):
+    """
+    ``None`` if DRF renders the column's value unchanged, else a function of
+    the serializer context returning the value's converter (called for
+    values that are not ``None``, as ``Serializer.to_representation`` does).
+    """
+    if isinstance(field, serializers.ChoiceField):
+        choices = field.choice_strings_to_values
+        if all(key == value for key, value in choices.items()) \
+                and isinstance(model_field, (models.CharField, CompactChoiceField)):
+            return None  # string values that map to themselves
+        return constant(lambda value: choices.get(str(value), value))
+    if isinstance(field, serializers.CharField) and isinstance(model_field, (models.CharField, models.TextField)):
+        return None
+    if isinstance(field, serializers.IntegerField) and isinstance(model_field, models.IntegerField):
+        if isinstance(field, serializers.BigIntegerField) \
+                and getattr(field, "coerce_to_string", api_settings.COERCE_BIGINT_TO_STRING):
+            return constant(str)
+        return None
+    if isinstance(field, serializers.BooleanField) and isinstance(model_field, models.BooleanField):
+        return None
+    if isinstance(field, serializers.DecimalField) and isinstance(model_field, models.DecimalField):
+        return decimal_factory(field)
+    if isinstance(field, serializers.DateTimeField) and isinstance(model_field, models.DateTimeField):
+        return datetime_factory(field)
+    if isinstance(field, serializers.DateField) and isinstance(model_field, models.DateField) \
+            and not isinstance(model_field, models.DateTimeField):
+        output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+        if output_format is not None and output_format.lower() == ISO_8601:
+            return constant(lambda value: value.isoformat())
+        return constant(field.to_representation)
+    if isinstance(field, serializers.FileField) and isinstance(model_field, models.FileField):
+        return file_factory(field, model_field)
+    if isinstance(field, serializers.FileField):
+        raise NotCompilable(field)
+    # Anything else: the field's own to_representation (column values equal the instance attributes here)
+    return constant(field.to_representation)
+
+
+def decimal_factory(field):
+    coerce_to_string = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.normalize_output or field.decimal_places is None:
+        return constant(field.to_representation)
+    exponent, rounding = decimal.Decimal(".1") ** field.decimal_places, field.rounding
+
+    def factory(context):
+        precision = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            precision.prec = field.max_digits
+
+        def convert(value):
+            if not isinstance(value, decimal.Decimal):
+                value = decimal.Decimal(str(value).strip())
+            return f"{value.quantize(exponent, rounding=rounding, context=precision):f}"
+        return convert
+
+    return factory
+
+
+def datetime_factory(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return constant(field.to_representation)
+
+    def factory(context):
+        # Resolved per request, like DRF does: the current timezone may be activated per request
+        zone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+        if zone is None:
+            return field.to_representation
+
+        def convert(value):
+            if value.tzinfo is None:
+                return field.to_representation(value)
+            text = value.astimezone(zone).isoformat()
+            return text[:-6] + "Z" if text.endswith("+00:00") else text
+        return convert
+
+    return factory
+
+
+def file_factory(field, model_field):
+    if not getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL):
+        return constant(lambda name: name or None)
+
+    def factory(context):
+        storage, request, urls = model_field.storage, context.get("request"), {}
+
+        def convert(name):
+            if not name:
+                return None
+            url = urls.get(name)
+            if url is None:  # content-addressed documents are shared by many rows
+                url = urls[name] = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return convert
+
+    return factory
@@ -0,0 +1,153 @@
+"""
+Duplicate-application detection with blocking keys.
+
+Each client is reduced to a handful of blocking keys, i.e. normalized values
+that a reapplying person is likely to repeat even with a new phone number or
+email address:
+
+- ``name_father`` / ``name_mother``: name plus a parent's name, word order ignored
+- ``phone``: last 8 digits of the contact and alternative numbers
+- ``email``: mailbox name, ignoring the domain, ``+tags`` and (for Gmail) dots
+- ``reference``: each reference number; ``references``: the pair of them
+
+Keys are stored indexed (``ClientBlockingKey``), so a new client is compared
+only with the clients that share at least one key, never with the whole
+table. Candidates are scored by summing ``KEY_WEIGHTS`` over the kinds they
+share, and those at or above ``FLAG_THRESHOLD`` are recorded as
+``DuplicateFlag`` rows for a manager to confirm or dismiss. Nothing is
+merged automatically.
+"""
+import hashlib
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import Client, ClientBlockingKey, DuplicateFlag
+from .normalize import normalize_phone, words
+
+KEY_WEIGHTS = {
+    "name_father": Decimal("0.50"),
+    "name_mother": Decimal("0.30"),
+    "phone": Decimal("0.60"),
+    "email": Decimal("0.40"),
+    "references": Decimal("0.40"),
+    "reference": Decimal("0.15"),
+}
+FLAG_THRESHOLD = Decimal("0.50")
+PHONE_SUFFIX = 8
+MAX_MATCHES = 1000  # key rows read per check; a key shared this widely carries no signal
+
+KEY_FIELDS = (
+    "name", "father_name", "mother_name", "contact_number", "alternative_number",
+    "gmail", "reference_number_1", "reference_number_2",
+)
+
+
+def _digest(kind, value):
+    return hashlib.blake2b(f"{kind}:{value}".encode(), digest_size=16).hexdigest()
+
+
+def _person(*names):
+    return " ".join(sorted(word for name in names for word in words(name)))
+
+
+def _mailbox(email):
+    local, _, domain = (email or "").lower().partition("@")
+    local = local.split("+", 1)[0]
+    if domain in ("gmail.com", "googlemail.com"):
+        local = local.replace(".", "")
+    return "".join(words(local))
+
+
+def blocking_keys(row):
+    """ ``{digest: kind}`` for a client given as a dict of ``KEY_FIELDS``. """
+    values = defaultdict(set)
+    name = _person(row["name"])
+    if name:
+        if words(row["father_name"]):
+            values["name_father"].add(f"{name}|{_person(row['father_name'])}")
+        if words(row["mother_name"]):
+            values["name_mother"].add(f"{name}|{_person(row['mother_name'])}")
+    for field in ("contact_number", "alternative_number"):
+        digits = normalize_phone(row[field])
+        if len(digits) >= PHONE_SUFFIX:
+            values["phone"].add(digits[-PHONE_SUFFIX:])
+    mailbox = _mailbox(row["gmail"])
+    if len(mailbox) >= 4:
+        values["email"].add(mailbox)
+    references = sorted(
+        digits for digits in (normalize_phone(row[f"reference_number_{n}"]) for n in (1, 2))
+        if len(digits) >= PHONE_SUFFIX
+    )
+    values["reference"].update(references)
+    if len(set(references)) == 2:
+        values["references"].add("|".join(references))
+    return {_digest(kind, value): kind for kind, kind_values in values.items() for value in kind_values}
+
+
+def _rows(client_ids):
+    return Client.objects.filter(pk__in=client_ids).profile_values("id", *KEY_FIELDS)
+
+
+def index_clients(client_ids, batch_size=2000):
+    """ Replace the blocking keys of ``client_ids`` with ones built from their current values. """
+    client_ids = list(client_ids)
+    with transaction.atomic():
+        ClientBlockingKey.objects.filter(client_id__in=client_ids).delete()
+        ClientBlockingKey.objects.bulk_create(
+            (
+                ClientBlockingKey(key=key, kind=kind, client_id=row["id"])
+                for row in _rows(client_ids).iterator()
+                for key, kind in blocking_keys(row).items()
+            ),
+            batch_size=batch_size,
+        )
+
+
+def candidates(row, exclude_from=None):
+    """
+    ``[(client_id, score, kinds)]`` of existing clients sharing keys with
+    ``row``, best first. With ``exclude_from`` only clients with a smaller id
+    are considered, so a batch checked against itself flags each pair once.
+    """
+    keys = blocking_keys(row)
+    if not keys:
+        return []
+    matches = ClientBlockingKey.objects.filter(key__in=keys)
+    if exclude_from is not None:
+        matches = matches.filter(client_id__lt=exclude_from)
+    shared = defaultdict(set)
+    for client_id, key in matches.order_by("-client_id").values_list("client_id", "key")[:MAX_MATCHES]:
+        shared[client_id].add(keys[key])
+    scored = [
+        (client_id, min(sum(KEY_WEIGHTS[kind] for kind in kinds), Decimal("1.00")), sorted(kinds))
+        for client_id, kinds in shared.items()
+    ]
+    return sorted(scored, key=lambda item: (-item[1], -item[0]))
+
+
+def check_clients(client_ids):
+    """ Index ``client_ids`` and flag older clients they probably duplicate. Returns the new flags. """
+    client_ids = list(client_ids)
+    index_clients(client_ids)
+    flags = [
+        DuplicateFlag(client_id=row["id"], duplicate_of_id=other_id, score=score, reasons=kinds)
+        for row in list(_rows(client_ids))
+        for other_id, score, kinds in candidates(row, exclude_from=row["id"])
+        if score >= FLAG_THRESHOLD
+    ]
+    return DuplicateFlag.objects.bulk_create(flags, ignore_conflicts=True)
+
+
+def rebuild(batch_size=2000):
+    """ Rebuild every blocking key in id-ordered batches (flags are left alone). """
+    ClientBlockingKey.objects.all().delete()
+    indexed, last_id = 0, 0
+    while True:
+        ids = list(Client.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return indexed
+        index_clients(ids)
+        indexed += len(ids)
+        last_id = ids[-1]
@@ -0,0 +1,325 @@
+"""
+Document ingestion pipeline for ``EmployeeClientDetails`` images.
+
+1. The client opens a ``DocumentUpload`` and PUTs the file in chunks at
+   increasing offsets (a dropped connection resumes from ``received_size``).
+   Chunks are appended to a staging file; the request thread does nothing else.
+2. Once the last byte arrives the upload is queued as a background job
+   (``api/jobs.py``). The job re-encodes and downscales the image, hashes
+   the result and attaches it to the details row. Document fields use the
+   content-addressed ``documents`` storage (``api/storage.py``), so bytes
+   that are already stored are not written again.
+
+Every document field that names a stored file counts as one reference in
+its ``DocumentBlob`` row (kept up to date by ``api/signals.py``). A file
+nobody has referenced for ``DOCUMENT_GC_GRACE_SECONDS`` is deleted by the
+``documents.collect`` job, with its thumbnails. Thumbnails are rendered on
+first request at the fixed ``DOCUMENT_THUMBNAIL_SIZES`` and stored next to
+the file; processing renders the ``DOCUMENT_THUMBNAIL_SIZE`` one up front.
+
+Uploads still ``queued``/``processing`` whose job is gone or failed can be
+queued again with ``manage.py process_document_uploads``; ``manage.py
+rebuild_document_refcounts`` recounts the references after bulk changes.
+"""
+import hashlib
+import io
+import os
+from collections import Counter, defaultdict
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import jobs
+from .models import DocumentBlob, DocumentUpload, EmployeeClientDetails, Job
+from .storage import digest, document_storage, thumbnail_name
+
+
+class UploadError(Exception):
+    pass
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def staging_path(upload):
+    root = Path(setting("DOCUMENT_UPLOAD_TEMP_DIR", Path(settings.MEDIA_ROOT) / "uploads" / "partial"))
+    root.mkdir(parents=True, exist_ok=True)
+    return root / f"{upload.pk}.part"
+
+
+def start(details, field, filename, total_size, user):
+    if field not in EmployeeClientDetails.DOCUMENT_FIELDS:
+        raise UploadError(f"Unknown document field '{field}'.")
+    if not 0 < total_size <= setting("DOCUMENT_UPLOAD_MAX_SIZE", 25 * 1024 * 1024):
+        raise UploadError("Document size is zero or above the upload limit.")
+    upload = DocumentUpload.objects.create(
+        details=details, field=field, filename=os.path.basename(filename)[:255],
+        total_size=total_size, uploaded_by=user,
+    )
+    staging_path(upload).touch()
+    return upload
+
+
+def append_chunk(upload, offset, stream, length):
+    """
+    Append ``length`` bytes from ``stream`` at ``offset``. Returns True when
+    the upload is complete and has been queued for processing. ``upload`` is
+    reloaded under a row lock, so concurrent chunks for it are appended one
+    at a time and each is checked against the offset the previous one left.
+    """
+    with transaction.atomic():
+        upload.refresh_from_db(from_queryset=DocumentUpload.objects.select_for_update())
+        if upload.status != "uploading":
+            raise UploadError("Upload is already complete.")
+        if offset != upload.received_size:
+            raise UploadError(f"Expected offset {upload.received_size}.")
+        if length > setting("DOCUMENT_UPLOAD_MAX_CHUNK_SIZE", 8 * 1024 * 1024) or offset + length > upload.total_size:
+            raise UploadError("Chunk is too large.")
+
+        path = staging_path(upload)
+        with open(path, "r+b") as staged:
+            staged.truncate(offset)  # drop the tail of an interrupted earlier attempt
+            staged.seek(offset)
+            remaining = length
+            while remaining:
+                block = stream.read(min(remaining, 64 * 1024))
+                if not block:
+                    break
+                staged.write(block)
+                remaining -= len(block)
+        if remaining:
+            raise UploadError("Request body shorter than Content-Length.")
+
+        upload.received_size = offset + length
+        if upload.received_size < upload.total_size:
+            upload.save(update_fields=["received_size", "updated_at"])
+            return False
+
+        upload.status = "queued"
+        upload.save(update_fields=["received_size", "status", "updated_at"])
+        enqueue(upload.pk)
+    return True
+
+
+def enqueue(upload_id):
+    jobs.enqueue("documents.process", {"upload_id": str(upload_id)}, key=f"document-upload:{upload_id}")
+
+
+def resume_pending():
+    """ Queue uploads left queued or mid-processing (e.g. their job failed or was purged) again. """
+    pending = list(DocumentUpload.objects.filter(status__in=["queued", "processing"]).values_list("pk", flat=True))
+    with transaction.atomic():
+        # A finished job row still holds the upload's key; drop it so the upload can be queued again
+        Job.objects.filter(
+            idempotency_key__in=[f"document-upload:{upload_id}" for upload_id in pending], status__in=["done", "failed"]
+        ).delete()
+        for upload_id in pending:
+            enqueue(upload_id)
+    return len(pending)
+
+
+def encode(image, max_dimension, quality=85):
+    image = image.copy()
+    image.thumbnail((max_dimension, max_dimension))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+@jobs.task("documents.process", max_attempts=3)
+def process(upload_id):
+    claimed = DocumentUpload.objects.filter(pk=upload_id, status__in=["queued", "processing"]).update(status="processing")
+    if not claimed:
+        return
+    upload = DocumentUpload.objects.select_related("details").get(pk=upload_id)
+    path = staging_path(upload)
+    try:
+        with Image.open(path) as original:
+            image = ImageOps.exif_transpose(original).convert("RGB")
+        document = encode(image, setting("DOCUMENT_MAX_DIMENSION", 2048))
+    except (OSError, Image.DecompressionBombError) as exc:
+        upload.status, upload.error = "failed", f"Not a readable image: {exc}"
+        upload.save(update_fields=["status", "error", "updated_at"])
+        path.unlink(missing_ok=True)
+        return
+
+    upload.sha256 = hashlib.sha256(document).hexdigest()
+    details = upload.details
+    field = getattr(details, upload.field)
+    with transaction.atomic():
+        # Content-addressed: the same bytes uploaded for another client are not stored twice
+        field.save(f"{upload.field}.jpg", ContentFile(document), save=False)
+        if not keep(field.name):  # the existing copy was collected meanwhile
+            field.save(f"{upload.field}.jpg", ContentFile(document), save=False)
+        details.save(update_fields=[upload.field, "updated_at"])  # counts the reference
+        upload.thumbnail.name = thumbnail(field.name, setting("DOCUMENT_THUMBNAIL_SIZE", 256), image)
+        upload.stored_name = field.name
+        upload.status, upload.error = "ready", ""
+        upload.save(update_fields=["sha256", "stored_name", "thumbnail", "status", "error", "updated_at"])
+    path.unlink(missing_ok=True)
+
+
+def thumbnail(name, size, image=None):
+    """
+    Name of the ``size`` px thumbnail of the stored document ``name``,
+    rendering it (from ``image`` if given) on first use. ``None`` for files
+    stored before content addressing, which have no thumbnails.
+    """
+    sha256 = digest(name)
+    if sha256 is None:
+        return None
+    storage, target = document_storage(), thumbnail_name(sha256, size)
+    if not storage.exists(target):
+        if image is None:
+            with storage.open(name) as source, Image.open(source) as original:
+                image = ImageOps.exif_transpose(original).convert("RGB")
+        storage.save_derived(target, ContentFile(encode(image, size, quality=75)))
+    return target
+
+
+def version(name):
+    """ Short, stable token for a stored name (content-addressed names change with the content). """
+    return hashlib.blake2b(name.encode(), digest_size=8).hexdigest()
+
+
+def keep(name):
+    """
+    Whether the stored file ``name`` exists. Its ``DocumentBlob`` row is
+    locked until the transaction ends, so ``collect()`` cannot delete the file
+    before a row referencing it is saved; call this before that save.
+    """
+    sha256 = digest(name)
+    if sha256:
+        list(DocumentBlob.objects.select_for_update().filter(pk=sha256).values_list("pk"))
+    return document_storage().exists(name)
+
+
+def retain(names):
+    """ Count one more reference to each stored file in ``names`` (part of the current transaction). """
+    counts = Counter(sha256 for sha256 in map(digest, names) if sha256)
+    if not counts:
+        return
+    storage, now = document_storage(), timezone.now()
+    blob_names = {digest(name): name for name in names if digest(name)}
+    DocumentBlob.objects.bulk_create(
+        [DocumentBlob(sha256=sha256, name=blob_names[sha256], size=_size(storage, blob_names[sha256]),
+                      updated_at=now) for sha256 in counts],
+        ignore_conflicts=True,
+    )
+    _add(counts, now)
+
+
+def release(names):
+    """ Count one reference less to each stored file in ``names``; collection is scheduled after the grace period. """
+    counts = Counter(sha256 for sha256 in map(digest, names) if sha256)
+    if not counts:
+        return
+    _add({sha256: -count for sha256, count in counts.items()}, timezone.now())
+    grace = setting("DOCUMENT_GC_GRACE_SECONDS", 3600)
+    run_at = timezone.now() + timedelta(seconds=grace)
+    # At most one collection per hour: the key is taken while the queued job row exists
+    jobs.enqueue("documents.collect", key=f"documents-collect:{run_at:%Y%m%d%H}", delay=grace + 60)
+
+
+def _add(deltas, now, batch_size=500):
+    by_delta = defaultdict(list)
+    for sha256, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(sha256)
+    for delta, shas in by_delta.items():
+        for start in range(0, len(shas), batch_size):
+            DocumentBlob.objects.filter(sha256__in=shas[start:start + batch_size]).update(
+                ref_count=F("ref_count") + delta, updated_at=now
+            )
+
+
+def _size(storage, name):
+    try:
+        return storage.size(name)
+    except OSError:
+        return 0
+
+
+@jobs.task("documents.collect")
+def collect():
+    """ Delete stored files (and their thumbnails) nothing has referenced for ``DOCUMENT_GC_GRACE_SECONDS``. """
+    cutoff = timezone.now() - timedelta(seconds=setting("DOCUMENT_GC_GRACE_SECONDS", 3600))
+    unreferenced = Q(ref_count__lte=0, updated_at__lt=cutoff)
+    storage, collected = document_storage(), 0
+    for sha256 in list(DocumentBlob.objects.filter(unreferenced).values_list("sha256", flat=True)):
+        with transaction.atomic():
+            blob = DocumentBlob.objects.select_for_update().filter(unreferenced, pk=sha256).first()
+            if blob is None:  # referenced again meanwhile
+                continue
+            storage.delete(blob.name)
+            for size in setting("DOCUMENT_THUMBNAIL_SIZES", (128, 256, 512)):
+                storage.delete(thumbnail_name(sha256, size))
+            blob.delete()
+            collected += 1
+    return collected
+
+
+def referenced_names():
+    """ Every stored name the document fields point at, once per reference. """
+    for row in EmployeeClientDetails.objects.values_list(*EmployeeClientDetails.DOCUMENT_FIELDS).iterator():
+        yield from (name for name in row if name)
+
+
+def migrate_legacy():
+    """
+    Move files stored before content addressing (``documents/...``) into the
+    content-addressed storage and repoint the details rows. Returns the
+    number of files moved. Run ``recount()`` afterwards.
+    """
+    storage, moved = document_storage(), 0
+    for name in sorted({name for name in referenced_names() if digest(name) is None}):
+        if not storage.exists(name):
+            continue
+        with storage.open(name) as source:
+            stored = storage.save(name, source)
+        for field in EmployeeClientDetails.DOCUMENT_FIELDS:
+            EmployeeClientDetails.objects.filter(**{field: name}).update(**{field: stored})
+        DocumentUpload.objects.filter(stored_name=name).update(stored_name=stored)
+        storage.delete(name)
+        moved += 1
+    return moved
+
+
+def recount():
+    """
+    Recompute every ``DocumentBlob`` from the details rows (after bulk
+    inserts or updates, which send no signals). Returns ``(references,
+    files, referenced bytes, stored bytes)`` for the referenced files.
+    """
+    counts, names = Counter(), {}
+    for name in referenced_names():
+        sha256 = digest(name)
+        if sha256:
+            counts[sha256] += 1
+            names[sha256] = name
+    storage, now = document_storage(), timezone.now()
+    with transaction.atomic():
+        DocumentBlob.objects.exclude(ref_count=0).update(ref_count=0, updated_at=now)
+        known = set(DocumentBlob.objects.values_list("sha256", flat=True))
+        DocumentBlob.objects.bulk_create(
+            [
+                DocumentBlob(sha256=sha256, name=names[sha256], size=_size(storage, names[sha256]), updated_at=now)
+                for sha256 in counts if sha256 not in known
+            ],
+            batch_size=1000,
+        )
+        _add(counts, now)
+        if DocumentBlob.objects.filter(ref_count__lte=0).exists():
+            jobs.enqueue("documents.collect", delay=setting("DOCUMENT_GC_GRACE_SECONDS", 3600) + 60)
+
+    totals = DocumentBlob.objects.filter(ref_count__gt=0).aggregate(
+        files=Count("sha256"), references=Sum("ref_count"), stored=Sum("size"), referenced=Sum(F("size") * F("ref_count"))
+    )
+    return totals["references"] or 0, totals["files"], totals["referenced"] or 0, totals["stored"] or 0
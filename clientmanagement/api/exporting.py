@@ -0,0 +1,104 @@
+"""
+Constant-memory export of clients joined with their employee and document details.
+
+Rows are read in keyset batches ordered by id, so neither the database
+driver nor Python ever holds more than one batch, whatever the table size.
+"""
+import csv
+import tempfile
+
+from .models import Client, EmployeeClientDetails
+
+FORMATS = ("csv", "xlsx")
+DEFAULT_BATCH_SIZE = 2000
+
+# Client and ClientProfile columns, in the layout exports had before the profile split
+CLIENT_COLUMNS = [
+    "id", "name", "contact_number", "alternative_number", "father_name", "mother_name", "qualifications",
+    "married_status", "current_address", "landmark", "years_at_address", "gmail", "office_name", "office_address",
+    "designation", "department", "current_experience", "overall_experience", "reference_name_1",
+    "reference_number_1", "reference_name_2", "reference_number_2", "expected_loan_amount", "loan_purpose",
+    "client_type", "assigned_employee_id", "approval_status", "created_at", "submitted_at",
+]
+EMPLOYEE_COLUMNS = ["assigned_employee_username", "assigned_employee_email"]
+DETAILS_COLUMNS = [
+    field.attname for field in EmployeeClientDetails._meta.concrete_fields
+    if field.name not in ("id", "client")
+]
+HEADER = CLIENT_COLUMNS + EMPLOYEE_COLUMNS + [f"details_{name}" for name in DETAILS_COLUMNS]
+
+
+def export_queryset(queryset=None):
+    if queryset is None:
+        queryset = Client.objects.all()
+    return queryset.select_related("profile", "extra_details", "assigned_employee")
+
+
+def iter_clients(queryset, batch_size=DEFAULT_BATCH_SIZE):
+    """ Yield clients in id order, one ``WHERE id > last LIMIT batch_size`` query at a time. """
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id).order_by("id")[:batch_size])
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1].id
+
+
+def _cell(value):
+    if hasattr(value, "name") and hasattr(value, "storage"):  # FieldFile
+        return value.name or ""
+    if value is None:
+        return ""
+    return value
+
+
+def client_row(client):
+    row = [getattr(client, name) for name in CLIENT_COLUMNS]
+    employee = client.assigned_employee
+    row += [employee.username, employee.email] if employee else [None, None]
+    try:
+        details = client.extra_details
+    except EmployeeClientDetails.DoesNotExist:
+        details = None
+    row += [getattr(details, name) if details else None for name in DETAILS_COLUMNS]
+    return [_cell(value) for value in row]
+
+
+def iter_rows(queryset, batch_size=DEFAULT_BATCH_SIZE):
+    yield HEADER
+    for client in iter_clients(export_queryset(queryset), batch_size):
+        yield client_row(client)
+
+
+class Echo:
+    """ File-like object whose write() hands the encoded line back instead of buffering it. """
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_xlsx(rows, target):
+    """
+    Write rows with openpyxl's write-only workbook, which streams rows to
+    disk instead of building the sheet in memory. openpyxl is optional.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("clients")
+    for row in rows:
+        sheet.append([value.replace(tzinfo=None) if getattr(value, "tzinfo", None) else value for value in row])
+    workbook.save(target)
+
+
+def xlsx_tempfile(rows):
+    target = tempfile.TemporaryFile(suffix=".xlsx")
+    write_xlsx(rows, target)
+    target.seek(0)
+    return target
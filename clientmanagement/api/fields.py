@@ -0,0 +1,53 @@
+from django.core import checks
+from django.db import models
+
+
+class CompactChoiceField(models.Field):
+    """
+    A choice column stored as a small integer code instead of its string.
+
+    Python code, filters, serializers and ``values()`` keep using the string
+    values ("pending", "direct", ...); only the database sees the codes
+    (``SMALLINT UNSIGNED``, 2 bytes, instead of a ``VARCHAR``), which keeps
+    the rows and every index containing the column narrow. ``codes`` maps
+    each value to its code and must never renumber an existing value.
+    """
+
+    def __init__(self, *args, codes=None, **kwargs):
+        self.codes = dict(codes or {})
+        self.values_by_code = {code: value for value, code in self.codes.items()}
+        super().__init__(*args, **kwargs)
+
+    def check(self, **kwargs):
+        errors = super().check(**kwargs)
+        missing = [value for value, _ in self.flatchoices if value not in self.codes]
+        if missing:
+            errors.append(checks.Error(f"No code for choices {missing}.", obj=self, id="api.E001"))
+        if len(self.values_by_code) != len(self.codes):
+            errors.append(checks.Error("Two choices share a code.", obj=self, id="api.E002"))
+        return errors
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["codes"] = self.codes
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return "PositiveSmallIntegerField"
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else self.values_by_code[value]
+
+    def to_python(self, value):
+        if isinstance(value, int) and value in self.values_by_code:
+            return self.values_by_code[value]
+        return value
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None or isinstance(value, int):
+            return value
+        try:
+            return self.codes[value]
+        except KeyError:
+            raise ValueError(f"{value!r} is not one of {sorted(self.codes)} for {self.name}.") from None
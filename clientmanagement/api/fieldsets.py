@@ -0,0 +1,150 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from . import compiled
+from .models import Client
+from .serializers import ClientSerializer, ClientSummarySerializer
+
+
+def serializer_columns(serializer, model, prefix=""):
+    """
+    Return ``(columns, related)`` read by ``serializer`` from ``model``:
+    the ``.only()`` paths and the ``select_related()`` paths that let nested
+    serializers render without extra queries.
+    """
+    columns, related = [], []
+    for field in serializer.fields.values():
+        name = field.source.split(".")[0]
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        path = prefix + name
+        if isinstance(field, serializers.BaseSerializer) and model_field.is_relation:
+            nested_columns, nested_related = serializer_columns(field, model_field.related_model, path + "__")
+            columns += [path, *nested_columns]
+            related += [path, *nested_related]
+        elif model_field.is_relation and len(field.source_attrs) == 2:
+            # A column of a one-to-one row, e.g. ``source="profile.father_name"``
+            columns += [path, f"{path}__{field.source_attrs[1]}"]
+            related.append(path)
+        elif model_field.concrete:
+            columns.append(path)
+    return list(dict.fromkeys(columns)), list(dict.fromkeys(related))
+
+
+CLIENT_VIEWS = {
+    "summary": ClientSummarySerializer,
+    "full": ClientSerializer,
+}
+
+
+# Relations rendered by the full ClientSerializer (used for write responses)
+CLIENT_RELATED = tuple(serializer_columns(ClientSerializer(), Client)[1])
+
+
+class ClientFieldset:
+    """
+    Resolves ``?view=summary|full`` and ``?fields=a,b,c`` into a serializer
+    class plus field list, and narrows the SQL to the matching columns.
+
+    ``?fields=`` picks from the full ``ClientSerializer`` field set and wins
+    over ``?view=``; without either, ``default_view`` is used.
+    """
+
+    def __init__(self, params, default_view="summary"):
+        requested = params.get("fields")
+        if requested:
+            self.serializer_class = ClientSerializer
+            self.fields = [name.strip() for name in requested.split(",") if name.strip()]
+            unknown = set(self.fields) - set(ClientSerializer().fields)
+            if unknown:
+                raise ValidationError({"fields": f"Unknown fields: {', '.join(sorted(unknown))}"})
+            return
+
+        view = params.get("view", default_view)
+        if view not in CLIENT_VIEWS:
+            raise ValidationError({"view": f"Expected one of: {', '.join(CLIENT_VIEWS)}"})
+        self.serializer_class = CLIENT_VIEWS[view]
+        self.fields = None
+
+    def serializer(self, *args, **kwargs):
+        return self.serializer_class(*args, fields=self.fields, **kwargs)
+
+    @cached_property
+    def compiled(self):
+        """ The selected serializer compiled for lists (``api/compiled.py``), or ``None``. """
+        if not compiled.enabled():
+            return None
+        return compiled.compile_serializer(self.serializer_class, tuple(self.fields) if self.fields is not None else None)
+
+    def rows(self, queryset, *required):
+        """ ``queryset`` (after ``apply()``) as the list items ``render()`` takes. """
+        return self.compiled.rows(queryset, *required) if self.compiled is not None else queryset
+
+    def render(self, rows, context=None):
+        """ ``serializer(rows, many=True).data``, from values rows on the compiled path. """
+        if self.compiled is not None:
+            return self.compiled.data(rows, context)
+        return self.serializer(rows, many=True, context=context or {}).data
+
+    @cached_property
+    def _columns(self):
+        return serializer_columns(self.serializer_class(fields=self.fields), Client)
+
+    @property
+    def columns(self):
+        """ ``Client`` columns (and related ``a__b`` columns) read by the selected fields. """
+        return self._columns[0]
+
+    @property
+    def related(self):
+        """ Relations rendered by nested serializers, to be fetched with ``select_related``. """
+        return self._columns[1]
+
+    def apply(self, queryset, *required):
+        """
+        Join what nested fields render and defer every column the response
+        will not read. ``required`` columns are always kept.
+        """
+        if self.related:
+            queryset = queryset.select_related(*self.related)
+        return queryset.only(*dict.fromkeys([*required, *self.columns]))
+
+
+class ClientFieldsetMixin:
+    """ Serializes GET responses of generic ``Client`` views through a ``ClientFieldset``. """
+    default_client_view = "full"
+    required_columns = ("id",)
+
+    @cached_property
+    def client_fieldset(self):
+        return ClientFieldset(self.request.query_params, self.default_client_view)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method == "GET":
+            return self.client_fieldset.apply(queryset, *self.required_columns)
+        return queryset.select_related(*CLIENT_RELATED)
+
+    def get_serializer_class(self):
+        if self.request.method == "GET":
+            return self.client_fieldset.serializer_class
+        return super().get_serializer_class()
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == "GET":
+            kwargs["fields"] = self.client_fieldset.fields
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        fieldset = self.client_fieldset
+        if fieldset.compiled is None:
+            return super().list(request, *args, **kwargs)
+        rows = fieldset.rows(self.filter_queryset(self.get_queryset()), *self.required_columns)
+        page = self.paginate_queryset(rows)
+        data = fieldset.render(rows if page is None else page, self.get_serializer_context())
+        return Response(data) if page is None else self.get_paginated_response(data)
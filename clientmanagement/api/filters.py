@@ -0,0 +1,63 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Client
+
+
+def _parse_bound(value, param, end_of_day=False):
+    """ Accept either an ISO date or an ISO datetime for created-at bounds. """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({param: "Expected an ISO 8601 date or datetime."})
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_clients(queryset, params):
+    """
+    Apply the server-side client list filters from ``params``.
+
+    Supported query parameters: ``approval_status``, ``client_type``,
+    ``assigned_employee`` (an id, or ``none`` for unassigned clients),
+    ``created_after`` and ``created_before``. Each filter lines up with one
+    of the composite ``(<column>, created_at, id)`` indexes on ``Client``.
+    """
+    approval_status = params.get("approval_status")
+    if approval_status:
+        if approval_status not in dict(Client.status_choices):
+            raise ValidationError({"approval_status": f"Unknown status '{approval_status}'."})
+        queryset = queryset.filter(approval_status=approval_status)
+
+    client_type = params.get("client_type")
+    if client_type:
+        if client_type not in dict(Client.CLIENT_TYPE_CHOICES):
+            raise ValidationError({"client_type": f"Unknown client type '{client_type}'."})
+        queryset = queryset.filter(client_type=client_type)
+
+    assigned_employee = params.get("assigned_employee")
+    if assigned_employee:
+        if assigned_employee.lower() == "none":
+            queryset = queryset.filter(assigned_employee__isnull=True)
+        elif assigned_employee.isdigit():
+            queryset = queryset.filter(assigned_employee_id=int(assigned_employee))
+        else:
+            raise ValidationError({"assigned_employee": "Expected an employee id or 'none'."})
+
+    created_after = params.get("created_after")
+    if created_after:
+        queryset = queryset.filter(created_at__gte=_parse_bound(created_after, "created_after"))
+
+    created_before = params.get("created_before")
+    if created_before:
+        queryset = queryset.filter(
+            created_at__lte=_parse_bound(created_before, "created_before", end_of_day=True)
+        )
+
+    return queryset
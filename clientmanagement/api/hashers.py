@@ -0,0 +1,32 @@
+"""
+Password hashers with their work factor taken from settings.
+
+Costs come from PASSWORD_HASH_COSTS (see settings.py and
+``manage.py calibrate_password_hasher``). Because each hasher's
+``must_update()`` compares stored parameters with these, raising or
+lowering a cost transparently rehashes passwords on the next login.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+
+
+def cost(name, default):
+    return getattr(settings, "PASSWORD_HASH_COSTS", {}).get(name, default)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = cost("ARGON2_TIME_COST", Argon2PasswordHasher.time_cost)
+    memory_cost = cost("ARGON2_MEMORY_COST", Argon2PasswordHasher.memory_cost)
+    parallelism = cost("ARGON2_PARALLELISM", Argon2PasswordHasher.parallelism)
+
+
+class TunedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    rounds = cost("BCRYPT_ROUNDS", BCryptSHA256PasswordHasher.rounds)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = cost("PBKDF2_ITERATIONS", PBKDF2PasswordHasher.iterations)
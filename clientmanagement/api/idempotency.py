@@ -0,0 +1,123 @@
+"""
+``Idempotency-Key`` support for the endpoints that create clients.
+
+A client that sends ``Idempotency-Key: <unique value>`` can retry the same
+POST safely. The first request reserves the key in the cache (``cache.add``,
+atomic on every backend) with a pending entry and, once the view has
+returned, the key is stored with the response status and data for
+``IDEMPOTENCY_KEY_TTL`` seconds. The pending entry lasts
+``IDEMPOTENCY_LOCK_TIMEOUT`` seconds, far longer than any request may run,
+so it only ever expires for a worker that died mid-request. A
+retry with the same key is answered from that entry with one cache lookup:
+the view, the serializer and the ``Client`` table are never touched, and the
+response carries ``Idempotent-Replayed: true``.
+
+Keys are scoped to the user (anonymous for the public form) and the path.
+Each entry keeps a fingerprint of the parsed request body. Reusing a key for
+a different body gets 422. A retry that arrives while the first request is
+still running gets 409 with ``Retry-After``, however long it takes. Server
+errors (5xx) and exceptions drop the pending entry instead of storing it, so
+a request that failed that way can be retried with the same key.
+
+As with the response cache, multi-process deployments need a shared cache
+backend so every worker sees the same keys.
+"""
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def fingerprint(request):
+    """ Hash of the parsed body, independent of key order and encoding (JSON, form). """
+    data = request.data
+    if hasattr(data, "lists"):  # QueryDict from a form post
+        data = {name: values for name, values in data.lists()}
+    body = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+class IdempotentRequest:
+    """ One request's use of its ``Idempotency-Key`` header (``key`` is ``None`` without one). """
+
+    def __init__(self, request):
+        self.key = request.headers.get(HEADER) or None
+        if self.key is None:
+            return
+        identity = repr((request.user.pk, request.path, self.key))
+        self.cache_key = f"api:idempotency:{hashlib.blake2b(identity.encode(), digest_size=16).hexdigest()}"
+        self.fingerprint = fingerprint(request)
+
+    def begin(self):
+        """
+        Reserve the key. Returns ``None`` if this request should run, otherwise
+        ``(status, data, headers)`` to answer with instead.
+        """
+        if len(self.key) > MAX_KEY_LENGTH:
+            return status.HTTP_400_BAD_REQUEST, {"error": f"{HEADER} is longer than {MAX_KEY_LENGTH} characters"}, {}
+        entry = {"fingerprint": self.fingerprint, "status": None}
+        if cache.add(self.cache_key, entry, setting("IDEMPOTENCY_LOCK_TIMEOUT", 3600)):
+            return None
+
+        entry = cache.get(self.cache_key)
+        if entry is not None and entry["fingerprint"] != self.fingerprint:
+            return (
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+                {"error": f"This {HEADER} was already used for a different request"},
+                {},
+            )
+        if entry is None or entry["status"] is None:  # still running (or it finished and failed just now)
+            return (
+                status.HTTP_409_CONFLICT,
+                {"error": f"A request with this {HEADER} is still being processed"},
+                {"Retry-After": "1"},
+            )
+        return entry["status"], entry["data"], {"Idempotent-Replayed": "true"}
+
+    def finish(self, status_code, data):
+        """ Store the outcome for replays; a 5xx releases the key instead. """
+        if status_code >= 500:
+            self.release()
+            return
+        entry = {"fingerprint": self.fingerprint, "status": status_code, "data": data}
+        cache.set(self.cache_key, entry, setting("IDEMPOTENCY_KEY_TTL", 86400))
+
+    def release(self):
+        cache.delete(self.cache_key)
+
+
+def idempotent(post):
+    """
+    Decorator for a view's ``post`` method. Runs after authentication and
+    permission checks, so a replay never bypasses them.
+    """
+    @functools.wraps(post)
+    def wrapper(view, request, *args, **kwargs):
+        idempotency = IdempotentRequest(request)
+        if idempotency.key is None:
+            return post(view, request, *args, **kwargs)
+
+        answer = idempotency.begin()
+        if answer is not None:
+            status_code, data, headers = answer
+            return Response(data, status=status_code, headers=headers)
+        try:
+            response = post(view, request, *args, **kwargs)
+        except BaseException:
+            idempotency.release()
+            raise
+        idempotency.finish(response.status_code, response.data)
+        return response
+
+    return wrapper
@@ -0,0 +1,187 @@
+"""
+Streaming bulk import of clients from CSV or JSON Lines.
+
+Rows are validated and inserted in chunks: one query per chunk checks the
+``contact_number``/``gmail`` unique constraints, one query spreads the new
+clients over employees, and two ``bulk_create`` calls write them and their
+profiles. A bad row is
+reported and skipped without aborting the rest of the file.
+"""
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from . import assignment
+from .models import Client, ClientProfile
+from .serializers import ClientSerializer
+from .signals import clients_bulk_created
+
+FORMATS = ("csv", "jsonl")
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class ClientImportSerializer(ClientSerializer):
+    """ Field validation only; uniqueness and assignment are handled per chunk by the importer. """
+    class Meta(ClientSerializer.Meta):
+        fields = [name for name in ClientSerializer.Meta.fields if name not in ("assigned_employee", "approval_status")]
+        extra_kwargs = {
+            "contact_number": {"validators": []},
+            "gmail": {"validators": []},
+        }
+
+
+def detect_format(filename, default="csv"):
+    for fmt in FORMATS:
+        if filename and filename.lower().endswith(f".{fmt}"):
+            return fmt
+    if filename and filename.lower().endswith(".json"):
+        return "jsonl"
+    return default
+
+
+def read_rows(stream, fmt):
+    """ Yield ``(row_number, row_or_error)`` from a binary stream, one record at a time. """
+    text = codecs.getreader("utf-8-sig")(stream)
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            yield number, {key.strip(): value for key, value in row.items() if key}
+        return
+
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, ValueError(f"Invalid JSON: {exc}")
+            continue
+        if not isinstance(row, dict):
+            yield number, ValueError("Expected a JSON object.")
+            continue
+        yield number, row
+
+
+class ClientImporter:
+    """
+    Imports client rows and builds a per-row error report.
+
+    ``employee`` imports everything as that employee's employee-registered
+    clients; otherwise rows become direct clients spread over employees.
+    """
+
+    def __init__(self, employee=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.employee = employee
+        self.chunk_size = chunk_size
+        self.total = 0
+        self.created = 0
+        self.errors = []
+        self._seen_contacts = set()
+        self._seen_gmails = set()
+
+    @property
+    def report(self):
+        return {
+            "total_rows": self.total,
+            "created": self.created,
+            "failed": len(self.errors),
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+        }
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return self.report
+            self.import_chunk(chunk)
+
+    def import_chunk(self, chunk):
+        self.total += len(chunk)
+        valid = []
+        for number, row in chunk:
+            if isinstance(row, Exception):
+                self.add_error(number, {"non_field_errors": [str(row)]})
+                continue
+            serializer = ClientImportSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((number, serializer.validated_data))
+            else:
+                self.add_error(number, serializer.errors)
+
+        valid = self.drop_duplicates(valid)
+        if not valid:
+            return
+
+        if self.employee is not None:
+            client_type, employees = "employee_registered", [self.employee.pk] * len(valid)
+        else:
+            client_type, employees = "direct", assignment.distribute(len(valid))
+
+        clients = [
+            Client(**{**ClientSerializer.model_kwargs(data), "client_type": client_type, "assigned_employee_id": employee_id})
+            for (_, data), employee_id in zip(valid, employees)
+        ]
+        try:
+            with transaction.atomic():
+                self.insert(clients)
+        except IntegrityError:
+            # Lost a race with a concurrent insert; fall back to row-by-row for this chunk.
+            for (number, _), client in zip(valid, clients):
+                try:
+                    with transaction.atomic():
+                        self.insert([client])
+                except IntegrityError as exc:
+                    self.add_error(number, {"non_field_errors": [str(exc)]})
+
+    def drop_duplicates(self, valid):
+        """ Reject rows clashing with existing clients (one query) or earlier rows in the file. """
+        contacts = {data["contact_number"] for _, data in valid}
+        gmails = {data["gmail"] for _, data in valid}
+        taken_contacts, taken_gmails = set(), set()
+        for contact, gmail in Client.objects.filter(
+            Q(contact_number__in=contacts) | Q(gmail__in=gmails)
+        ).values_list("contact_number", "gmail"):
+            taken_contacts.add(contact)
+            taken_gmails.add(gmail)
+
+        unique = []
+        for number, data in valid:
+            errors = {}
+            if data["contact_number"] in taken_contacts or data["contact_number"] in self._seen_contacts:
+                errors["contact_number"] = ["client with this contact number already exists."]
+            if data["gmail"] in taken_gmails or data["gmail"] in self._seen_gmails:
+                errors["gmail"] = ["client with this gmail already exists."]
+            if errors:
+                self.add_error(number, errors)
+                continue
+            self._seen_contacts.add(data["contact_number"])
+            self._seen_gmails.add(data["gmail"])
+            unique.append((number, data))
+        return unique
+
+    def insert(self, clients):
+        Client.objects.bulk_create(clients)
+        if clients[0].pk is None:
+            # MySQL does not return primary keys from a bulk INSERT.
+            ids = dict(
+                Client.objects.filter(contact_number__in=[client.contact_number for client in clients])
+                .values_list("contact_number", "id")
+            )
+            for client in clients:
+                client.pk = ids[client.contact_number]
+        ClientProfile.objects.bulk_create([client.profile for client in clients])
+        for client in clients:
+            client._state.adding = False
+            client._profile_changes = set()
+            client._loaded_state = client.tracked_state()
+        clients_bulk_created.send(sender=Client, clients=clients)
+        self.created += len(clients)
+
+    def add_error(self, number, errors):
+        self.errors.append({"row": number, "errors": errors})
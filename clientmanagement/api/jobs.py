@@ -0,0 +1,169 @@
+"""
+Durable background jobs without a broker.
+
+A job is a ``Job`` row naming a registered task and its JSON payload.
+``enqueue()`` inserts it in the caller's transaction, so a job exists if and
+only if the write that asked for it was committed. After the commit the web
+process starts due jobs on a small thread pool (``JOBS_RUN_IN_PROCESS``);
+``manage.py run_jobs`` is the worker pool that picks up whatever is left:
+retries, jobs of a process that stopped, and everything when in-process
+running is off.
+
+Workers claim a job with a conditional ``UPDATE`` (``queued`` -> ``running``
+with a lease), so any number of threads and processes can poll the same
+table; a running job whose lease has expired (its worker died) is claimed
+again. A failed attempt is retried with exponential backoff until the
+task's ``max_attempts``; then the job stays ``failed`` for inspection.
+
+Delivery is at least once: tasks must tolerate running twice. Passing an
+``idempotency_key`` makes enqueueing the same work again (a retried request,
+a double click) a no-op while the first job row exists.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+def task(name, max_attempts=5):
+    """ Register the decorated function as task ``name``; it is called with the payload as keyword arguments. """
+    def register(func):
+        TASKS[name] = (func, max_attempts)
+        return func
+    return register
+
+
+def enqueue(name, payload=None, key=None, delay=0):
+    """ Queue task ``name`` (one INSERT, part of the current transaction). """
+    enqueue_many(name, [(key, payload or {})], delay)
+
+
+def enqueue_many(name, items, delay=0):
+    """ Queue ``(idempotency_key, payload)`` pairs for one task; keys already queued are skipped. """
+    if name not in TASKS:
+        raise LookupError(f"Unknown task '{name}'.")
+    run_at = timezone.now() + timedelta(seconds=delay)
+    jobs = [
+        Job(name=name, payload=payload, idempotency_key=key, max_attempts=TASKS[name][1], run_at=run_at)
+        for key, payload in items
+    ]
+    if not jobs:
+        return
+    Job.objects.bulk_create(jobs, ignore_conflicts=True)
+    if setting("JOBS_RUN_IN_PROCESS", True) and not delay:
+        transaction.on_commit(lambda: executor().submit(_run_in_thread, len(jobs)))
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=setting("JOB_IN_PROCESS_WORKERS", 2), thread_name_prefix="jobs")
+        return _executor
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"[:100]
+
+
+def backoff(attempts):
+    """ Seconds to wait after failed attempt number ``attempts``: exponential, capped, with jitter. """
+    delay = min(setting("JOB_RETRY_BASE_DELAY", 10) * 2 ** (attempts - 1), setting("JOB_RETRY_MAX_DELAY", 3600))
+    return delay * random.uniform(0.75, 1.25)
+
+
+def claim(worker, batch=10):
+    """ Claim the oldest due job (or one whose lease expired); ``None`` if there is nothing to do. """
+    now = timezone.now()
+    due = Q(status="queued", run_at__lte=now) | Q(status="running", locked_until__lt=now)
+    for job_id in Job.objects.filter(due).order_by("run_at", "id").values_list("id", flat=True)[:batch]:
+        claimed = Job.objects.filter(due, pk=job_id).update(
+            status="running", locked_by=worker, attempts=F("attempts") + 1,
+            locked_until=now + timedelta(seconds=setting("JOB_LEASE_SECONDS", 300)),
+        )
+        if claimed:  # otherwise another worker got there first; try the next one
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def execute(job):
+    """ Run a claimed job and record the outcome. """
+    func, _ = TASKS.get(job.name, (None, None))
+    try:
+        if func is None:
+            raise LookupError(f"Unknown task '{job.name}'.")
+        func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()[-4000:]
+        if job.attempts < job.max_attempts:
+            job.status, job.run_at = "queued", timezone.now() + timedelta(seconds=backoff(job.attempts))
+            logger.warning("Job %s failed, retrying at %s", job, job.run_at, exc_info=True)
+        else:
+            job.status, job.finished_at = "failed", timezone.now()
+            logger.exception("Job %s failed for good", job)
+    else:
+        job.status, job.finished_at, job.last_error = "done", timezone.now(), ""
+    job.locked_until = None
+    job.save(update_fields=["status", "run_at", "locked_until", "last_error", "finished_at"])
+
+
+def run_pending(limit=None, worker=None):
+    """ Run due jobs one by one until there are none left (or ``limit`` ran). Returns the number run. """
+    worker = worker or worker_name()
+    count = 0
+    while limit is None or count < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        execute(job)
+        count += 1
+    return count
+
+
+def _run_in_thread(limit=None):
+    """ ``run_pending`` on a worker thread, with its own database connection. """
+    close_old_connections()
+    try:
+        return run_pending(limit)
+    except Exception:
+        logger.exception("Job worker %s failed", worker_name())
+        return 0
+    finally:
+        close_old_connections()
+
+
+def work(stop, poll_interval=1.0):
+    """ Worker thread loop for ``manage.py run_jobs``: run jobs until ``stop`` (an Event) is set. """
+    while not stop.is_set():
+        if not _run_in_thread(limit=100):
+            stop.wait(poll_interval)
+
+
+def purge(days=None):
+    """ Delete finished jobs older than ``days`` (``JOB_RETENTION_DAYS``), which frees their keys. """
+    days = setting("JOB_RETENTION_DAYS", 7) if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status__in=["done", "failed"], finished_at__lt=cutoff).delete()
+    return deleted
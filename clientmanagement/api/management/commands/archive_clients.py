@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import archive
+
+
+def megabytes(size):
+    return "n/a" if size is None else f"{size / 1024 / 1024:.2f} MB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Move decided clients older than ARCHIVE_AFTER_DAYS (with their details and document files) "
+        "to the archive, in batches of one transaction each. --report prints the size of the hot "
+        "tables and the latency of the hot list queries before and after; --restore moves clients back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Clients per transaction (default ARCHIVE_BATCH_SIZE).")
+        parser.add_argument("--limit", type=int, help="Archive at most this many clients.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the clients due for archiving.")
+        parser.add_argument("--report", action="store_true", help="Measure the hot tables before and after.")
+        parser.add_argument("--restore", type=int, nargs="+", metavar="ID", help="Move these clients back.")
+
+    def handle(self, *args, **options):
+        try:
+            if options["restore"]:
+                for client_id in options["restore"]:
+                    archive.restore(client_id)
+                self.stdout.write(self.style.SUCCESS(f"Restored {len(options['restore'])} clients."))
+                return
+
+            if options["dry_run"]:
+                due = archive.eligible().count()
+                self.stdout.write(f"{due} clients are due for archiving.")
+                return
+
+            before = archive.report() if options["report"] else None
+            moved = archive.archive(batch_size=options["batch_size"], limit=options["limit"])
+        except archive.ArchiveError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} clients."))
+        if before is not None:
+            self.write_report(before, archive.report())
+
+    def write_report(self, before, after):
+        self.stdout.write(f"\n{'table':<32} {'rows before':>12} {'rows after':>12} {'size before':>12} {'size after':>12}")
+        for table, old in before["tables"].items():
+            new = after["tables"][table]
+            self.stdout.write(
+                f"{table:<32} {old['rows']:>12} {new['rows']:>12} "
+                f"{megabytes(old['bytes']):>12} {megabytes(new['bytes']):>12}"
+            )
+        self.stdout.write(f"\n{'query':<32} {'p50 ms before':>14} {'p50 ms after':>14}")
+        for name, old in before["latency_ms"].items():
+            self.stdout.write(f"{name:<32} {old:>14.3f} {after['latency_ms'][name]:>14.3f}")
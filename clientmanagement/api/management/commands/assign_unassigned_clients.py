@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.assignment import assign_client
+from api.models import Client
+
+
+class Command(BaseCommand):
+    help = (
+        "Assign direct clients that have no employee yet (e.g. async applications whose "
+        "background assignment was interrupted) to the least-loaded employees."
+    )
+
+    def handle(self, *args, **options):
+        pending = list(
+            Client.objects.filter(client_type="direct", assigned_employee__isnull=True).values_list("pk", flat=True)
+        )
+        assigned = sum(1 for client_id in pending if assign_client(client_id) is not None)
+        self.stdout.write(self.style.SUCCESS(f"Assigned {assigned} of {len(pending)} unassigned direct clients."))
@@ -0,0 +1,80 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from api import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure latency percentiles and queries per request for every API endpoint against the "
+        "current database (seed it with `manage.py seed_synthetic`; point DB_ENGINE/DB_NAME at a "
+        "SQLite file or a local MySQL to run offline). Writes are rolled back. --save stores the "
+        "results as a baseline; --compare fails when an endpoint got slower than --tolerance allows, "
+        "runs more queries than before, or returns an unexpected status."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--only", help="Comma-separated endpoint names (see the output) to run.")
+        parser.add_argument("--password", default="synthetic-password",
+                            help="Password of the seeded users (for the login endpoint).")
+        parser.add_argument("--cache", action="store_true", help="Keep the response cache enabled.")
+        parser.add_argument("--save", metavar="PATH", help="Write the results to a JSON file.")
+        parser.add_argument("--compare", metavar="PATH", help="Compare against a saved JSON baseline.")
+        parser.add_argument("--tolerance", type=float, default=0.5,
+                            help="Allowed p50 slowdown against the baseline (0.5 = 50%%).")
+        parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                            help="Ignore p50 slowdowns smaller than this (timer noise).")
+
+    def handle(self, *args, **options):
+        try:
+            fixture = benchmarks.Fixture(options["password"])
+        except benchmarks.NotSeeded as exc:
+            raise CommandError(str(exc))
+
+        suite = benchmarks.endpoints(fixture)
+        if options["only"]:
+            names = {name.strip() for name in options["only"].split(",")}
+            suite = [endpoint for endpoint in suite if endpoint.name in names]
+
+        results = {}
+        self.stdout.write(f"{'endpoint':<28} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'errors':>7}")
+        # The test client sends "Host: testserver"; slow-request warnings would drown the table
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                               API_RESPONSE_CACHE_ENABLED=options["cache"],
+                               SLOW_REQUEST_THRESHOLD_MS=10 ** 9, SLOW_REQUEST_ROUTE_THRESHOLDS_MS={}):
+            runner = benchmarks.Runner(fixture)
+            for endpoint in suite:
+                result = runner.run(endpoint, options["iterations"], options["warmup"])
+                row = results[endpoint.name] = benchmarks.summary(result)
+                self.stdout.write(
+                    f"{endpoint.name:<28} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} "
+                    f"{row['queries']:>8} {row['errors']:>7}"
+                    + (f"  (got {sorted(set(result.errors))}, expected {endpoint.expected})" if result.errors else "")
+                )
+
+        if options["save"]:
+            with open(options["save"], "w") as output:
+                json.dump(results, output, indent=2, sort_keys=True)
+
+        problems = [f"{name}: {row['errors']} unexpected responses" for name, row in results.items() if row["errors"]]
+        if options["compare"]:
+            with open(options["compare"]) as baseline_file:
+                problems += self.regressions(json.load(baseline_file), results, options)
+        if problems:
+            raise CommandError("Benchmark regressions:\n  " + "\n  ".join(problems))
+
+    def regressions(self, baseline, results, options):
+        for name, row in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            if row["queries"] > before["queries"]:
+                yield f"{name}: {row['queries']} queries per request (was {before['queries']})"
+            slower = row["p50_ms"] - before["p50_ms"]
+            if slower > options["min_delta_ms"] and row["p50_ms"] > before["p50_ms"] * (1 + options["tolerance"]):
+                yield f"{name}: p50 {row['p50_ms']:.2f} ms (was {before['p50_ms']:.2f} ms)"
@@ -0,0 +1,73 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.assignment import pick_employee
+from api.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark employee auto-assignment against a growing number of employees. "
+        "All benchmark rows are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,100,1000,10000",
+                            help="Comma-separated employee counts to benchmark.")
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        self.stdout.write(f"{'employees':>10} {'least-loaded ms':>16} {'queries':>8} {'random.choice ms':>17}")
+        try:
+            with transaction.atomic():
+                created = 0
+                for size in sizes:
+                    User.objects.bulk_create(
+                        [
+                            User(
+                                username=f"bench-employee-{n}",
+                                email=f"bench-employee-{n}@example.invalid",
+                                role="employee",
+                                open_client_count=random.randint(0, 50),
+                            )
+                            for n in range(created, size)
+                        ],
+                        batch_size=1000,
+                    )
+                    created = max(created, size)
+                    self.report(size, options["iterations"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def report(self, size, iterations):
+        picked, legacy = [], []
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            pick_employee()
+            picked.append(time.perf_counter() - start)
+        for _ in range(iterations - 1):
+            start = time.perf_counter()
+            pick_employee()
+            picked.append(time.perf_counter() - start)
+
+        # The previous implementation: load every employee and choose in Python.
+        for _ in range(max(1, iterations // 10)):
+            start = time.perf_counter()
+            random.choice(User.objects.filter(role="employee"))
+            legacy.append(time.perf_counter() - start)
+
+        self.stdout.write(
+            f"{size:>10} {statistics.median(picked) * 1000:>16.3f} "
+            f"{len(queries):>8} {statistics.median(legacy) * 1000:>17.3f}"
+        )
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.authentication import CachedJWTAuthentication, user_cache
+from api.models import User
+from api.views import EmployeeClientManageView, get_tokens_for_user
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/sec of an authenticated employee endpoint with the stock "
+        "JWTAuthentication and with CachedJWTAuthentication. Runs inside a rolled-back transaction, "
+        "with the response cache off so every request reaches the view."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic(), override_settings(API_RESPONSE_CACHE_ENABLED=False):
+                employee = User.objects.create_user(
+                    "bench-auth", "bench-auth@example.invalid", "0000000000", None, "employee", "bench-password"
+                )
+                token = get_tokens_for_user(employee)["access"]
+                for label, auth_class in (("JWTAuthentication", JWTAuthentication),
+                                          ("CachedJWTAuthentication", CachedJWTAuthentication)):
+                    self.run(label, auth_class, token, options["requests"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, label, auth_class, token, count):
+        view = EmployeeClientManageView.as_view(authentication_classes=[auth_class])
+        factory = APIRequestFactory()
+        user_cache.clear()
+
+        def call():
+            request = factory.get("/manage/employee/clients/?page_size=1", HTTP_AUTHORIZATION=f"Bearer {token}")
+            response = view(request)
+            assert response.status_code == 200, response.data
+
+        def authenticate():
+            request = Request(factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}"))
+            auth_class().authenticate(request)
+
+        call()  # warm up (and fill the cache)
+        with CaptureQueriesContext(connection) as queries:
+            call()
+        self.stdout.write(
+            f"{label:>24}: {self.rate(call, count):8.0f} req/s end to end, "
+            f"{self.rate(authenticate, count):8.0f} authentications/s, {len(queries)} queries/request"
+        )
+
+    def rate(self, func, count):
+        start = time.perf_counter()
+        for _ in range(count):
+            func()
+        return count / (time.perf_counter() - start)
@@ -0,0 +1,67 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from rest_framework.test import APIRequestFactory
+
+from api.models import User
+from api.views import LoginEmployeeView
+
+PASSWORD = "bench-password"
+DOB = "1990-01-01"
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent logins at LoginEmployeeView (throttling disabled) and report "
+        "logins/s with p50/p95 latency. Creates bench-login-* employees and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--logins", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=8)
+
+    def handle(self, *args, **options):
+        users = [
+            User.objects.create_user(
+                f"bench-login-{number}", f"bench-login-{number}@example.invalid",
+                f"{number:010d}", DOB, "employee", PASSWORD,
+            )
+            for number in range(options["users"])
+        ]
+        try:
+            self.run(users, options["logins"], options["concurrency"])
+        finally:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def run(self, users, count, concurrency):
+        view = LoginEmployeeView.as_view(throttle_classes=[])
+        factory = APIRequestFactory()
+
+        def login(number):
+            user = users[number % len(users)]
+            request = factory.post("/manage/login/", {
+                "email": user.email, "phone_number": user.phone_number,
+                "dob": DOB, "role": "employee", "password": PASSWORD,
+            }, format="json")
+            start = time.perf_counter()
+            try:
+                response = view(request)
+            finally:
+                close_old_connections()
+            assert response.status_code == 200, response.data
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = sorted(pool.map(login, range(count)))
+        elapsed = time.perf_counter() - start
+
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"{count} logins, concurrency {concurrency}: {count / elapsed:.1f} logins/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms"
+        )
@@ -0,0 +1,100 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+
+from api import search, synthetic
+from api.models import Client, ClientProfile
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark client search latency against a growing number of clients, next to an "
+        "icontains scan. All benchmark rows are created inside a transaction that is rolled back; "
+        "building the 1,000,000-client index takes a while."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10000,100000,1000000",
+                            help="Comma-separated client counts to benchmark.")
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(42)
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        self.stdout.write(
+            f"{'clients':>10} {'kind':>14} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'icontains ms':>13}"
+        )
+        try:
+            with transaction.atomic():
+                created = 0
+                for size in sizes:
+                    while created < size:
+                        batch = [
+                            synthetic.client(number, self.rng)
+                            for number in range(created, min(size, created + options["batch_size"]))
+                        ]
+                        Client.objects.bulk_create(batch)
+                        ids = dict(
+                            Client.objects.filter(contact_number__in=[c.contact_number for c in batch])
+                            .values_list("contact_number", "id")
+                        )
+                        for client in batch:
+                            client.pk = ids[client.contact_number]  # MySQL does not return them
+                        ClientProfile.objects.bulk_create([client.profile for client in batch])
+                        search.index_clients(ids.values())
+                        created += len(batch)
+                    self.report(size, options["iterations"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def samples(self):
+        """ Search strings staff would type, taken from random existing clients. """
+        ids = list(Client.objects.order_by("?").values_list("id", flat=True)[:50])
+        clients = list(Client.objects.filter(id__in=ids).select_related("profile"))
+        first_name = lambda c: c.name.split()[0]
+        return {
+            "name prefix": [first_name(c)[:4] for c in clients],
+            "full name": [c.name for c in clients],
+            "phone": [f"+91 {c.contact_number[:5]}-{c.contact_number[5:]}" for c in clients],
+            "phone suffix": [c.contact_number[-5:] for c in clients],
+            "email": [c.gmail for c in clients],
+            "reference": [c.reference_number_1 for c in clients],
+        }
+
+    def report(self, size, iterations):
+        for kind, queries in self.samples().items():
+            timings = []
+            connection.queries_log.clear()  # a full log (DEBUG=True) would make the capture read 0
+            with CaptureQueriesContext(connection) as captured:
+                search.search(queries[0])
+            for n in range(iterations):
+                start = time.perf_counter()
+                search.search(queries[n % len(queries)])
+                timings.append(time.perf_counter() - start)
+            scan = self.icontains(kind, queries[0])
+            self.stdout.write(
+                f"{size:>10} {kind:>14} {statistics.median(timings) * 1000:8.2f} "
+                f"{statistics.quantiles(timings, n=20)[-1] * 1000:8.2f} {len(captured):>8} {scan * 1000:13.2f}"
+            )
+
+    def icontains(self, kind, query):
+        """ The naive alternative: OR of icontains over the searchable columns (one run). """
+        needle = query.split()[0] if kind != "phone" else query[-10:].replace("-", "")
+        condition = Q()
+        for field in search.SEARCH_FIELDS:
+            path = f"profile__{field}" if field in Client.PROFILE_FIELDS else field
+            condition |= Q(**{f"{path}__icontains": needle})
+        start = time.perf_counter()
+        list(Client.objects.filter(condition).values_list("id", flat=True)[:search.DEFAULT_LIMIT])
+        return time.perf_counter() - start
@@ -0,0 +1,110 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api import compiled, synthetic
+from api.fieldsets import ClientFieldset
+from api.models import Client, ClientProfile, User
+from api.renderers import FastJSONRenderer
+from api.serializers import UserSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark of list serialization on --rows rows: the DRF serializers and JSONRenderer "
+        "next to the compiled serializers (api/compiled.py) and FastJSONRenderer, split into fetch, "
+        "serialize and render time. Fails if the two produce different bytes. Missing rows are "
+        "topped up with synthetic ones inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--iterations", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(42)
+        rows, iterations = options["rows"], options["iterations"]
+        self.stdout.write(
+            f"{'payload':<16} {'path':<9} {'fetch ms':>9} {'serialize ms':>13} {'render ms':>10} "
+            f"{'total ms':>9} {'speedup':>8}"
+        )
+        try:
+            with transaction.atomic():
+                self.top_up(rows, options["batch_size"])
+                clients = Client.objects.order_by("id")
+                for view in ("summary", "full"):
+                    fieldset = ClientFieldset({"view": view})
+                    queryset = fieldset.apply(clients, "id")[:rows]
+                    self.compare(
+                        f"client {view}", iterations,
+                        lambda: list(queryset.all()), lambda page: fieldset.serializer(page, many=True).data,
+                        lambda: list(fieldset.compiled.rows(queryset)), fieldset.compiled.data,
+                    )
+                users = User.objects.order_by("id").only(*UserSerializer.Meta.fields)[:rows]
+                user_compiled = compiled.compile_serializer(UserSerializer)
+                self.compare(
+                    "user", iterations,
+                    lambda: list(users.all()), lambda page: UserSerializer(page, many=True).data,
+                    lambda: list(user_compiled.rows(users)), user_compiled.data,
+                )
+                raise Rollback
+        except Rollback:
+            pass
+
+    def top_up(self, rows, batch_size):
+        """ Add synthetic clients and users (rolled back with the benchmark) until there are ``rows`` of each. """
+        created = Client.objects.count()
+        while created < rows:
+            batch = [synthetic.client(900_000_000 + number, self.rng)
+                     for number in range(created, min(rows, created + batch_size))]
+            Client.objects.bulk_create(batch)
+            ids = dict(
+                Client.objects.filter(contact_number__in=[c.contact_number for c in batch])
+                .values_list("contact_number", "id")
+            )
+            for client in batch:
+                client.pk = ids[client.contact_number]  # MySQL does not return them
+            ClientProfile.objects.bulk_create([client.profile for client in batch])
+            created += len(batch)
+        existing = User.objects.count()
+        if existing < rows:
+            User.objects.bulk_create(
+                [synthetic.user(900_000_000 + number) for number in range(existing, rows)], batch_size=batch_size
+            )
+
+    def compare(self, payload, iterations, fetch, serialize, fetch_rows, serialize_rows):
+        standard = self.measure(iterations, fetch, serialize, JSONRenderer())
+        fast = self.measure(iterations, fetch_rows, serialize_rows, FastJSONRenderer())
+        if standard["content"] != fast["content"]:
+            raise CommandError(f"{payload}: the compiled serializer rendered different bytes.")
+        for path, result in (("drf", standard), ("compiled", fast)):
+            speedup = standard["total"] / result["total"] if result["total"] else 0
+            self.stdout.write(
+                f"{payload:<16} {path:<9} {result['fetch'] * 1000:9.1f} {result['serialize'] * 1000:13.1f} "
+                f"{result['render'] * 1000:10.1f} {result['total'] * 1000:9.1f} {speedup:7.1f}x"
+            )
+
+    def measure(self, iterations, fetch, serialize, renderer):
+        """ Median seconds of each stage over ``iterations`` runs, and the rendered bytes. """
+        timings = {"fetch": [], "serialize": [], "render": [], "total": []}
+        for _ in range(iterations):
+            start = time.perf_counter()
+            page = fetch()
+            fetched = time.perf_counter()
+            data = serialize(page)
+            serialized = time.perf_counter()
+            content = renderer.render(data)
+            rendered = time.perf_counter()
+            for stage, seconds in (("fetch", fetched - start), ("serialize", serialized - fetched),
+                                   ("render", rendered - serialized), ("total", rendered - start)):
+                timings[stage].append(seconds)
+        return {**{stage: statistics.median(values) for stage, values in timings.items()}, "content": content}
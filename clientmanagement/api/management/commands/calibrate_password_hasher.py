@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+
+from api import hashers
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the preferred password hasher on this machine and suggest the highest "
+        "cost that stays under --target-ms per hash (set it via the matching environment variable)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target-ms", type=float, default=250.0)
+        parser.add_argument("--samples", type=int, default=3)
+
+    def handle(self, *args, **options):
+        hasher = get_hasher()
+        self.samples = options["samples"]
+        target = options["target_ms"] / 1000
+        self.stdout.write(f"Preferred hasher: {hasher.algorithm}")
+
+        if isinstance(hasher, hashers.TunedArgon2PasswordHasher):
+            name, cost, step = "ARGON2_TIME_COST", 1, lambda value: value + 1
+            configure = lambda h, value: setattr(h, "time_cost", value)
+        elif isinstance(hasher, hashers.TunedBCryptSHA256PasswordHasher):
+            name, cost, step = "BCRYPT_ROUNDS", 8, lambda value: value + 1
+            configure = lambda h, value: setattr(h, "rounds", value)
+        else:
+            name, cost, step = "PBKDF2_ITERATIONS", 100000, lambda value: value + 100000
+            configure = lambda h, value: setattr(h, "iterations", value)
+
+        best = None
+        while True:
+            configure(hasher, cost)
+            elapsed = self.time_hash(hasher)
+            self.stdout.write(f"  {name}={cost}: {elapsed * 1000:.1f} ms")
+            if elapsed > target:
+                break
+            best = cost
+            cost = step(cost)
+
+        if best is None:
+            self.stdout.write(self.style.WARNING(f"Even the lowest {name} exceeds the target."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Suggested: {name}={best}"))
+
+    def time_hash(self, hasher):
+        timings = []
+        for _ in range(self.samples):
+            start = time.perf_counter()
+            hasher.encode("calibration-password", hasher.salt())
+            timings.append(time.perf_counter() - start)
+        return min(timings)
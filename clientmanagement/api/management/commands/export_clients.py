@@ -0,0 +1,43 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import exporting
+from api.filters import filter_clients
+from api.models import Client
+
+
+class Command(BaseCommand):
+    help = "Export clients joined with employee and document details, in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=exporting.FORMATS, default="csv")
+        parser.add_argument("--output", default="-", help="File to write; '-' for stdout (CSV only).")
+        parser.add_argument("--batch-size", type=int, default=exporting.DEFAULT_BATCH_SIZE)
+        parser.add_argument("--approval-status")
+        parser.add_argument("--client-type")
+        parser.add_argument("--created-after")
+        parser.add_argument("--created-before")
+
+    def handle(self, *args, **options):
+        params = {
+            name: options[name] for name in ("approval_status", "client_type", "created_after", "created_before")
+            if options[name]
+        }
+        rows = exporting.iter_rows(filter_clients(Client.objects.all(), params), options["batch_size"])
+
+        if options["format"] == "xlsx":
+            if options["output"] == "-":
+                raise CommandError("XLSX export needs --output.")
+            try:
+                exporting.write_xlsx(rows, options["output"])
+            except ImportError:
+                raise CommandError("XLSX export requires openpyxl.")
+            return
+
+        if options["output"] == "-":
+            self.stdout.ending = ""  # csv.writer terminates its own rows
+            csv.writer(self.stdout).writerows(rows)
+            return
+        with open(options["output"], "w", newline="") as out:
+            csv.writer(out).writerows(rows)
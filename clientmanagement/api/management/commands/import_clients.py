@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importing import DEFAULT_CHUNK_SIZE, FORMATS, ClientImporter, detect_format, read_rows
+from api.models import User
+
+
+class Command(BaseCommand):
+    help = "Bulk import clients from a CSV or JSON Lines file, reporting rejected rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--employee", help="Email of the employee registering these clients. "
+                                               "Without it, rows become direct clients and are auto-assigned.")
+        parser.add_argument("--errors", help="Write the per-row error report to this JSON file.")
+
+    def handle(self, *args, **options):
+        employee = None
+        if options["employee"]:
+            try:
+                employee = User.objects.get(email=options["employee"], role="employee")
+            except User.DoesNotExist:
+                raise CommandError(f"No employee with email {options['employee']}")
+
+        fmt = options["format"] or detect_format(options["path"])
+        importer = ClientImporter(employee=employee, chunk_size=options["chunk_size"])
+        with open(options["path"], "rb") as stream:
+            report = importer.run(read_rows(stream, fmt))
+
+        if options["errors"]:
+            with open(options["errors"], "w") as out:
+                json.dump(report["errors"], out, indent=2)
+        else:
+            for error in report["errors"]:
+                self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} of {report['total_rows']} rows ({report['failed']} rejected)."
+        ))
@@ -0,0 +1,151 @@
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client as WSGIClient, override_settings
+
+from api import synthetic
+from api.async_views import drain_background_tasks
+from api.models import Client, User
+from api.views import ClientApplicationView, get_tokens_for_user
+
+ENDPOINTS = {
+    # name: (method, WSGI (sync view) path, ASGI (async view) path)
+    "apply": ("post", "/manage/client/apply/", "/manage/async/client/apply/"),
+    "list": ("get", "/manage/employee/clients/", "/manage/async/employee/clients/"),
+}
+EMAIL_DOMAIN = "loadtest.invalid"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare WSGI and ASGI throughput for the public application endpoint (or the employee "
+        "client list) on this machine. By default both Django handlers are driven in-process; pass "
+        "--wsgi-url/--asgi-url to load real servers instead, e.g. `gunicorn -w 4 clientmanagement.wsgi` "
+        "and `uvicorn --workers 4 clientmanagement.asgi:application`. Applications created by the "
+        "run are deleted afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoint", choices=ENDPOINTS, default="apply")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--wsgi-url", help="Base URL of a WSGI server, e.g. http://127.0.0.1:8000")
+        parser.add_argument("--asgi-url", help="Base URL of an ASGI server, e.g. http://127.0.0.1:8001")
+        parser.add_argument("--keep", action="store_true", help="Keep the clients created by the run.")
+
+    def handle(self, *args, **options):
+        self.run_id = random.randrange(10 ** 6)
+        self.sequence = itertools.count(1)  # next() is atomic, so threads never share a number
+        method, wsgi_path, asgi_path = ENDPOINTS[options["endpoint"]]
+        employee = User.objects.create_user(
+            f"loadtest-{self.run_id}", f"loadtest-{self.run_id}@{EMAIL_DOMAIN}",
+            f"5{self.run_id:09d}", "1990-01-01", "employee", "loadtest-password",
+        )
+        self.headers = {"Authorization": f"Bearer {get_tokens_for_user(employee)['access']}"}
+        count, concurrency = options["requests"], options["concurrency"]
+        try:
+            if options["wsgi_url"] or options["asgi_url"]:
+                for label, base in (("WSGI", options["wsgi_url"]), ("ASGI", options["asgi_url"])):
+                    if base:
+                        path = wsgi_path if label == "WSGI" else asgi_path
+                        self.report(label, *self.run_http(method, base.rstrip("/") + path, count, concurrency))
+            else:
+                # The in-process test clients send "Host: testserver"; the async views have no
+                # response cache, so the sync ones run without it too.
+                with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                                       API_RESPONSE_CACHE_ENABLED=False):
+                    self.report("WSGI", *self.run_wsgi(method, wsgi_path, count, concurrency))
+                    self.report("ASGI", *async_to_sync(self.run_asgi)(method, asgi_path, count, concurrency))
+        finally:
+            if not options["keep"]:
+                for client in Client.objects.filter(gmail__endswith=f"@{EMAIL_DOMAIN}"):
+                    client.delete()  # one by one, so workload counters follow
+                employee.delete()
+
+    def payload(self):
+        number = self.run_id * 10 ** 6 + next(self.sequence)
+        client = synthetic.client(
+            number, contact_number=f"6{number % 10 ** 14:014d}", gmail=f"applicant-{number}@{EMAIL_DOMAIN}"
+        )
+        data = {field: getattr(client, field) for field in ClientApplicationView.required_fields}
+        data["expected_loan_amount"] = str(data["expected_loan_amount"])
+        return data
+
+    def run_wsgi(self, method, path, count, concurrency):
+        def call(_):
+            client = WSGIClient(raise_request_exception=False, headers=self.headers)
+            start = time.perf_counter()
+            try:
+                if method == "post":
+                    response = client.post(path, self.payload(), content_type="application/json")
+                else:
+                    response = client.get(path)
+                return time.perf_counter() - start, response.status_code < 400
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(call, range(count)))
+        return results, time.perf_counter() - start
+
+    async def run_asgi(self, method, path, count, concurrency):
+        client = AsyncClient(raise_request_exception=False)  # count server errors instead of stopping
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call():
+            async with semaphore:
+                start = time.perf_counter()
+                if method == "post":
+                    response = await client.post(
+                        path, self.payload(), content_type="application/json", headers=self.headers
+                    )
+                else:
+                    response = await client.get(path, headers=self.headers)
+                return time.perf_counter() - start, response.status_code < 400
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(call() for _ in range(count)))
+        elapsed = time.perf_counter() - start
+        await drain_background_tasks()  # background assignments, before cleanup
+        return results, elapsed
+
+    def run_http(self, method, url, count, concurrency):
+        def call(_):
+            body = json.dumps(self.payload()).encode() if method == "post" else None
+            request = urllib.request.Request(
+                url, data=body, method=method.upper(), headers={**self.headers, "Content-Type": "application/json"}
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                    ok = response.status < 400
+            except (urllib.error.URLError, TimeoutError):
+                ok = False
+            return time.perf_counter() - start, ok
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(call, range(count)))
+        return results, time.perf_counter() - start
+
+    def report(self, label, results, elapsed):
+        latencies = sorted(latency for latency, _ in results)
+        errors = sum(1 for _, ok in results if not ok)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"{label}: {len(results) / elapsed:8.1f} req/s, p50 {statistics.median(latencies) * 1000:7.1f} ms, "
+            f"p95 {p95 * 1000:7.1f} ms, {errors} errors"
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import documents
+
+
+class Command(BaseCommand):
+    help = "Queue document uploads left queued or half-processed (e.g. after a restart) for processing again."
+
+    def handle(self, *args, **options):
+        count = documents.resume_pending()
+        self.stdout.write(self.style.SUCCESS(f"Queued {count} pending document uploads."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import dedup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the duplicate-detection blocking keys from the Client table (existing flags are kept)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        indexed = dedup.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} clients."))
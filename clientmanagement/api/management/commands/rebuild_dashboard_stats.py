@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard statistics buckets from the Client and ArchivedClient tables."
+
+    def handle(self, *args, **options):
+        buckets = stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} dashboard buckets."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from api import documents
+
+
+def megabytes(size):
+    return f"{size / 1024 / 1024:.2f} MB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the references to every stored document file from the details rows (after bulk "
+        "changes, which send no signals) and schedule the collection of unreferenced files. "
+        "--migrate-legacy first moves files stored before content addressing into the "
+        "content-addressed storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--migrate-legacy", action="store_true",
+                            help="Move documents/... files into the content-addressed storage first.")
+
+    def handle(self, *args, **options):
+        if options["migrate_legacy"]:
+            moved = documents.migrate_legacy()
+            self.stdout.write(f"Moved {moved} files into the content-addressed storage.")
+        references, files, referenced, stored = documents.recount()
+        self.stdout.write(self.style.SUCCESS(
+            f"{references} references to {files} files: {megabytes(referenced)} referenced, "
+            f"{megabytes(stored)} stored."
+        ))
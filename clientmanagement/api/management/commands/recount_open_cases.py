@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.assignment import rebuild_open_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute every employee's open_client_count from the Client table."
+
+    def handle(self, *args, **options):
+        updated = rebuild_open_counts()
+        self.stdout.write(self.style.SUCCESS(f"Recounted open cases for {updated} users."))
@@ -0,0 +1,48 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs (notifications, document processing, ...) with a pool of worker "
+        "threads until interrupted. Any number of these processes can run side by side. "
+        "With --once, run the jobs that are due and exit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Seconds an idle worker waits before looking for jobs again.")
+        parser.add_argument("--once", action="store_true")
+        parser.add_argument("--purge", action="store_true",
+                            help="First delete finished jobs older than JOB_RETENTION_DAYS.")
+
+    def handle(self, *args, **options):
+        if options["purge"]:
+            self.stdout.write(f"Purged {jobs.purge()} finished jobs.")
+        if options["once"]:
+            count = jobs.run_pending()
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} jobs."))
+            return
+
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        threads = [
+            threading.Thread(target=jobs.work, args=(stop, options["poll_interval"]), name=f"jobs-{n}")
+            for n in range(options["workers"])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Running jobs with {len(threads)} workers; stop with Ctrl-C or SIGTERM.")
+        try:
+            while not stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            stop.set()
+        for thread in threads:
+            thread.join()  # each finishes the job it is running
+        self.stdout.write(self.style.SUCCESS("Stopped."))
@@ -0,0 +1,150 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api import caching, dedup, documents, search, stats, synthetic
+from api.assignment import rebuild_open_counts
+from api.models import ApprovalHistory, Client, ClientProfile, EmployeeClientDetails, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, clients (spread over --days of history, with "
+        "employee details, approval history and some re-applications) for benchmarks such as "
+        "`manage.py bench_api`. Rows are written with bulk inserts in --batch-size batches; "
+        "workload counters, dashboard stats, document references, the search index and duplicate "
+        "keys are updated for the new rows. Seeded users log in with --password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=100_000)
+        parser.add_argument("--employees", type=int, default=50)
+        parser.add_argument("--managers", type=int, default=3)
+        parser.add_argument("--days", type=int, default=365, help="Spread created_at over this many days.")
+        parser.add_argument("--duplicates", type=float, default=0.01,
+                            help="Share of clients that re-apply under a new phone number and email.")
+        parser.add_argument("--password", default="synthetic-password")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--skip-indexes", action="store_true",
+                            help="Do not build search / duplicate keys (rebuild them later).")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.options = options
+        started = time.perf_counter()
+
+        self.documents = synthetic.store_documents()
+        employees, managers = self.create_users(options["employees"], options["managers"], options["password"])
+        self.stdout.write(f"Created {len(employees)} employees and {len(managers)} managers.")
+
+        total, batch_size = options["clients"], options["batch_size"]
+        first = (Client.objects.aggregate(last=Max("id"))["last"] or 0) + 1  # keeps unique columns unique
+        now = timezone.now()
+        step = timedelta(days=options["days"]) / max(total, 1)
+        created = 0
+        while created < total:
+            count = min(batch_size, total - created)
+            start = now - step * (total - created)
+            self.create_batch(first + created, count, start, step, employees, managers)
+            created += count
+            self.stdout.write(f"  {created:>10,} / {total:,} clients ({time.perf_counter() - started:.0f} s)")
+
+        rebuild_open_counts()
+        stats.rebuild()
+        documents.recount()  # bulk inserts send no signals
+        caching.bump_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {total:,} clients in {time.perf_counter() - started:.0f} s."
+        ))
+
+    def create_users(self, employee_count, manager_count, password):
+        password = make_password(password)  # one hash for everyone: hashing is slow on purpose
+        first = (User.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+        users = [synthetic.user(first + n, "employee", password) for n in range(employee_count)]
+        users += [synthetic.user(first + employee_count + n, "manager", password) for n in range(manager_count)]
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(username__in=[user.username for user in users]).order_by("id"))
+        return [u for u in users if u.role == "employee"], [u for u in users if u.role == "manager"]
+
+    def client(self, number, created_at, employees, previous):
+        """ A synthetic client and whether it re-applies as one of ``previous``. """
+        rng = self.rng
+        overrides = {}
+        if previous and rng.random() < self.options["duplicates"]:
+            # Same person, same family and references, new phone number and email
+            original = rng.choice(previous)
+            overrides = {field: getattr(original, field) for field in (
+                "name", "father_name", "mother_name", "reference_number_1", "reference_number_2",
+            )}
+        client = synthetic.client(
+            number, rng,
+            client_type="employee_registered" if rng.random() < 0.3 else "direct",
+            assigned_employee=rng.choice(employees) if employees else None,
+            created_at=created_at,
+            **overrides,
+        )
+        roll = rng.random()
+        if roll < 0.2:
+            client.approval_status = "approved"
+        elif roll < 0.3:
+            client.approval_status = "rejected"
+        if client.client_type == "employee_registered" and (client.approval_status != "pending" or roll < 0.5):
+            client.submitted_at = created_at + timedelta(hours=rng.randint(1, 72))
+        return client, bool(overrides)
+
+    def create_batch(self, first, count, start, step, employees, managers):
+        clients, reapplied = [], []
+        for n in range(count):
+            client, reapplies = self.client(first + n, start + step * n, employees, clients)
+            clients.append(client)
+            if reapplies:
+                reapplied.append(client)
+
+        with transaction.atomic():
+            created_at = [client.created_at for client in clients]
+            Client.objects.bulk_create(clients)  # auto_now_add sets created_at to now
+            if clients[0].pk is None:
+                # MySQL does not return primary keys from a bulk INSERT.
+                ids = dict(
+                    Client.objects.filter(contact_number__in=[client.contact_number for client in clients])
+                    .values_list("contact_number", "id")
+                )
+                for client in clients:
+                    client.pk = ids[client.contact_number]
+            for client, value in zip(clients, created_at):
+                client.created_at = value
+            Client.objects.bulk_update(clients, ["created_at"], batch_size=1000)
+            ClientProfile.objects.bulk_create([client.profile for client in clients])
+
+            EmployeeClientDetails.objects.bulk_create([
+                synthetic.details(client, self.rng, self.documents if self.rng.random() < 0.8 else None)
+                for client in clients
+                if client.client_type == "employee_registered" and client.assigned_employee_id
+            ])
+            ApprovalHistory.objects.bulk_create(self.history(clients, managers))
+
+            if not self.options["skip_indexes"]:
+                search.index_clients([client.pk for client in clients])
+                dedup.index_clients([client.pk for client in clients])
+                dedup.check_clients([client.pk for client in reapplied])  # flags them against the originals
+
+    def history(self, clients, managers):
+        for client in clients:
+            if client.submitted_at is None:
+                continue
+            yield ApprovalHistory(
+                client_id=client.pk, action="submitted", from_status="pending", to_status="pending",
+                actor_id=client.assigned_employee_id,
+            )
+            if client.approval_status != "pending" and managers:
+                yield ApprovalHistory(
+                    client_id=client.pk, action=client.approval_status, from_status="pending",
+                    to_status=client.approval_status, actor=self.rng.choice(managers),
+                )
@@ -0,0 +1,209 @@
+"""
+Per-endpoint request metrics, exposed in the Prometheus text format at ``/metrics``.
+
+``MetricsMiddleware`` (``api/middleware.py``) measures every request: wall
+time, the number and total time of SQL queries on every database alias
+(including those async views run through ``sync_to_async``),
+the time spent in serializers (``InstrumentedSerializerMixin``) and the
+response size. Observations go into in-process histograms labelled by URL
+route (``manage/clients/<int:pk>/update/``, never the raw path) and method,
+so the number of series stays fixed.
+
+Each worker process keeps its own histograms; scrape every worker (or run a
+single one) to see the whole picture. Counts start over when a worker
+restarts, which Prometheus' ``rate()`` handles.
+
+A request slower than ``SLOW_REQUEST_THRESHOLD_MS`` (or its route's entry in
+``SLOW_REQUEST_ROUTE_THRESHOLDS_MS``) is logged as a warning on the
+``api.metrics`` logger together with its slowest queries. Only the
+SQL text is logged, never the parameters (they carry client PII).
+"""
+import bisect
+import contextlib
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+LABELS = ("view", "method")
+
+_current = ContextVar("request_metrics", default=None)
+
+
+def setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Histogram:
+    """ A labelled Prometheus histogram (cumulative ``le`` buckets, ``_sum`` and ``_count``). """
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in series:
+            names = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(LABELS, labels))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{{{names},le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{names}}} {total:g}"
+            yield f"{self.name}_count{{{names}}} {count}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_SECONDS = Histogram("api_request_duration_seconds", "Wall time of a request.", TIME_BUCKETS)
+QUERY_COUNT = Histogram("api_request_db_queries", "SQL queries run by a request.", QUERY_BUCKETS)
+QUERY_SECONDS = Histogram("api_request_db_seconds", "Time a request spent in SQL queries.", TIME_BUCKETS)
+SERIALIZER_SECONDS = Histogram(
+    "api_request_serializer_seconds", "Time a request spent serializing responses.", TIME_BUCKETS
+)
+RESPONSE_BYTES = Histogram("api_response_size_bytes", "Size of a (non-streaming) response body.", SIZE_BUCKETS)
+HISTOGRAMS = (REQUEST_SECONDS, QUERY_COUNT, QUERY_SECONDS, SERIALIZER_SECONDS, RESPONSE_BYTES)
+
+
+class RequestMetrics:
+    """ What one request did; collected while it runs. """
+
+    def __init__(self):
+        self.queries = []  # (sql, seconds)
+        self.sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self._serializing = False
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """ ``connection.execute_wrapper`` hook timing every query. """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries.append((sql, elapsed))
+            self.sql_seconds += elapsed
+
+
+@contextlib.contextmanager
+def collect():
+    record = RequestMetrics()
+    token = _current.set(record)
+    try:
+        yield record
+    finally:
+        _current.reset(token)
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    """ Installed on every connection: times the query into the current request's record, if any. """
+    record = _current.get()
+    if record is None:
+        return execute(sql, params, many, context)
+    return record.execute_wrapper(execute, sql, params, many, context)
+
+
+def watch(connection):
+    if _execute_wrapper not in connection.execute_wrappers:
+        # First, so connection.execute_wrapper() blocks that pop their own wrapper off the end keep working
+        connection.execute_wrappers.insert(0, _execute_wrapper)
+
+
+@receiver(connection_created)
+def watch_new_connection(sender, connection, **kwargs):
+    # Connections are per thread: this covers the threads sync_to_async runs queries in, which
+    # inherit the request's ContextVar but not a wrapper installed on the request thread
+    watch(connection)
+
+
+@contextlib.contextmanager
+def watching_queries(record):
+    """ Time every query run on any database alias, in any thread of this context, into ``record``. """
+    for connection in connections.all():
+        watch(connection)
+    token = _current.set(record)
+    try:
+        yield record
+    finally:
+        _current.reset(token)
+
+
+@contextlib.contextmanager
+def serializing():
+    """ Count the enclosed time as serializer time (nested serializers are counted once). """
+    record = _current.get()
+    if record is None or record._serializing:
+        yield
+        return
+    record._serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.serializer_seconds += time.perf_counter() - start
+        record._serializing = False
+
+
+def observe(route, method, record, seconds, size=None):
+    labels = (route, method)
+    REQUEST_SECONDS.observe(labels, seconds)
+    QUERY_COUNT.observe(labels, len(record.queries))
+    QUERY_SECONDS.observe(labels, record.sql_seconds)
+    SERIALIZER_SECONDS.observe(labels, record.serializer_seconds)
+    if size is not None:
+        RESPONSE_BYTES.observe(labels, size)
+
+
+def log_if_slow(request, route, status_code, record, seconds):
+    threshold = setting("SLOW_REQUEST_ROUTE_THRESHOLDS_MS", {}).get(route, setting("SLOW_REQUEST_THRESHOLD_MS", 500))
+    if seconds * 1000 < threshold:
+        return
+    slowest = sorted(record.queries, key=lambda query: query[1], reverse=True)
+    slowest = slowest[:setting("SLOW_REQUEST_LOG_QUERIES", 10)]
+    logger.warning(
+        "Slow request: %s %s -> %s in %.0f ms (%d queries, %.0f ms SQL, %.0f ms serializing)%s",
+        request.method, request.path, status_code, seconds * 1000, len(record.queries),
+        record.sql_seconds * 1000, record.serializer_seconds * 1000,
+        "".join(f"\n  {elapsed * 1000:8.1f} ms  {sql}" for sql, elapsed in slowest),
+    )
+
+
+def render():
+    return "\n".join(line for histogram in HISTOGRAMS for line in histogram.render()) + "\n"
+
+
+def reset():
+    for histogram in HISTOGRAMS:
+        histogram.clear()
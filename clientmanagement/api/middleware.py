@@ -0,0 +1,81 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from . import metrics, routers
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class MetricsMiddleware:
+    """ Record wall time, SQL and serializer time and response size per route (see api/metrics.py). """
+    # Both modes, so the ASGI stack (api/async_views.py) is not adapted back into a thread per request
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not metrics.setting("API_METRICS_ENABLED", True):
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with metrics.collect() as record, metrics.watching_queries(record):
+            response = self.get_response(request)
+        self.observe(request, response, record, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not metrics.setting("API_METRICS_ENABLED", True):
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        # Queries run by sync_to_async threads are counted too: they see the record through its ContextVar
+        with metrics.collect() as record, metrics.watching_queries(record):
+            response = await self.get_response(request)
+        self.observe(request, response, record, time.perf_counter() - start)
+        return response
+
+    def observe(self, request, response, record, seconds):
+        match = request.resolver_match
+        route = match.route if match else "<unmatched>"
+        if route != "metrics":
+            # A streaming body is produced after this returns, so its size is unknown here
+            size = None if response.streaming else len(response.content)
+            metrics.observe(route, request.method, record, seconds, size)
+            metrics.log_if_slow(request, route, response.status_code, record, seconds)
+
+
+class ReplicaStickinessMiddleware:
+    """ Pin a user's reads to the primary for a moment after a successful write. """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.wrote(request, response):
+            # DRF copies the authenticated user onto the underlying request
+            routers.record_write(getattr(request, "user", None))
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.wrote(request, response):
+            # request.user may still be the lazy session user, which loads synchronously
+            await sync_to_async(routers.record_write)(getattr(request, "user", None))
+        return response
+
+    def wrote(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2025-03-24 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_alter_user_options_alter_user_managers_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['created_at', 'id'], name='client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['approval_status', 'created_at', 'id'], name='client_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['client_type', 'created_at', 'id'], name='client_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['assigned_employee', 'created_at', 'id'], name='client_employee_created_idx'),
+        ),
+    ]
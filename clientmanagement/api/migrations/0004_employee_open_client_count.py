@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2025-03-25 09:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_open_clients(apps, schema_editor):
+    User = apps.get_model('api', 'User')
+    Client = apps.get_model('api', 'Client')
+    open_clients = (
+        Client.objects.filter(assigned_employee=OuterRef('pk'), approval_status='pending')
+        .order_by().values('assigned_employee').annotate(total=Count('id')).values('total')
+    )
+    User.objects.update(open_client_count=Coalesce(Subquery(open_clients), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_client_list_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='open_client_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'open_client_count', 'id'], name='user_assignment_idx'),
+        ),
+        migrations.RunPython(count_open_clients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2025-03-27 11:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_employee_open_client_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('submitted', 'Submitted for approval'), ('approved', 'Approved'), ('rejected', 'Rejected')], max_length=10)),
+                ('from_status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], max_length=10)),
+                ('to_status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], max_length=10)),
+                ('note', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['approval_status', 'submitted_at', 'id'], name='client_approval_queue_idx'),
+        ),
+        migrations.AddField(
+            model_name='approvalhistory',
+            name='actor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='approval_actions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='approvalhistory',
+            name='client',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='approval_history', to='api.client'),
+        ),
+        migrations.AddIndex(
+            model_name='approvalhistory',
+            index=models.Index(fields=['client', 'created_at'], name='approval_history_client_idx'),
+        ),
+    ]
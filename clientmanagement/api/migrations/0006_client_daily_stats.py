@@ -0,0 +1,50 @@
+# Generated by Django 5.1.7 on 2025-03-28 15:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def build_stats(apps, schema_editor):
+    Client = apps.get_model('api', 'Client')
+    ClientDailyStat = apps.get_model('api', 'ClientDailyStat')
+    rows = (
+        Client.objects.annotate(day=TruncDate('created_at')).order_by()
+        .values('day', 'approval_status', 'client_type', 'assigned_employee_id')
+        .annotate(total=Count('id'), amount=Sum('expected_loan_amount'))
+    )
+    ClientDailyStat.objects.bulk_create([
+        ClientDailyStat(
+            day=row['day'], approval_status=row['approval_status'], client_type=row['client_type'],
+            employee_id=row['assigned_employee_id'], client_count=row['total'], loan_amount_total=row['amount'] or 0,
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_approval_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('approval_status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], max_length=10)),
+                ('client_type', models.CharField(choices=[('direct', 'Direct Client'), ('employee_registered', 'Employee-Registered Client')], max_length=20)),
+                ('client_count', models.IntegerField(default=0)),
+                ('loan_amount_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('employee', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'approval_status', 'client_type', 'employee'], name='client_stat_bucket_idx')],
+            },
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2025-03-31 12:40
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_client_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('field', models.CharField(choices=[('aadhaar_front', 'aadhaar_front'), ('aadhaar_back', 'aadhaar_back'), ('cibil_report', 'cibil_report'), ('pan_card', 'pan_card'), ('gas_bill', 'gas_bill')], max_length=20)),
+                ('filename', models.CharField(max_length=255)),
+                ('total_size', models.PositiveBigIntegerField()),
+                ('received_size', models.PositiveBigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('queued', 'Queued'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='uploading', max_length=12)),
+                ('sha256', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('stored_name', models.CharField(blank=True, max_length=255)),
+                ('thumbnail', models.ImageField(blank=True, null=True, upload_to='documents/thumbnails/')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('details', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='api.employeeclientdetails')),
+                ('uploaded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='document_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2025-04-02 10:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_document_uploads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=16)),
+                ('field', models.CharField(max_length=24)),
+                ('weight', models.PositiveSmallIntegerField()),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.client')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'client', 'weight'], name='client_search_term_idx')],
+            },
+        ),
+    ]
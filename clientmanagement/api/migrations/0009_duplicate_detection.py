@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2025-04-03 09:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_client_search_terms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientBlockingKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=32)),
+                ('kind', models.CharField(max_length=16)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.client')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'client'], name='client_blocking_key_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicateFlag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.DecimalField(decimal_places=2, max_digits=4)),
+                ('reasons', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('confirmed', 'Confirmed'), ('dismissed', 'Dismissed')], default='open', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_flags', to='api.client')),
+                ('duplicate_of', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.client')),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at', 'id'], name='duplicate_flag_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('client', 'duplicate_of'), name='duplicate_flag_pair_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2025-04-04 10:05
+
+import api.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """ Step 1 of 3: new SMALLINT code columns next to the CharField ones. """
+
+    dependencies = [
+        ('api', '0009_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='approval_status_code',
+            field=api.fields.CompactChoiceField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], codes={'pending': 1, 'approved': 2, 'rejected': 3}, default='pending'),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='client_type_code',
+            field=api.fields.CompactChoiceField(choices=[('direct', 'Direct Client'), ('employee_registered', 'Employee-Registered Client')], codes={'direct': 1, 'employee_registered': 2}, default='direct'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2025-04-04 10:06
+
+from django.db import migrations
+
+COLUMNS = {"approval_status": "approval_status_code", "client_type": "client_type_code"}
+
+
+def copy_to_codes(apps, schema_editor):
+    """ One set-based UPDATE per (column, value); no rows are loaded into Python. """
+    Client = apps.get_model("api", "Client")
+    for source, target in COLUMNS.items():
+        for value in Client._meta.get_field(target).codes:
+            Client.objects.filter(**{source: value}).update(**{target: value})
+
+
+def copy_from_codes(apps, schema_editor):
+    Client = apps.get_model("api", "Client")
+    for source, target in COLUMNS.items():
+        for value in Client._meta.get_field(target).codes:
+            Client.objects.filter(**{target: value}).update(**{source: value})
+
+
+class Migration(migrations.Migration):
+    """ Step 2 of 3: fill the code columns from the CharField ones. """
+
+    dependencies = [
+        ('api', '0010_client_compact_enums_add'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_to_codes, copy_from_codes),
+    ]
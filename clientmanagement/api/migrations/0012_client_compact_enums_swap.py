@@ -0,0 +1,56 @@
+# Generated by Django 5.1.7 on 2025-04-04 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """ Step 3 of 3: drop the CharField columns and give the code columns their names. """
+
+    dependencies = [
+        ('api', '0011_client_compact_enums_copy'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='client',
+            name='client_approval_queue_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='client',
+            name='client_status_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='client',
+            name='client_type_created_idx',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='approval_status',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='client_type',
+        ),
+        migrations.RenameField(
+            model_name='client',
+            old_name='approval_status_code',
+            new_name='approval_status',
+        ),
+        migrations.RenameField(
+            model_name='client',
+            old_name='client_type_code',
+            new_name='client_type',
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['approval_status', 'submitted_at', 'id'], name='client_approval_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['approval_status', 'created_at', 'id'], name='client_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['client_type', 'created_at', 'id'], name='client_type_created_idx'),
+        ),
+    ]
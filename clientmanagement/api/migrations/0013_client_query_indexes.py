@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2025-04-04 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_client_compact_enums_swap'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['assigned_employee', 'approval_status', 'created_at', 'id'], name='client_employee_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(condition=models.Q(('assigned_employee__isnull', True)), fields=['client_type', 'created_at', 'id'], name='client_unassigned_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2025-04-05 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """ Step 1 of 3: the one-to-one profile table for the rarely read client columns. """
+
+    dependencies = [
+        ('api', '0013_client_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientProfile',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile', serialize=False, to='api.client')),
+                ('father_name', models.CharField(max_length=255)),
+                ('mother_name', models.CharField(max_length=255)),
+                ('qualifications', models.CharField(max_length=255)),
+                ('married_status', models.BooleanField(default=False)),
+                ('current_address', models.TextField()),
+                ('landmark', models.CharField(max_length=255)),
+                ('years_at_address', models.IntegerField()),
+                ('office_name', models.CharField(max_length=255)),
+                ('office_address', models.TextField()),
+                ('designation', models.CharField(max_length=255)),
+                ('department', models.CharField(max_length=255)),
+                ('current_experience', models.IntegerField()),
+                ('overall_experience', models.IntegerField()),
+                ('reference_name_1', models.CharField(max_length=255)),
+                ('reference_number_1', models.CharField(max_length=15)),
+                ('reference_name_2', models.CharField(max_length=255)),
+                ('reference_number_2', models.CharField(max_length=15)),
+                ('loan_purpose', models.TextField()),
+            ],
+        ),
+    ]
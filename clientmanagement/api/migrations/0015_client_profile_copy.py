@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2025-04-05 09:13
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+FIELDS = (
+    "father_name", "mother_name", "qualifications", "married_status", "current_address", "landmark",
+    "years_at_address", "office_name", "office_address", "designation", "department",
+    "current_experience", "overall_experience", "reference_name_1", "reference_number_1",
+    "reference_name_2", "reference_number_2", "loan_purpose",
+)
+
+
+def copy_to_profiles(apps, schema_editor):
+    """ One INSERT ... SELECT; no rows are loaded into Python. """
+    Client = apps.get_model("api", "Client")
+    ClientProfile = apps.get_model("api", "ClientProfile")
+    quote = schema_editor.quote_name
+    columns = ", ".join(quote(name) for name in FIELDS)
+    schema_editor.execute(
+        f"INSERT INTO {quote(ClientProfile._meta.db_table)} ({quote('client_id')}, {columns}) "
+        f"SELECT {quote('id')}, {columns} FROM {quote(Client._meta.db_table)}"
+    )
+
+
+def copy_from_profiles(apps, schema_editor):
+    Client = apps.get_model("api", "Client")
+    ClientProfile = apps.get_model("api", "ClientProfile")
+    profile = ClientProfile.objects.filter(client_id=OuterRef("pk"))
+    Client.objects.update(**{name: Subquery(profile.values(name)[:1]) for name in FIELDS})
+
+
+class Migration(migrations.Migration):
+    """ Step 2 of 3: copy the profile columns of every client into its profile row. """
+
+    dependencies = [
+        ('api', '0014_client_profile'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_to_profiles, copy_from_profiles),
+    ]
@@ -0,0 +1,177 @@
+# Generated by Django 5.1.7 on 2025-04-05 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Step 3 of 3: drop the copied columns from the client table.
+
+    The AlterFields only give the columns something to fill existing rows
+    with if this migration is unapplied (``blank`` is not a database option,
+    so they cost no SQL on the way forward); step 2 then copies the values back.
+    """
+
+    dependencies = [
+        ('api', '0015_client_profile_copy'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='client',
+            name='father_name',
+            field=models.CharField(max_length=255, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='mother_name',
+            field=models.CharField(max_length=255, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='qualifications',
+            field=models.CharField(max_length=255, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='current_address',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='landmark',
+            field=models.CharField(max_length=255, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='years_at_address',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='office_name',
+            field=models.CharField(max_length=255, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='office_address',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='designation',
+            field=models.CharField(max_length=255, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='department',
+            field=models.CharField(max_length=255, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='current_experience',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='overall_experience',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='reference_name_1',
+            field=models.CharField(max_length=255, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='reference_number_1',
+            field=models.CharField(max_length=15, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='reference_name_2',
+            field=models.CharField(max_length=255, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='reference_number_2',
+            field=models.CharField(max_length=15, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='loan_purpose',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='father_name',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='mother_name',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='qualifications',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='married_status',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='current_address',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='landmark',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='years_at_address',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='office_name',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='office_address',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='designation',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='department',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='current_experience',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='overall_experience',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='reference_name_1',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='reference_number_1',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='reference_name_2',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='reference_number_2',
+        ),
+        migrations.RemoveField(
+            model_name='client',
+            name='loan_purpose',
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2025-04-08 10:22
+
+import api.fields
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedClient',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('contact_number', models.CharField(db_index=True, max_length=15)),
+                ('alternative_number', models.CharField(blank=True, max_length=15, null=True)),
+                ('gmail', models.EmailField(db_index=True, max_length=254)),
+                ('expected_loan_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('client_type', api.fields.CompactChoiceField(choices=[('direct', 'Direct Client'), ('employee_registered', 'Employee-Registered Client')], codes={'direct': 1, 'employee_registered': 2}, default='direct')),
+                ('approval_status', api.fields.CompactChoiceField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], codes={'approved': 2, 'pending': 1, 'rejected': 3})),
+                ('created_at', models.DateTimeField()),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('profile', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('details', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('assigned_employee', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'id'], name='archived_client_created_idx')],
+            },
+        ),
+    ]
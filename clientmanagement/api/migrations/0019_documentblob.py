@@ -0,0 +1,57 @@
+# Generated by Django 5.1.7 on 2025-04-09 09:41
+
+import api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_archivedclient'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentupload',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, storage=api.storage.document_storage, upload_to='documents/thumbnails/'),
+        ),
+        migrations.AlterField(
+            model_name='employeeclientdetails',
+            name='aadhaar_back',
+            field=models.ImageField(blank=True, null=True, storage=api.storage.document_storage, upload_to='documents/aadhaar/'),
+        ),
+        migrations.AlterField(
+            model_name='employeeclientdetails',
+            name='aadhaar_front',
+            field=models.ImageField(blank=True, null=True, storage=api.storage.document_storage, upload_to='documents/aadhaar/'),
+        ),
+        migrations.AlterField(
+            model_name='employeeclientdetails',
+            name='cibil_report',
+            field=models.ImageField(blank=True, null=True, storage=api.storage.document_storage, upload_to='documents/cibil/'),
+        ),
+        migrations.AlterField(
+            model_name='employeeclientdetails',
+            name='gas_bill',
+            field=models.ImageField(blank=True, null=True, storage=api.storage.document_storage, upload_to='documents/gas/'),
+        ),
+        migrations.AlterField(
+            model_name='employeeclientdetails',
+            name='pan_card',
+            field=models.ImageField(blank=True, null=True, storage=api.storage.document_storage, upload_to='documents/pan/'),
+        ),
+        migrations.CreateModel(
+            name='DocumentBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'updated_at'], name='document_blob_collect_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2025-04-10 09:15
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def merge_duplicate_buckets(apps, schema_editor):
+    ClientDailyStat = apps.get_model('api', 'ClientDailyStat')
+    kept = {}
+    for stat in ClientDailyStat.objects.order_by('id'):
+        key = (stat.day, stat.approval_status, stat.client_type, stat.employee_id)
+        first = kept.setdefault(key, stat)
+        if first is not stat:
+            first.client_count += stat.client_count
+            first.loan_amount_total += stat.loan_amount_total
+            first.save(update_fields=['client_count', 'loan_amount_total'])
+            stat.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_documentblob'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='clientdailystat',
+            constraint=models.UniqueConstraint(models.F('day'), models.F('approval_status'), models.F('client_type'), Coalesce('employee', models.Value(0)), name='client_stat_bucket_unique'),
+        ),
+    ]
@@ -1,8 +1,16 @@
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+from .fields import CompactChoiceField
+from .storage import document_storage
 # User = get_user_model()  # Secure way to reference User model dynamically
 
 class UserManager(BaseUserManager):
@@ -45,14 +53,30 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
 
+    # ✅ Denormalized workload: pending clients currently assigned to this employee
+    open_client_count = models.IntegerField(default=0)
+
     objects = UserManager()
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "phone_number", "dob"]
 
+    class Meta:
+        indexes = [
+            # Least-loaded active employee is the first entry of this index
+            models.Index(fields=["role", "open_client_count", "id"], name="user_assignment_idx"),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
+class ClientQuerySet(models.QuerySet):
+    def profile_values(self, *names):
+        """ ``values(*names)``; names from ``Client.PROFILE_FIELDS`` are read through the profile join. """
+        profile = {name: models.F(f"profile__{name}") for name in names if name in self.model.PROFILE_FIELDS}
+        return self.values(*(name for name in names if name not in profile), **profile)
+
+
 # ✅ Client Model (For Both Direct & Employee-Registered Clients)
 class Client(models.Model):
     CLIENT_TYPE_CHOICES = (
@@ -63,28 +87,21 @@ class Client(models.Model):
     name = models.CharField(max_length=255)
     contact_number = models.CharField(max_length=15, unique=True)
     alternative_number = models.CharField(max_length=15, blank=True, null=True)
-    father_name = models.CharField(max_length=255)
-    mother_name = models.CharField(max_length=255)
-    qualifications = models.CharField(max_length=255)
-    married_status = models.BooleanField(default=False)
-    current_address = models.TextField()
-    landmark = models.CharField(max_length=255)
-    years_at_address = models.IntegerField()
     gmail = models.EmailField(unique=True)
-    office_name = models.CharField(max_length=255)
-    office_address = models.TextField()
-    designation = models.CharField(max_length=255)
-    department = models.CharField(max_length=255)
-    current_experience = models.IntegerField()  # In years
-    overall_experience = models.IntegerField()  # In years
-    reference_name_1 = models.CharField(max_length=255)
-    reference_number_1 = models.CharField(max_length=15)
-    reference_name_2 = models.CharField(max_length=255)
-    reference_number_2 = models.CharField(max_length=15)
     expected_loan_amount = models.DecimalField(max_digits=10, decimal_places=2)
-    loan_purpose = models.TextField()
 
-    client_type = models.CharField(max_length=20, choices=CLIENT_TYPE_CHOICES, default='direct')
+    # ✅ Rarely read personal details live in ClientProfile (one-to-one, loaded on first use);
+    #    ``client.father_name`` etc. still read and write them (see the properties below the model)
+    PROFILE_FIELDS = (
+        "father_name", "mother_name", "qualifications", "married_status", "current_address", "landmark",
+        "years_at_address", "office_name", "office_address", "designation", "department",
+        "current_experience", "overall_experience", "reference_name_1", "reference_number_1",
+        "reference_name_2", "reference_number_2", "loan_purpose",
+    )
+
+    # ✅ Stored as small integer codes (api/fields.py); never renumber a code
+    CLIENT_TYPE_CODES = {'direct': 1, 'employee_registered': 2}
+    client_type = CompactChoiceField(choices=CLIENT_TYPE_CHOICES, codes=CLIENT_TYPE_CODES, default='direct')
 
     # ✅ Clients are assigned to Employees
     assigned_employee = models.ForeignKey(
@@ -101,12 +118,125 @@ class Client(models.Model):
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
     )
-    approval_status = models.CharField(max_length=10, choices=status_choices, default='pending')
+    STATUS_CODES = {'pending': 1, 'approved': 2, 'rejected': 3}
+    approval_status = CompactChoiceField(choices=status_choices, codes=STATUS_CODES, default='pending')
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # ✅ Set when an employee sends the client to the manager approval queue
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ClientQuerySet.as_manager()
+
+    class Meta:
+        # ✅ Every list filter is an index range scan on (<filter>, created_at, id)
+        indexes = [
+            models.Index(fields=["approval_status", "submitted_at", "id"], name="client_approval_queue_idx"),
+            models.Index(fields=["created_at", "id"], name="client_created_idx"),
+            models.Index(fields=["approval_status", "created_at", "id"], name="client_status_created_idx"),
+            models.Index(fields=["client_type", "created_at", "id"], name="client_type_created_idx"),
+            models.Index(fields=["assigned_employee", "created_at", "id"], name="client_employee_created_idx"),
+            # ✅ An employee's list filtered by status; also the per-employee pending count
+            models.Index(
+                fields=["assigned_employee", "approval_status", "created_at", "id"], name="client_employee_status_idx"
+            ),
+            # ✅ Partial: only unassigned clients (?assigned_employee=none, assign_unassigned_clients).
+            # Backends without partial indexes (MySQL) skip it and use client_type_created_idx.
+            models.Index(
+                fields=["client_type", "created_at", "id"], name="client_unassigned_idx",
+                condition=models.Q(assigned_employee__isnull=True),
+            ),
+        ]
+
+    # ✅ Columns whose changes drive derived data (employee workload counters, dashboard stats, ...)
+    TRACKED_FIELDS = ("approval_status", "assigned_employee_id", "client_type", "expected_loan_amount", "created_at")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_state = instance.tracked_state()
+        return instance
+
+    def tracked_state(self):
+        """ Current values of TRACKED_FIELDS (deferred fields are left out). """
+        return {name: self.__dict__[name] for name in self.TRACKED_FIELDS if name in self.__dict__}
+
+    def _writable_profile(self):
+        """ The profile to assign to: the saved one (loaded if needed) or a new one for a new client. """
+        try:
+            return self.profile
+        except ClientProfile.DoesNotExist:
+            self.profile = ClientProfile()
+            return self.profile
+
+    def save(self, *args, **kwargs):
+        """ Save the client and, when any of its PROFILE_FIELDS were assigned, its profile too. """
+        changed = self.__dict__.get("_profile_changes", set())
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            changed = set(update_fields) & set(self.PROFILE_FIELDS)
+            kwargs["update_fields"] = [name for name in update_fields if name not in self.PROFILE_FIELDS]
+
+        if not changed:
+            super().save(*args, **kwargs)
+        else:
+            using = kwargs.get("using")
+            profile = self._writable_profile()
+            with transaction.atomic(using=using, savepoint=False):
+                if self._state.adding:
+                    super().save(*args, **kwargs)
+                    profile.save(force_insert=True, using=using)
+                else:
+                    # First, so the client's post_save receivers (search, duplicates) read the new values
+                    profile.save(update_fields=None if profile._state.adding else changed, using=using)
+                    super().save(*args, **kwargs)
+        self._profile_changes = set()
+        self._loaded_state = self.tracked_state()
+
+    def __str__(self):
+        return f"{self.name} ({self.client_type}) - {self.assigned_employee if self.assigned_employee_id else 'Unassigned'}"
+
+
+# ✅ The cold part of a client: personal details only the full client views read.
+#    Keeping them out of the Client row keeps that row (and its pages) small for the hot queries.
+class ClientProfile(models.Model):
+    client = models.OneToOneField(Client, on_delete=models.CASCADE, primary_key=True, related_name="profile")
+    father_name = models.CharField(max_length=255)
+    mother_name = models.CharField(max_length=255)
+    qualifications = models.CharField(max_length=255)
+    married_status = models.BooleanField(default=False)
+    current_address = models.TextField()
+    landmark = models.CharField(max_length=255)
+    years_at_address = models.IntegerField()
+    office_name = models.CharField(max_length=255)
+    office_address = models.TextField()
+    designation = models.CharField(max_length=255)
+    department = models.CharField(max_length=255)
+    current_experience = models.IntegerField()  # In years
+    overall_experience = models.IntegerField()  # In years
+    reference_name_1 = models.CharField(max_length=255)
+    reference_number_1 = models.CharField(max_length=15)
+    reference_name_2 = models.CharField(max_length=255)
+    reference_number_2 = models.CharField(max_length=15)
+    loan_purpose = models.TextField()
 
     def __str__(self):
-        return f"{self.name} ({self.client_type}) - {self.assigned_employee if self.assigned_employee else 'Unassigned'}"
+        return f"Profile of client {self.client_id}"
+
+
+def _profile_property(name):
+    def get(client):
+        return getattr(client.profile, name)
+
+    def set_(client, value):
+        setattr(client._writable_profile(), name, value)
+        client.__dict__.setdefault("_profile_changes", set()).add(name)
+
+    return property(get, set_, doc=f"``profile.{name}``; saved by ``Client.save()``.")
+
+
+# ✅ Client(father_name=...), client.father_name and serializers keep working on the profile columns
+for _name in Client.PROFILE_FIELDS:
+    setattr(Client, _name, _profile_property(_name))
 
 
 # ✅ Secure Employee-Registered Client Details (Fields filled by Employees)
@@ -117,13 +247,13 @@ class EmployeeClientDetails(models.Model):
         related_name="extra_details"
     )
 
-    # ✅ Fields that can only be filled by the Employee
+    # ✅ Fields that can only be filled by the Employee; documents are stored by content hash (api/storage.py)
     cibil_score = models.IntegerField()
-    aadhaar_front = models.ImageField(upload_to="documents/aadhaar/", null=True, blank=True)
-    aadhaar_back = models.ImageField(upload_to="documents/aadhaar/", null=True, blank=True)
-    cibil_report = models.ImageField(upload_to="documents/cibil/", null=True, blank=True)
-    pan_card = models.ImageField(upload_to="documents/pan/", null=True, blank=True)
-    gas_bill = models.ImageField(upload_to="documents/gas/", null=True, blank=True)
+    aadhaar_front = models.ImageField(upload_to="documents/aadhaar/", storage=document_storage, null=True, blank=True)
+    aadhaar_back = models.ImageField(upload_to="documents/aadhaar/", storage=document_storage, null=True, blank=True)
+    cibil_report = models.ImageField(upload_to="documents/cibil/", storage=document_storage, null=True, blank=True)
+    pan_card = models.ImageField(upload_to="documents/pan/", storage=document_storage, null=True, blank=True)
+    gas_bill = models.ImageField(upload_to="documents/gas/", storage=document_storage, null=True, blank=True)
 
     reference_number_1 = models.CharField(max_length=15)
     reference_number_2 = models.CharField(max_length=15)
@@ -139,5 +269,288 @@ class EmployeeClientDetails(models.Model):
 
     updated_at = models.DateTimeField(auto_now=True)
 
+    DOCUMENT_FIELDS = ("aadhaar_front", "aadhaar_back", "cibil_report", "pan_card", "gas_bill")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_documents = instance.document_names()
+        return instance
+
+    def document_names(self):
+        """ ``{field: stored name}`` of the loaded document fields (deferred ones are left out). """
+        return {name: str(self.__dict__[name] or "") for name in self.DOCUMENT_FIELDS if name in self.__dict__}
+
+    def __str__(self):
+        return f"Details for {self.client.name} (Filled by {self.filled_by.username if self.filled_by_id else 'Unknown'})"
+
+
+# ✅ Chunked, resumable document upload; processed off the request thread
+class DocumentUpload(models.Model):
+    STATUS_CHOICES = (
+        ('uploading', 'Uploading'),
+        ('queued', 'Queued'),
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    details = models.ForeignKey(
+        EmployeeClientDetails,
+        on_delete=models.CASCADE,
+        related_name="uploads"
+    )
+    field = models.CharField(max_length=20, choices=[(name, name) for name in EmployeeClientDetails.DOCUMENT_FIELDS])
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    received_size = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='uploading')
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    stored_name = models.CharField(max_length=255, blank=True)  # processed file in the documents storage
+    thumbnail = models.ImageField(upload_to="documents/thumbnails/", storage=document_storage, null=True, blank=True)
+    error = models.TextField(blank=True)
+    uploaded_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="document_uploads"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.field} for details {self.details_id} ({self.status})"
+
+
+# ✅ A decided client moved out of the hot tables; see api/archive.py.
+#    Same id and list columns as the Client it replaces; the profile and the
+#    employee's details (document names in the archive storage) are kept as JSON.
+class ArchivedClient(models.Model):
+    id = models.BigIntegerField(primary_key=True)  # the archived Client's id
+    name = models.CharField(max_length=255)
+    contact_number = models.CharField(max_length=15, db_index=True)  # free for a new application
+    alternative_number = models.CharField(max_length=15, blank=True, null=True)
+    gmail = models.EmailField(db_index=True)
+    expected_loan_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    client_type = CompactChoiceField(
+        choices=Client.CLIENT_TYPE_CHOICES, codes=Client.CLIENT_TYPE_CODES, default='direct'
+    )
+    # No FK constraint: the archive outlives the employee
+    assigned_employee = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    approval_status = CompactChoiceField(choices=Client.status_choices, codes=Client.STATUS_CODES)
+    created_at = models.DateTimeField()
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    profile = models.JSONField(default=dict, encoder=DjangoJSONEncoder)  # ClientProfile columns
+    details = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)  # EmployeeClientDetails columns
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Same keyset order as the live list (ArchivedClientPagination)
+            models.Index(fields=["created_at", "id"], name="archived_client_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.approval_status}, archived {self.archived_at:%Y-%m-%d})"
+
+
+# ✅ Reference count of a stored document file; see api/storage.py and api/documents.py
+class DocumentBlob(models.Model):
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255)  # in the documents storage
+    size = models.PositiveBigIntegerField()
+    ref_count = models.IntegerField(default=0)  # document fields pointing at the file
+    updated_at = models.DateTimeField()  # last reference change; unreferenced blobs are collected after a grace period
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ref_count", "updated_at"], name="document_blob_collect_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+
+# ✅ Append-only audit trail of approval workflow decisions
+class ApprovalHistory(models.Model):
+    ACTION_CHOICES = (
+        ('submitted', 'Submitted for approval'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+    )
+
+    # No FK constraint: history outlives the client row (e.g. once it is archived)
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="approval_history"
+    )
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    from_status = models.CharField(max_length=10, choices=Client.status_choices)
+    to_status = models.CharField(max_length=10, choices=Client.status_choices)
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="approval_actions"
+    )
+    note = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["client", "created_at"], name="approval_history_client_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Approval history is append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Approval history is append-only.")
+
+    def __str__(self):
+        return f"{self.client_id}: {self.from_status} -> {self.to_status} ({self.action})"
+
+
+# ✅ Pre-aggregated dashboard bucket: clients per day / status / type / employee
+class ClientDailyStat(models.Model):
+    day = models.DateField()
+    approval_status = models.CharField(max_length=10, choices=Client.status_choices)
+    client_type = models.CharField(max_length=20, choices=Client.CLIENT_TYPE_CHOICES)
+    # No FK constraint: buckets keep their history if the employee is removed
+    employee = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    client_count = models.IntegerField(default=0)
+    loan_amount_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["day", "approval_status", "client_type", "employee"], name="client_stat_bucket_idx"),
+        ]
+        constraints = [
+            # One row per bucket; unassigned buckets (NULL employee) included, hence the Coalesce
+            models.UniqueConstraint(
+                "day", "approval_status", "client_type", Coalesce("employee", Value(0)), name="client_stat_bucket_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.approval_status}/{self.client_type}/{self.employee_id}: {self.client_count}"
+
+
+# ✅ Inverted search index: one row per (term, client, field); see api/search.py
+class ClientSearchTerm(models.Model):
+    term = models.CharField(max_length=16)
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="+")
+    field = models.CharField(max_length=24)
+    weight = models.PositiveSmallIntegerField()
+
+    class Meta:
+        indexes = [
+            # Covering: a lookup never reads the table itself
+            models.Index(fields=["term", "client", "weight"], name="client_search_term_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.client_id} ({self.field})"
+
+
+# ✅ Duplicate-detection blocking keys; see api/dedup.py
+class ClientBlockingKey(models.Model):
+    key = models.CharField(max_length=32)  # blake2b digest of "<kind>:<normalized value>"
+    kind = models.CharField(max_length=16)
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["key", "client"], name="client_blocking_key_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.key} -> {self.client_id}"
+
+
+# ✅ Probable duplicate application, kept for a manager to confirm or dismiss
+class DuplicateFlag(models.Model):
+    STATUS_CHOICES = (
+        ('open', 'Open'),
+        ('confirmed', 'Confirmed'),
+        ('dismissed', 'Dismissed'),
+    )
+
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="duplicate_flags")
+    duplicate_of = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="+")
+    score = models.DecimalField(max_digits=4, decimal_places=2)
+    reasons = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
+    reviewed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["client", "duplicate_of"], name="duplicate_flag_pair_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["status", "created_at", "id"], name="duplicate_flag_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.client_id} ~ {self.duplicate_of_id} ({self.score}, {self.status})"
+
+
+# ✅ Durable background job; see api/jobs.py
+class Job(models.Model):
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    name = models.CharField(max_length=100)  # registered task, e.g. "notifications.application_received"
+    payload = models.JSONField(default=dict)
+    # Enqueueing the same key again is a no-op while the job row exists (see JOB_RETENTION_DAYS)
+    idempotency_key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField()  # earliest start; pushed back after a failed attempt
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)  # a running job past this is reclaimed
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest due jobs of a status
+            models.Index(fields=["status", "run_at", "id"], name="job_ready_idx"),
+        ]
+
     def __str__(self):
-        return f"Details for {self.client.name} (Filled by {self.filled_by.username if self.filled_by else 'Unknown'})"
+        return f"{self.name} #{self.pk} ({self.status}, attempt {self.attempts}/{self.max_attempts})"
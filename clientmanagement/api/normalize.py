@@ -0,0 +1,31 @@
+"""
+Normalization shared by the search index and duplicate detection.
+"""
+import re
+import unicodedata
+
+_NON_DIGIT = re.compile(r"\D+")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_phone(value):
+    """
+    Reduce a phone number to its national digits: ``"+91 98765-43210"``,
+    ``"098765 43210"`` and ``"9876543210"`` all become ``"9876543210"``.
+    """
+    digits = _NON_DIGIT.sub("", value or "")
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits
+
+
+def normalize_text(value):
+    """ Lower-case ASCII folding: accents dropped, punctuation collapsed to single spaces. """
+    folded = unicodedata.normalize("NFKD", value or "").encode("ascii", "ignore").decode("ascii")
+    return " ".join(_WORD.findall(folded.lower()))
+
+
+def words(value):
+    return normalize_text(value).split()
@@ -0,0 +1,75 @@
+"""
+Emails about client applications, sent by background jobs (``api/jobs.py``).
+
+Views and the approval workflow call the enqueueing helpers below, which
+only insert a ``Job`` row; the message is rendered and handed to
+``EMAIL_BACKEND`` later, by a worker. A failed send is retried with backoff.
+"""
+from django.conf import settings
+from django.core.mail import send_mail, send_mass_mail
+
+from . import jobs
+from .models import Client, User
+
+
+def application_received(client):
+    """ Confirmation to a client who applied through the public form. """
+    jobs.enqueue("notifications.application_received", {"client_id": client.pk}, key=f"application-received:{client.pk}")
+
+
+def approval_requested(client, employee):
+    """ Tell the managers that ``employee`` put ``client`` on the approval queue. """
+    jobs.enqueue(
+        "notifications.approval_requested",
+        {"client_id": client.pk, "employee_id": employee.pk},
+        key=f"approval-requested:{client.pk}:{client.submitted_at.isoformat()}",
+    )
+
+
+def decided(client_ids, status):
+    """ Tell each client the manager's decision (one job per client). """
+    jobs.enqueue_many(
+        "notifications.decided", [(None, {"client_id": client_id, "status": status}) for client_id in client_ids]
+    )
+
+
+@jobs.task("notifications.application_received")
+def send_application_received(client_id):
+    client = Client.objects.filter(pk=client_id).only("name", "gmail").first()
+    if client is None:
+        return
+    send_mail(
+        "We received your loan application",
+        f"Dear {client.name},\n\nThank you for applying. Your application number is {client.pk}; "
+        "an employee will contact you shortly.",
+        settings.DEFAULT_FROM_EMAIL,
+        [client.gmail],
+    )
+
+
+@jobs.task("notifications.approval_requested")
+def send_approval_requested(client_id, employee_id):
+    client = Client.objects.filter(pk=client_id).only("name", "expected_loan_amount").first()
+    employee = User.objects.filter(pk=employee_id).only("username").first()
+    if client is None:
+        return
+    subject = f"Loan approval requested: {client.name}"
+    body = (
+        f"{employee.username if employee else 'An employee'} sent client #{client.pk} ({client.name}, "
+        f"{client.expected_loan_amount}) for approval."
+    )
+    managers = User.objects.filter(role="manager", is_active=True).values_list("email", flat=True)
+    send_mass_mail([(subject, body, settings.DEFAULT_FROM_EMAIL, [email]) for email in managers])
+
+
+@jobs.task("notifications.decided")
+def send_decision(client_id, status):
+    client = Client.objects.filter(pk=client_id).only("name", "gmail").first()
+    if client is None:
+        return
+    send_mail(
+        f"Your loan application was {status}",
+        f"Dear {client.name},\n\nYour loan application #{client.pk} was {status}.",
+        settings.DEFAULT_FROM_EMAIL,
+        [client.gmail],
+    )
@@ -0,0 +1,151 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .models import ArchivedClient, Client, DuplicateFlag
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor (keyset) pagination over a unique ordering key.
+
+    Each page is fetched with ``WHERE key < last_seen ORDER BY key LIMIT n``,
+    so the cost of a page does not depend on how deep into the list it is.
+    ``ordering`` must end with a unique column and every entry must sort in
+    the same direction.
+    """
+    model = None
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """ ``paginate_queryset`` for async views. """
+        return self.set_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(position))
+
+        # Fetch one extra row to know whether there is a next page.
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        position = [self.get_field_value(last, name) for name, _ in self.fields()]
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
+
+    def fields(self):
+        return [(field.lstrip("-"), field.startswith("-")) for field in self.ordering]
+
+    def get_field_value(self, obj, name):
+        return getattr(obj, name)
+
+    def position_filter(self, position):
+        """
+        Build ``key < position`` (or ``>`` for ascending keys) for a
+        multi-column key. The leading range predicate on the first column
+        lets the database answer it with a single index range scan.
+        """
+        fields = self.fields()
+        first, descending = fields[0]
+        inclusive = "lte" if descending else "gte"
+        strict = "lt" if descending else "gt"
+
+        expanded = Q()
+        for index, (name, _) in enumerate(fields):
+            clause = Q(**{f"{name}__{strict}": position[index]})
+            for prev_index in range(index):
+                clause &= Q(**{fields[prev_index][0]: position[prev_index]})
+            expanded |= clause
+        return Q(**{f"{first}__{inclusive}": position[0]}) & expanded
+
+    def encode_cursor(self, position):
+        values = [value.isoformat() if hasattr(value, "isoformat") else value for value in position]
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields(), values)
+            ]
+            if None in position:  # the ordering columns are never NULL
+                raise ValueError
+            return position
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound("Invalid cursor")
+
+
+class ClientCursorPagination(KeysetPagination):
+    """ Newest clients first, paged on the ``(created_at, id)`` index. """
+    model = Client
+
+
+class ArchivedClientPagination(KeysetPagination):
+    """ Newest archived clients first, paged on the ``(created_at, id)`` index. """
+    model = ArchivedClient
+
+
+class ApprovalQueuePagination(KeysetPagination):
+    """ Oldest submission first, paged on the ``(approval_status, submitted_at, id)`` index. """
+    model = Client
+    ordering = ("submitted_at", "id")
+
+
+class DuplicateFlagPagination(KeysetPagination):
+    """ Newest flags first, paged on the ``(status, created_at, id)`` index. """
+    model = DuplicateFlag
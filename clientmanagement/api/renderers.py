@@ -0,0 +1,39 @@
+"""
+``JSONRenderer`` output, byte for byte, encoded by orjson when it is installed.
+
+DRF's renderer runs ``json.dumps`` with its ``JSONEncoder`` for everything
+the ``json`` module cannot encode. ``FastJSONRenderer`` hands the same data
+to orjson: datetimes, dates and times (which orjson would format itself)
+and other unknown types go through DRF's ``JSONEncoder.default``. U+2028 and
+U+2029 are escaped like DRF does. Indented output (the browsable API,
+``?indent=``), keys orjson rejects (non-string, integers beyond 64 bits) and
+a missing orjson fall back to ``JSONRenderer``.
+
+orjson writes floats with exponents differently (``1e16``, not ``1e+16``).
+Use it for payloads without floats, such as the compiled client lists
+(``api/compiled.py``).
+"""
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional: plain JSONRenderer output
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not (self.compact and self.strict and not self.ensure_ascii) \
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b"\xe2\x80\xa8" in content or b"\xe2\x80\xa9" in content:
+            content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return content
+
+
+# Renderers of the client list views: JSON first, like DRF's default renderer classes
+CLIENT_LIST_RENDERERS = [FastJSONRenderer, BrowsableAPIRenderer]
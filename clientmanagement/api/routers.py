@@ -0,0 +1,100 @@
+"""
+Read-replica routing.
+
+Only reads that are explicitly marked go to a replica: the client list,
+search and export (``reads_from_replica`` / ``replica_alias``). Everything
+else, including every write and every query inside a transaction, uses
+``default``, so a request never mixes a write with a stale read.
+
+Replicas lag behind the primary. A user who has just written something
+(``record_write``, called by ``api.middleware.ReplicaStickinessMiddleware``)
+reads from the primary for ``REPLICA_LAG_WINDOW`` seconds, so they always
+see their own changes. Other users may still read the old data from a
+replica then; ``api/caching.py`` does not store those responses under the
+new data version (``replicas_may_lag``).
+"""
+import contextlib
+import functools
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+_read_alias = ContextVar("read_alias", default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+DATA_WRITE_KEY = "api:recent-write:any"
+
+
+def _recent_write_key(user_pk):
+    return f"api:recent-write:{user_pk}"
+
+
+def record_write(user):
+    """ Keep ``user``'s reads on the primary until replicas have caught up. """
+    if user is not None and user.is_authenticated:
+        cache.set(_recent_write_key(user.pk), True, timeout=getattr(settings, "REPLICA_LAG_WINDOW", 5))
+
+
+def record_data_write():
+    """ Note a committed write by anyone; replicas may miss it for ``REPLICA_LAG_WINDOW`` seconds. """
+    if replica_aliases():
+        cache.set(DATA_WRITE_KEY, True, timeout=getattr(settings, "REPLICA_LAG_WINDOW", 5))
+
+
+def replicas_may_lag():
+    return bool(replica_aliases()) and cache.get(DATA_WRITE_KEY) is not None
+
+
+def served_by_replica(request):
+    """ Whether ``request``'s marked reads went to a replica. """
+    return getattr(request, "read_alias", None) in replica_aliases()
+
+
+def replica_alias(request=None):
+    """ A replica for this request's reads, or ``default`` (no replicas, or a recent write). """
+    aliases = replica_aliases()
+    user = getattr(request, "user", None)
+    if not aliases or (user is not None and user.is_authenticated and cache.get(_recent_write_key(user.pk))):
+        return "default"
+    return random.choice(aliases)
+
+
+@contextlib.contextmanager
+def replica_reads(request=None):
+    alias = replica_alias(request)
+    if request is not None:
+        request.read_alias = alias
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def reads_from_replica(get):
+    """ Decorator for a view's ``get``: its queries may be served by a replica. """
+    @functools.wraps(get)
+    def wrapper(view, request, *args, **kwargs):
+        with replica_reads(request):
+            return get(view, request, *args, **kwargs)
+    return wrapper
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # replicas hold the same data as the primary
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
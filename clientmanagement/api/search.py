@@ -0,0 +1,139 @@
+"""
+Client search backed by an inverted index of edge n-grams.
+
+Every searchable value is split into words and each word is stored as all
+of its prefixes from ``MIN_PREFIX`` to ``MAX_PREFIX`` characters, so a
+partial word ("rame" for "Ramesh") is a single indexed equality lookup.
+Phone numbers are normalized (``api.normalize.normalize_phone``) and stored
+with their trailing digit runs, so "43210" finds "+91 98765-43210".
+
+A query matches clients that contain every query word; results are ranked
+by the summed field weights (whole-word and whole-number matches count
+double). Only the newest ``MAX_CANDIDATES`` clients holding the query's most
+selective term are ranked, so a lookup reads a bounded number of index
+entries however large ``Client`` grows and however common a name is.
+
+The index is rewritten for a client whenever a searchable field is saved,
+and for imported batches via ``clients_bulk_created``.
+``manage.py rebuild_search_index`` rebuilds it from scratch.
+"""
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import Client, ClientSearchTerm
+from .normalize import normalize_phone, words
+
+MIN_PREFIX = 3
+MAX_PREFIX = 12
+MIN_PHONE_DIGITS = 4
+PHONE_PREFIX = "#"  # keeps phone terms apart from text terms
+
+TEXT_FIELDS = {"name": 8, "gmail": 4, "office_name": 3}
+PHONE_FIELDS = {"contact_number": 6, "alternative_number": 4, "reference_number_1": 2, "reference_number_2": 2}
+SEARCH_FIELDS = tuple(TEXT_FIELDS) + tuple(PHONE_FIELDS)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_CANDIDATES = 1000
+
+
+def text_terms(word):
+    """ ``{term: is_whole_word}`` for one normalized word. """
+    word = word[:MAX_PREFIX]
+    return {word[:size]: size == len(word) for size in range(MIN_PREFIX, len(word) + 1)}
+
+
+def phone_terms(digits):
+    if len(digits) < MIN_PHONE_DIGITS:
+        return {}
+    terms = {PHONE_PREFIX + digits[-size:]: False for size in range(MIN_PHONE_DIGITS, len(digits))}
+    terms[PHONE_PREFIX + digits] = True
+    return terms
+
+
+def _email_words(value):
+    return words((value or "").split("@", 1)[0])
+
+
+def client_terms(row):
+    """ Index rows for one client, given its ``SEARCH_FIELDS`` values as a dict. """
+    for field, weight in TEXT_FIELDS.items():
+        terms = {}
+        for word in (_email_words(row[field]) if field == "gmail" else words(row[field])):
+            for term, whole in text_terms(word).items():
+                terms[term] = terms.get(term, False) or whole
+        for term, whole in terms.items():
+            yield ClientSearchTerm(term=term, client_id=row["id"], field=field, weight=weight * (2 if whole else 1))
+    for field, weight in PHONE_FIELDS.items():
+        for term, whole in phone_terms(normalize_phone(row[field])).items():
+            yield ClientSearchTerm(term=term, client_id=row["id"], field=field, weight=weight * (2 if whole else 1))
+
+
+def index_clients(client_ids, batch_size=2000):
+    """ Replace the index rows of ``client_ids`` with ones built from their current values. """
+    client_ids = list(client_ids)
+    rows = Client.objects.filter(pk__in=client_ids).profile_values("id", *SEARCH_FIELDS)
+    with transaction.atomic():
+        ClientSearchTerm.objects.filter(client_id__in=client_ids).delete()
+        ClientSearchTerm.objects.bulk_create(
+            (term for row in rows.iterator() for term in client_terms(row)), batch_size=batch_size
+        )
+
+
+def rebuild(batch_size=2000):
+    """ Rebuild the whole index in id-ordered batches. Returns the number of clients indexed. """
+    ClientSearchTerm.objects.all().delete()
+    indexed, last_id = 0, 0
+    while True:
+        ids = list(Client.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return indexed
+        index_clients(ids)
+        indexed += len(ids)
+        last_id = ids[-1]
+
+
+def query_terms(query):
+    """
+    Index terms a query must all match. A query that is just a phone number
+    (digits with spaces, dashes, brackets or a leading +) is one phone term.
+    """
+    if query.strip() and not query.strip("+0123456789 -()"):
+        digits = normalize_phone(query)
+        return [PHONE_PREFIX + digits] if len(digits) >= MIN_PHONE_DIGITS else []
+
+    terms = []
+    for chunk in query.split():
+        chunk_words = _email_words(chunk) if "@" in chunk else words(chunk)
+        for word in chunk_words:
+            if word.isdigit() and len(word) >= MIN_PHONE_DIGITS:
+                terms.append(PHONE_PREFIX + normalize_phone(word))
+            elif len(word) >= MIN_PREFIX:
+                terms.append(word[:MAX_PREFIX])
+    return list(dict.fromkeys(terms))
+
+
+def search(query, limit=DEFAULT_LIMIT):
+    """ Ranked ``[(client_id, score)]`` for clients matching every term of ``query``. """
+    terms = query_terms(query)
+    if not terms:
+        return []
+    # Phone terms are near-unique; among words the longest is usually the rarest.
+    driver = max(terms, key=lambda term: (term.startswith(PHONE_PREFIX), len(term)))
+    # A client matching every term holds the driver term, so bounding client_id at the
+    # MAX_CANDIDATES-th newest holder of the driver bounds the work without losing any
+    # of those candidates.
+    cutoff = list(
+        ClientSearchTerm.objects.filter(term=driver)
+        .order_by("-client_id").values_list("client_id", flat=True).distinct()[MAX_CANDIDATES - 1:MAX_CANDIDATES]
+    )
+    matches = ClientSearchTerm.objects.filter(term__in=terms)
+    if cutoff:
+        matches = matches.filter(client_id__gte=cutoff[0])
+    ranked = (
+        matches.values("client_id")
+        .annotate(matched=Count("term", distinct=True), score=Sum("weight"))
+        .filter(matched=len(terms))
+        .order_by("-score", "-client_id")[:limit]
+    )
+    return [(row["client_id"], row["score"]) for row in ranked]
@@ -1,9 +1,21 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import Client, EmployeeClientDetails
+from django.urls import reverse
+from . import documents, metrics
+from .models import ApprovalHistory, Client, ClientProfile, DocumentUpload, DuplicateFlag, EmployeeClientDetails
+from .storage import digest
 
 User = get_user_model()
 
+
+# ✅ Counts serializer time towards the request's metrics (api/metrics.py)
+class InstrumentedSerializerMixin:
+    def to_representation(self, instance):
+        with metrics.serializing():
+            return super().to_representation(instance)
+
+
 # ✅ Serializer for User Registration
 class UserRegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -34,21 +46,163 @@ class UserLoginSerializer(serializers.Serializer):
 
 
 # ✅ Serializer for Viewing User Data
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["id", "username", "email", "role", "phone_number", "dob"]
 
 
-# ✅ Serializer for Clients (Direct & Employee-Registered)
-class ClientSerializer(serializers.ModelSerializer):
+# ✅ Compact read-only view of a User, nested inside client payloads
+class UserSummarySerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
-        model = Client
-        fields = "__all__"
+        model = User
+        fields = ["id", "username", "email"]
 
 
 # ✅ Serializer for Employee-Registered Clients (Sensitive Data)
-class EmployeeClientDetailsSerializer(serializers.ModelSerializer):
+class EmployeeClientDetailsSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    filled_by_detail = UserSummarySerializer(source="filled_by", read_only=True)
+    # ✅ Small previews for lists: {field: URL of its DOCUMENT_THUMBNAIL_SIZE px thumbnail}
+    thumbnails = serializers.SerializerMethodField()
+
+    # get_thumbnails() from values rows (api/compiled.py)
+    compiled_methods = {"thumbnails": ("thumbnail_urls", ("id", *EmployeeClientDetails.DOCUMENT_FIELDS))}
+
     class Meta:
         model = EmployeeClientDetails
         fields = "__all__"
+
+    def get_thumbnails(self, details):
+        names = [getattr(details, name).name for name in EmployeeClientDetails.DOCUMENT_FIELDS]
+        return self.thumbnail_urls(details.pk, *names)
+
+    def thumbnail_urls(self, pk, *names):
+        request, size = self.context.get("request"), settings.DOCUMENT_THUMBNAIL_SIZE
+        thumbnails = {}
+        for field, name in zip(EmployeeClientDetails.DOCUMENT_FIELDS, names):
+            if digest(name):  # archived and older files have no thumbnails
+                url = reverse("document", kwargs={"pk": pk, "field": field})
+                url = f"{url}?size={size}&v={documents.version(name)}"
+                thumbnails[field] = request.build_absolute_uri(url) if request is not None else url
+        return thumbnails
+
+
+# ✅ Lets callers ask for a subset of a serializer's fields (?fields=a,b)
+class SparseFieldsetMixin:
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+# ✅ Serializer for Clients (Direct & Employee-Registered)
+class ClientSerializer(InstrumentedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    # Nested reads; views select_related() these so they cost no extra queries
+    assigned_employee_detail = UserSummarySerializer(source="assigned_employee", read_only=True)
+    extra_details = EmployeeClientDetailsSerializer(read_only=True)
+
+    class Meta:
+        model = Client
+        # Listed explicitly: the profile columns are not Client fields any more, and the order is the API's
+        fields = [
+            "id", "assigned_employee_detail", "extra_details",
+            "name", "contact_number", "alternative_number", "father_name", "mother_name", "qualifications",
+            "married_status", "current_address", "landmark", "years_at_address", "gmail", "office_name",
+            "office_address", "designation", "department", "current_experience", "overall_experience",
+            "reference_name_1", "reference_number_1", "reference_name_2", "reference_number_2",
+            "expected_loan_amount", "loan_purpose", "client_type", "approval_status", "created_at", "submitted_at",
+            "assigned_employee",
+        ]
+        read_only_fields = ["submitted_at"]
+
+    def build_field(self, field_name, info, model_class, nested_depth):
+        if field_name in Client.PROFILE_FIELDS:
+            # Validated like the ClientProfile column, read as ``client.profile.<name>`` so
+            # fieldsets know to join the profile (views select_related() it)
+            field_class, field_kwargs = self.build_standard_field(field_name, ClientProfile._meta.get_field(field_name))
+            return field_class, {**field_kwargs, "source": f"profile.{field_name}"}
+        return super().build_field(field_name, info, model_class, nested_depth)
+
+    @staticmethod
+    def model_kwargs(validated_data):
+        """ ``validated_data`` with the profile columns back at the top level, as ``Client()`` takes them. """
+        data = dict(validated_data)
+        data.update(data.pop("profile", {}))
+        return data
+
+    def create(self, validated_data):
+        return super().create(self.model_kwargs(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, self.model_kwargs(validated_data))
+
+
+# ✅ Compact Client representation used by default on list endpoints
+class ClientSummarySerializer(InstrumentedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Client
+        fields = [
+            "id", "name", "contact_number", "client_type", "approval_status",
+            "expected_loan_amount", "assigned_employee", "created_at", "submitted_at",
+        ]
+
+
+# ✅ Manager batch decision on queued clients
+class ApprovalDecisionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1, max_length=500)
+    action = serializers.ChoiceField(choices=["approve", "reject"])
+    note = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+# ✅ Read-only approval audit trail
+class ApprovalHistorySerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    actor = UserSummarySerializer(read_only=True)
+
+    class Meta:
+        model = ApprovalHistory
+        fields = ["id", "client", "action", "from_status", "to_status", "actor", "note", "created_at"]
+
+
+class DuplicateFlagSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    client_detail = ClientSummarySerializer(source="client", read_only=True)
+    duplicate_of_detail = ClientSummarySerializer(source="duplicate_of", read_only=True)
+    reviewed_by = UserSummarySerializer(read_only=True)
+
+    class Meta:
+        model = DuplicateFlag
+        fields = [
+            "id", "client", "client_detail", "duplicate_of", "duplicate_of_detail",
+            "score", "reasons", "status", "reviewed_by", "created_at",
+        ]
+        read_only_fields = ["client", "duplicate_of", "score", "reasons", "reviewed_by", "created_at"]
+
+
+# ✅ Query parameters of the manager dashboard
+class DashboardQuerySerializer(serializers.Serializer):
+    group_by = serializers.CharField(required=False, allow_blank=True, default="")
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate_group_by(self, value):
+        from .stats import GROUPS
+
+        groups = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(groups) - set(GROUPS)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown groups: {', '.join(sorted(unknown))}")
+        return groups
+
+
+# ✅ Chunked document upload session
+class DocumentUploadSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    size = serializers.IntegerField(source="total_size", min_value=1)
+
+    class Meta:
+        model = DocumentUpload
+        fields = [
+            "id", "details", "field", "filename", "size", "received_size", "status",
+            "sha256", "thumbnail", "error", "created_at", "updated_at",
+        ]
+        read_only_fields = ["received_size", "status", "sha256", "thumbnail", "error"]
@@ -0,0 +1,131 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import assignment, caching, dedup, documents, search, stats
+from .authentication import evict_user
+from .models import Client, ClientProfile, EmployeeClientDetails, User
+
+# ✅ Sent after Client.objects.bulk_create() (which skips post_save) with clients=[...]
+clients_bulk_created = Signal()
+
+# ✅ Sent after a queryset .update() of client statuses with clients=[...]; each
+#    client holds its new values and its previous ones in ``_loaded_state``
+clients_status_changed = Signal()
+
+
+# ✅ Keep employee workload counters in step with client writes
+@receiver(post_save, sender=Client)
+def update_open_counts_on_save(sender, instance, created, **kwargs):
+    before = None if created else getattr(instance, "_loaded_state", None)
+    assignment.record_transition(before, instance.tracked_state())
+
+
+@receiver(post_delete, sender=Client)
+def update_open_counts_on_delete(sender, instance, **kwargs):
+    assignment.record_transition(getattr(instance, "_loaded_state", None), None)
+
+
+@receiver(clients_bulk_created, sender=Client)
+def update_open_counts_on_bulk_create(sender, clients, **kwargs):
+    assignment.record_bulk_create(clients)
+
+
+@receiver(clients_status_changed, sender=Client)
+def update_open_counts_on_status_change(sender, clients, **kwargs):
+    for client in clients:
+        assignment.record_transition(client._loaded_state, client.tracked_state())
+
+
+# ✅ Keep dashboard buckets in step with client writes (deletes are reconciled by a rebuild)
+@receiver(post_save, sender=Client)
+def update_stats_on_save(sender, instance, created, **kwargs):
+    before = None if created else getattr(instance, "_loaded_state", None)
+    stats.record_transitions([(before, instance.tracked_state())])
+
+
+@receiver(clients_bulk_created, sender=Client)
+def update_stats_on_bulk_create(sender, clients, **kwargs):
+    stats.record_transitions([(None, client.tracked_state()) for client in clients])
+
+
+@receiver(clients_status_changed, sender=Client)
+def update_stats_on_status_change(sender, clients, **kwargs):
+    stats.record_transitions([(client._loaded_state, client.tracked_state()) for client in clients])
+
+
+# ✅ Keep the search index in step with the searchable columns. A new client is indexed
+#    once its profile (which holds some of them) is saved, right after the client row.
+@receiver(post_save, sender=Client)
+def update_search_index_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if not created and (update_fields is None or not update_fields.isdisjoint(search.SEARCH_FIELDS)):
+        search.index_clients([instance.pk])
+
+
+@receiver(post_save, sender=ClientProfile)
+def update_search_index_on_profile_save(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or not update_fields.isdisjoint(search.SEARCH_FIELDS):
+        search.index_clients([instance.client_id])
+
+
+@receiver(clients_bulk_created, sender=Client)
+def update_search_index_on_bulk_create(sender, clients, **kwargs):
+    search.index_clients([client.pk for client in clients])
+
+
+# ✅ Blocking keys for duplicate detection; new clients are checked at intake
+#    (with their profile, which holds the parents' names and references)
+@receiver(post_save, sender=Client)
+def check_duplicates_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if not created and (update_fields is None or not update_fields.isdisjoint(dedup.KEY_FIELDS)):
+        dedup.index_clients([instance.pk])
+
+
+@receiver(post_save, sender=ClientProfile)
+def check_duplicates_on_profile_save(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        dedup.check_clients([instance.client_id])
+    elif update_fields is None or not update_fields.isdisjoint(dedup.KEY_FIELDS):
+        dedup.index_clients([instance.client_id])
+
+
+@receiver(clients_bulk_created, sender=Client)
+def check_duplicates_on_bulk_create(sender, clients, **kwargs):
+    dedup.check_clients([client.pk for client in clients])
+
+
+# ✅ Reference counts of stored document files; files nothing references are collected by a job
+@receiver(post_save, sender=EmployeeClientDetails)
+def count_document_references_on_save(sender, instance, created, **kwargs):
+    before = {} if created else getattr(instance, "_loaded_documents", {})
+    after = instance.document_names()
+    changed = [name for name in after if (created or name in before) and after[name] != before.get(name, "")]
+    documents.retain([after[name] for name in changed])
+    documents.release([before[name] for name in changed if name in before])
+    instance._loaded_documents = after
+
+
+@receiver(post_delete, sender=EmployeeClientDetails)
+def count_document_references_on_delete(sender, instance, **kwargs):
+    documents.release(getattr(instance, "_loaded_documents", {}).values())
+
+
+# ✅ Drop cached authentication data as soon as a user changes
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    evict_user(instance.pk)
+
+
+# ✅ Invalidate cached API responses after any write they could reflect
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=ClientProfile)
+@receiver(post_delete, sender=ClientProfile)
+@receiver(post_save, sender=EmployeeClientDetails)
+@receiver(post_delete, sender=EmployeeClientDetails)
+@receiver(post_save, sender=User)  # nested employee details
+@receiver(post_delete, sender=User)
+@receiver(clients_bulk_created, sender=Client)
+@receiver(clients_status_changed, sender=Client)
+def invalidate_cached_responses(sender, **kwargs):
+    caching.bump_version()
@@ -0,0 +1,138 @@
+"""
+Incrementally maintained dashboard statistics.
+
+Every client counts towards exactly one ``ClientDailyStat`` bucket, keyed by
+(creation day, approval status, client type, assigned employee). Client
+writes move the client's count and loan amount between buckets, so the
+dashboard only ever sums buckets instead of scanning ``Client``.
+
+Deleting a client does not change the buckets (the dashboard reports every
+application ever received, archived ones included); ``manage.py
+rebuild_dashboard_stats`` recomputes them from ``Client`` and ``ArchivedClient``.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import caching
+from .models import ArchivedClient, Client, ClientDailyStat
+
+GROUPS = {
+    "day": "day",
+    "approval_status": "approval_status",
+    "client_type": "client_type",
+    "employee": "employee_id",
+}
+
+
+def bucket_key(state):
+    return (
+        timezone.localdate(state["created_at"]),
+        state["approval_status"],
+        state["client_type"],
+        state["assigned_employee_id"],
+    )
+
+
+def apply_deltas(deltas):
+    """ Apply ``{bucket_key: [count_delta, amount_delta]}`` to the stats table. """
+    with transaction.atomic():
+        for (day, approval_status, client_type, employee_id), (count, amount) in deltas.items():
+            if not count and not amount:
+                continue
+            key = dict(day=day, approval_status=approval_status, client_type=client_type, employee_id=employee_id)
+            change = dict(client_count=F("client_count") + count, loan_amount_total=F("loan_amount_total") + amount)
+            if not ClientDailyStat.objects.filter(**key).update(**change):
+                # A new bucket: the unique constraint makes a racing insert fall back to the
+                # other's row (get_or_create), and the update then adds to that one row.
+                ClientDailyStat.objects.get_or_create(**key)
+                ClientDailyStat.objects.filter(**key).update(**change)
+
+
+def transition_deltas(transitions):
+    """ Bucket deltas for ``(before, after)`` client states (``None`` = absent). """
+    deltas = defaultdict(lambda: [0, Decimal("0")])
+    for before, after in transitions:
+        if before is not None and not all(name in before for name in Client.TRACKED_FIELDS):
+            continue
+        if before is not None:
+            delta = deltas[bucket_key(before)]
+            delta[0] -= 1
+            delta[1] -= Decimal(before["expected_loan_amount"] or 0)
+        if after is not None:
+            delta = deltas[bucket_key(after)]
+            delta[0] += 1
+            delta[1] += Decimal(after["expected_loan_amount"] or 0)
+    return deltas
+
+
+def record_transitions(transitions):
+    apply_deltas(transition_deltas(transitions))
+
+
+def rebuild():
+    """ Recompute every bucket from the ``Client`` and ``ArchivedClient`` tables. """
+    totals = defaultdict(lambda: [0, Decimal("0")])
+    for model in (Client, ArchivedClient):
+        rows = (
+            model.objects.annotate(day=TruncDate("created_at"))
+            .order_by()
+            .values("day", "approval_status", "client_type", "assigned_employee_id")
+            .annotate(total=Count("id"), amount=Sum("expected_loan_amount"))
+        )
+        for row in rows.iterator():
+            bucket = totals[row["day"], row["approval_status"], row["client_type"], row["assigned_employee_id"]]
+            bucket[0] += row["total"]
+            bucket[1] += row["amount"] or 0
+
+    with transaction.atomic():
+        ClientDailyStat.objects.all().delete()
+        ClientDailyStat.objects.bulk_create(
+            (
+                ClientDailyStat(
+                    day=day, approval_status=approval_status, client_type=client_type,
+                    employee_id=employee_id, client_count=count, loan_amount_total=amount,
+                )
+                for (day, approval_status, client_type, employee_id), (count, amount) in totals.items()
+            ),
+            batch_size=1000,
+        )
+        caching.bump_version()
+    return ClientDailyStat.objects.count()
+
+
+def _money(value):
+    """ Loan totals are rendered like ``ClientSerializer`` renders loan amounts. """
+    return str(Decimal(value or 0).quantize(Decimal("0.01")))
+
+
+def summarize(group_by=(), date_from=None, date_to=None):
+    """ Sum the buckets, grouped by any of ``GROUPS``. Cost is O(number of buckets). """
+    buckets = ClientDailyStat.objects.all()
+    if date_from:
+        buckets = buckets.filter(day__gte=date_from)
+    if date_to:
+        buckets = buckets.filter(day__lte=date_to)
+
+    columns = [GROUPS[name] for name in group_by]
+    if not columns:
+        totals = buckets.aggregate(count=Sum("client_count"), loan_amount_total=Sum("loan_amount_total"))
+        return [{"count": totals["count"] or 0, "loan_amount_total": _money(totals["loan_amount_total"])}]
+
+    rows = (
+        buckets.order_by(*columns)
+        .values(*columns)
+        .annotate(count=Sum("client_count"), loan_amount_total=Sum("loan_amount_total"))
+        .filter(count__gt=0)
+    )
+    results = []
+    for row in rows:
+        item = {name: row[GROUPS[name]] for name in group_by}
+        item["count"] = row["count"]
+        item["loan_amount_total"] = _money(row["loan_amount_total"])
+        results.append(item)
+    return results
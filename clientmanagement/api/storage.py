@@ -0,0 +1,74 @@
+"""
+Content-addressed file storage for client documents.
+
+``ContentAddressedStorage`` names every file after the SHA-256 of its bytes
+(``cas/ab/cd/abcd...<ext>``), whatever name it was saved under. Saving bytes
+that are already stored writes nothing and returns the existing name, so a
+repeat applicant's Aadhaar or PAN image is kept once however often it is
+uploaded. Files are written to a temporary name and renamed into place, so
+a reader never sees a partial file and concurrent saves of the same bytes
+are harmless.
+
+A stored file is never changed, only deleted once nothing references it:
+``DocumentBlob`` rows count the references and ``documents.collect()``
+removes unreferenced files (see ``api/documents.py``). Derived files
+(thumbnails) live under ``cas/thumbs/<size>/`` next to their source.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage, storages
+
+PREFIX = "cas/"
+BLOB_NAME = re.compile(r"^cas/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.\w+)?$")
+
+
+def document_storage():
+    """ The ``documents`` storage alias (``STORAGES`` setting); used by the document fields. """
+    return storages["documents"]
+
+
+def digest(name):
+    """ SHA-256 of the stored file ``name``, or ``None`` for a name this storage did not assign. """
+    match = BLOB_NAME.match(name or "")
+    return match.group(1) if match else None
+
+
+def blob_name(sha256, extension=""):
+    return f"{PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}{extension.lower()}"
+
+
+def thumbnail_name(sha256, size):
+    return f"{PREFIX}thumbs/{size}/{sha256}.jpg"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def _save(self, name, content):
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        name = blob_name(sha256.hexdigest(), os.path.splitext(name)[1])
+        if not self.exists(name):
+            self.save_derived(name, content)
+        return name
+
+    def save_derived(self, name, content):
+        """ Write ``content`` under exactly ``name`` (atomically, replacing any file there). """
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".partial-")
+        try:
+            with os.fdopen(descriptor, "wb") as output:
+                for chunk in content.chunks():
+                    output.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temporary, self.file_permissions_mode)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+        return name
@@ -0,0 +1,114 @@
+"""
+Synthetic, realistic-looking users, clients and client details for
+benchmarks and ``manage.py seed_synthetic``.
+"""
+import io
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from .models import Client, EmployeeClientDetails, User
+from .storage import document_storage
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Amit", "Ananya", "Arjun", "Deepa", "Divya", "Ganesh", "Harish", "Kavya",
+    "Kiran", "Lakshmi", "Manoj", "Meera", "Mohan", "Nandini", "Neha", "Pooja", "Priya", "Rahul",
+    "Rajesh", "Ramesh", "Ravi", "Sandeep", "Sanjay", "Santosh", "Shreya", "Sneha", "Suresh", "Vijay",
+]
+LAST_NAMES = [
+    "Agarwal", "Bhat", "Chandra", "Das", "Gupta", "Iyer", "Joshi", "Kapoor", "Kumar", "Menon",
+    "Mishra", "Nair", "Patel", "Pillai", "Rao", "Reddy", "Shah", "Sharma", "Singh", "Verma",
+]
+COMPANIES = ["Infosys", "Wipro", "Tata Motors", "HDFC Bank", "Reliance Retail", "L&T", "Zoho", "Apollo Hospitals"]
+
+
+def phone(rng):
+    return str(rng.randint(6_000_000_000, 9_999_999_999))
+
+
+def client(number, rng=random, **overrides):
+    """ An unsaved ``Client`` (and ``client.profile``); ``number`` keeps the unique columns unique. """
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    fields = dict(
+        name=f"{first} {last}",
+        contact_number=f"{7_000_000_000 + number}",
+        alternative_number=phone(rng) if rng.random() < 0.3 else None,
+        father_name=f"{rng.choice(FIRST_NAMES)} {last}",
+        mother_name=f"{rng.choice(FIRST_NAMES)} {last}",
+        qualifications=rng.choice(["B.Com", "B.Tech", "BA", "MBA", "12th"]),
+        married_status=rng.random() < 0.5,
+        current_address=f"{rng.randint(1, 999)}, Main Road, Bengaluru",
+        landmark="Near bus stand",
+        years_at_address=rng.randint(0, 20),
+        gmail=f"{first.lower()}.{last.lower()}{number}@example.com",
+        office_name=rng.choice(COMPANIES),
+        office_address="Whitefield, Bengaluru",
+        designation=rng.choice(["Engineer", "Clerk", "Manager", "Analyst"]),
+        department=rng.choice(["Accounts", "IT", "Sales", "Operations"]),
+        current_experience=rng.randint(0, 10),
+        overall_experience=rng.randint(0, 25),
+        reference_name_1=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        reference_number_1=phone(rng),
+        reference_name_2=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        reference_number_2=phone(rng),
+        expected_loan_amount=Decimal(rng.randrange(50_000, 2_500_000, 500)),
+        loan_purpose=rng.choice(["Home renovation", "Education", "Medical", "Vehicle", "Wedding"]),
+    )
+    fields.update(overrides)
+    return Client(**fields)
+
+
+def user(number, role="employee", password="!"):
+    """
+    An unsaved ``User``. ``password`` is stored as given, so pass one
+    ``make_password()`` hash for a whole batch ("!" means no login).
+    """
+    return User(
+        username=f"{role}{number}",
+        email=f"{role}{number}@example.com",
+        phone_number=f"{5_000_000_000 + number}",
+        dob=date(1975, 1, 1) + timedelta(days=number % 9000),
+        role=role,
+        password=password,
+    )
+
+
+DOCUMENTS = {
+    "aadhaar_front": (214, 196, 160),
+    "aadhaar_back": (200, 184, 150),
+    "cibil_report": (240, 240, 240),
+    "pan_card": (176, 200, 228),
+    "gas_bill": (236, 220, 200),
+}
+
+
+def store_documents():
+    """
+    Store one small JPEG per document field in the ``documents`` storage and
+    return ``{field: stored name}``. Content addressing keeps a single copy
+    however many synthetic clients point at them.
+    """
+    names = {}
+    for field, colour in DOCUMENTS.items():
+        buffer = io.BytesIO()
+        Image.new("RGB", (640, 400), colour).save(buffer, format="JPEG", quality=85)
+        names[field] = document_storage().save(f"{field}.jpg", ContentFile(buffer.getvalue()))
+    return names
+
+
+def details(client, rng=random, documents=None):
+    """
+    Unsaved ``EmployeeClientDetails`` for a saved ``client``, filled by its
+    employee, with the stored ``documents`` (``store_documents()``) if given.
+    """
+    return EmployeeClientDetails(
+        client=client,
+        cibil_score=rng.randint(300, 900),
+        reference_number_1=client.reference_number_1,
+        reference_number_2=client.reference_number_2,
+        filled_by_id=client.assigned_employee_id,
+        **(documents or {}),
+    )
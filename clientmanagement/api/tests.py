@@ -1,3 +1,1591 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, router, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework import serializers, test
+from rest_framework.renderers import JSONRenderer
+
+from . import (
+    approvals, archive, assignment, authentication, compiled, documents, exporting, importing, jobs, metrics,
+    routers, stats, synthetic,
+)
+from .models import (
+    ApprovalHistory, ArchivedClient, Client, ClientDailyStat, ClientProfile, DocumentBlob, DuplicateFlag,
+    EmployeeClientDetails, Job, User,
+)
+from .fieldsets import ClientFieldset
+from .renderers import FastJSONRenderer
+from .serializers import ClientSerializer, ClientSummarySerializer, UserSerializer
+from .storage import document_storage
+from .views import ClientApplicationView, get_tokens_for_user
+
+
+class APITestCase(test.APITestCase):
+    # With DB_REPLICAS set, list / search reads go to the replica aliases. They are test
+    # mirrors of default and share its connection, so they see each test's transaction.
+    databases = {"default", *routers.replica_aliases()}
+
+    @classmethod
+    def setUpClass(cls):
+        cls._replica_connections = {alias: connections[alias] for alias in routers.replica_aliases()}
+        for alias in cls._replica_connections:
+            connections[alias] = connections["default"]
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias, replica in cls._replica_connections.items():
+            connections[alias] = replica
+
+
+def make_client(number, **kwargs):
+    fields = dict(
+        name=f"Client {number}", contact_number=f"90000{number:05d}", gmail=f"client{number}@example.com",
+        father_name="Father", mother_name="Mother", qualifications="B.Com", current_address="Address",
+        landmark="Landmark", years_at_address=3, office_name="Office", office_address="Office address",
+        designation="Clerk", department="Accounts", current_experience=2, overall_experience=5,
+        reference_name_1="Ref One", reference_number_1="9111111111",
+        reference_name_2="Ref Two", reference_number_2="9222222222",
+        expected_loan_amount="150000.00", loan_purpose="Home renovation",
+    )
+    fields.update(kwargs)
+    return Client.objects.create(**fields)
+
+
+# ✅ Every list request must cost the same number of queries whatever the page size
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class ClientListQueryCountTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        for number in range(30):
+            client = make_client(number, assigned_employee=cls.employee)
+            if number % 2:
+                EmployeeClientDetails.objects.create(
+                    client=client, cibil_score=700, reference_number_1="1", reference_number_2="2",
+                    filled_by=cls.employee,
+                )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries)
+
+    def assertConstantQueries(self, url, expected):
+        separator = "&" if "?" in url else "?"
+        counts = {size: self.count_queries(f"{url}{separator}page_size={size}") for size in (1, 5, 25)}
+        self.assertEqual(set(counts.values()), {expected}, counts)
+
+    def test_client_list_summary(self):
+        self.client.force_authenticate(self.manager)
+        self.assertConstantQueries("/manage/clients/", 1)
+
+    def test_client_list_full_with_nested_details(self):
+        self.client.force_authenticate(self.manager)
+        self.assertConstantQueries("/manage/clients/?view=full", 1)
+
+    def test_client_list_sparse_nested_fields(self):
+        self.client.force_authenticate(self.manager)
+        self.assertConstantQueries("/manage/clients/?fields=name,assigned_employee_detail,extra_details", 1)
+
+    def test_employee_client_list(self):
+        self.client.force_authenticate(self.employee)
+        self.assertConstantQueries("/manage/employee/clients/?view=full", 1)
+
+    def test_client_detail(self):
+        self.client.force_authenticate(self.manager)
+        client = Client.objects.filter(extra_details__isnull=False).first()
+        self.assertEqual(self.count_queries(f"/manage/clients/{client.pk}/manager-update/"), 1)
+
+    def test_details_detail(self):
+        self.client.force_authenticate(self.manager)
+        details = EmployeeClientDetails.objects.first()
+        self.assertEqual(self.count_queries(f"/manage/clients/{details.pk}/details-update/"), 1)
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class ClientFieldsetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        for number in range(3):
+            make_client(number, assigned_employee=cls.employee)
+
+    def setUp(self):
+        self.client.force_authenticate(self.manager)
+
+    def selected(self, query):
+        """ The client columns a list query selects. """
+        select = query.split(" FROM ")[0]
+        return {
+            field.name for field in Client._meta.concrete_fields
+            if re.search(rf"[`\"]api_client[`\"]\.[`\"]{field.column}[`\"]", select)
+        }
+
+    def fetch(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/manage/clients/?{query}")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(queries), 1)
+        return response.json()["results"], self.selected(queries[0]["sql"])
+
+    def test_fields_narrow_the_response_and_the_columns(self):
+        for compiled_serializers in (True, False):
+            with self.subTest(compiled=compiled_serializers), \
+                    override_settings(API_COMPILED_SERIALIZERS=compiled_serializers):
+                results, columns = self.fetch("fields=name,approval_status")
+                self.assertEqual({tuple(client) for client in results}, {("name", "approval_status")})
+                self.assertEqual(columns, {"id", "created_at", "name", "approval_status"})
+
+    def test_views_pick_the_serializer_and_its_columns(self):
+        results, columns = self.fetch("view=summary")
+        self.assertEqual(list(results[0]), ClientSummarySerializer.Meta.fields)
+        self.assertEqual(columns, set(ClientSummarySerializer.Meta.fields))
+        summary = columns
+
+        results, columns = self.fetch("view=full")
+        self.assertEqual(list(results[0]), list(ClientSerializer().fields))
+        self.assertEqual(columns - summary, {"gmail", "alternative_number"})
+
+    def test_only_keeps_the_requested_columns(self):
+        fieldset = ClientFieldset({"fields": "name,assigned_employee_detail"})
+        queryset = fieldset.apply(Client.objects.all(), "id")
+        only, defer = queryset.query.deferred_loading
+        self.assertFalse(defer)
+        self.assertEqual(set(only), {
+            "id", "name", "assigned_employee", "assigned_employee__id", "assigned_employee__username",
+            "assigned_employee__email",
+        })
+
+    def test_unknown_fields_and_views_are_rejected(self):
+        response = self.client.get("/manage/clients/?fields=name,password,salary")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"fields": "Unknown fields: password, salary"})
+        self.assertEqual(self.client.get("/manage/clients/?view=everything").status_code, 400)
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class ClientCursorPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        statuses = ["pending", "approved", "pending", "rejected"]
+        for number in range(12):
+            make_client(number, approval_status=statuses[number % 4],
+                        client_type="employee_registered" if number % 3 else "direct")
+        # Two timestamps shared by six clients each: only the id can order clients within a tie
+        earlier, later = timezone.now() - timedelta(days=1), timezone.now()
+        Client.objects.filter(id__in=list(Client.objects.order_by("id").values_list("id", flat=True)[:6])).update(
+            created_at=later
+        )
+        Client.objects.exclude(created_at=later).update(created_at=earlier)
+
+    def setUp(self):
+        self.client.force_authenticate(self.manager)
+
+    def walk(self, url):
+        """ The ids of every page following the ``next`` links, and the number of pages. """
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            ids += [client["id"] for client in response.json()["results"]]
+            url, pages = response.json()["next"], pages + 1
+        return ids, pages
+
+    def expected(self, queryset):
+        return list(queryset.order_by("-created_at", "-id").values_list("id", flat=True))
+
+    def test_pages_are_stable_when_created_at_ties(self):
+        ids, pages = self.walk("/manage/clients/?page_size=5")
+        self.assertEqual(ids, self.expected(Client.objects.all()))
+        self.assertEqual(pages, 3)
+
+    def test_filters_apply_on_every_page(self):
+        ids, _ = self.walk("/manage/clients/?approval_status=pending&client_type=employee_registered&page_size=1")
+        matching = Client.objects.filter(approval_status="pending", client_type="employee_registered")
+        self.assertEqual(ids, self.expected(matching))
+        self.assertEqual(len(ids), 4)
+
+    def test_malformed_cursors_are_not_found(self):
+        def cursor(values):
+            return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+        for value in ("!!!", "é", cursor("text"), cursor([1]), cursor(["yesterday", 1]),
+                      cursor([timezone.now().isoformat(), "x"]), cursor([None, None])):
+            with self.subTest(cursor=value):
+                self.assertEqual(self.client.get("/manage/clients/", {"cursor": value}).status_code, 404)
+
+
+class AssignmentTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.busy, cls.light, cls.idle, cls.inactive = (
+            User.objects.create_user(name, f"{name}@example.com", f"900000000{number}", "1990-01-01", "employee", "pw")
+            for number, name in enumerate(["busy", "light", "idle", "inactive"], 1)
+        )
+        User.objects.filter(pk=cls.inactive.pk).update(is_active=False)
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000005", "1985-01-01", "manager", "pw")
+        cls.busy_clients = [make_client(number, assigned_employee=cls.busy) for number in range(2)]
+        cls.light_client = make_client(2, assigned_employee=cls.light)
+
+    def counts(self):
+        return dict(User.objects.filter(role="employee").values_list("username", "open_client_count"))
+
+    def pick(self):
+        with transaction.atomic():
+            return assignment.pick_employee()
+
+    def test_picks_the_least_loaded_active_employee(self):
+        self.assertEqual(self.counts(), {"busy": 2, "light": 1, "idle": 0, "inactive": 0})
+        self.assertEqual(self.pick(), self.idle)
+        make_client(3, assigned_employee=self.idle)
+        self.assertEqual(self.pick(), self.light)  # tied with idle at 1: lowest id first
+        make_client(4, assigned_employee=self.light)
+        self.assertEqual(self.pick(), self.idle)
+        self.assertEqual(self.counts(), {"busy": 2, "light": 2, "idle": 1, "inactive": 0})
+
+    def test_applications_go_to_the_least_loaded_employee(self):
+        applicant = synthetic.client(500)
+        data = {field: getattr(applicant, field) for field in ClientApplicationView.required_fields}
+        response = self.client.post("/manage/client/apply/", data, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()["assigned_employee"], self.idle.email)
+        self.assertEqual(self.counts()["idle"], 1)
+
+    def test_waits_for_a_locked_employee_when_all_are_locked(self):
+        candidates = assignment.candidate_employees
+        with mock.patch.object(assignment, "candidate_employees", side_effect=[User.objects.none(), candidates()]), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.pick(), self.idle)
+        if connection.features.has_select_for_update_skip_locked:
+            self.assertIn("SKIP LOCKED", queries[0]["sql"])
+            self.assertNotIn("SKIP LOCKED", queries[-1]["sql"])
+
+    def test_counters_follow_decisions_and_deletes(self):
+        first, second = self.busy_clients
+        first.approval_status = "approved"
+        first.save()
+        self.assertEqual(self.counts(), {"busy": 1, "light": 1, "idle": 0, "inactive": 0})
+
+        approvals.submit(self.light_client, self.light)
+        approvals.decide([self.light_client.pk], "reject", self.manager)
+        self.assertEqual(self.counts(), {"busy": 1, "light": 0, "idle": 0, "inactive": 0})
+
+        second.assigned_employee = self.idle
+        second.save()
+        self.assertEqual(self.counts(), {"busy": 0, "light": 0, "idle": 1, "inactive": 0})
+        first.approval_status = "pending"
+        first.save()
+        second.delete()
+        self.assertEqual(self.counts(), {"busy": 1, "light": 0, "idle": 0, "inactive": 0})
+
+        User.objects.update(open_client_count=7)
+        assignment.rebuild_open_counts()
+        self.assertEqual(self.counts(), {"busy": 1, "light": 0, "idle": 0, "inactive": 0})
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class ApprovalTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        cls.queued = [make_client(number, assigned_employee=cls.employee) for number in range(4)]
+        for client in cls.queued:
+            approvals.submit(client, cls.employee)
+        cls.approved = make_client(4, assigned_employee=cls.employee, approval_status="approved")
+        cls.unsubmitted = make_client(5, assigned_employee=cls.employee)
+
+    def setUp(self):
+        self.client.force_authenticate(self.manager)
+
+    def decide(self, ids, action, note=""):
+        response = self.client.post("/manage/approvals/batch/", {"ids": ids, "action": action, "note": note}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def statuses(self):
+        return dict(Client.objects.values_list("pk", "approval_status"))
+
+    def test_queue_lists_submitted_clients_oldest_first(self):
+        ids = [client["id"] for client in self.client.get("/manage/approvals/pending/").json()["results"]]
+        self.assertEqual(ids, [client.pk for client in self.queued])
+        self.decide([self.queued[0].pk], "approve")
+        ids = [client["id"] for client in self.client.get("/manage/approvals/pending/").json()["results"]]
+        self.assertEqual(ids, [client.pk for client in self.queued[1:]])
+
+    def test_batch_approve_is_one_update(self):
+        first, second = self.queued[0].pk, self.queued[1].pk
+        with CaptureQueriesContext(connection) as queries:
+            result = self.decide([first, second, self.approved.pk, self.unsubmitted.pk, 999999], "approve", "ok")
+        self.assertEqual(result, {
+            "status": "approved", "processed": [first, second],
+            "skipped": [self.approved.pk, self.unsubmitted.pk, 999999],
+        })
+        updates = [query["sql"] for query in queries if re.match(r"UPDATE [`\"]api_client[`\"] ", query["sql"])]
+        self.assertEqual(len(updates), 1, updates)
+        self.assertEqual(self.statuses()[first], "approved")
+        self.assertEqual(self.statuses()[self.unsubmitted.pk], "pending")
+
+        history = ApprovalHistory.objects.filter(client_id=first).order_by("id")
+        self.assertEqual(
+            [(row.action, row.from_status, row.to_status, row.actor_id) for row in history],
+            [("submitted", "pending", "pending", self.employee.pk), ("approved", "pending", "approved", self.manager.pk)],
+        )
+        self.assertEqual(history.last().note, "ok")
+        trail = self.client.get(f"/manage/approvals/history/{first}/").json()
+        self.assertEqual([row["action"] for row in trail], ["submitted", "approved"])
+
+    def test_batch_reject_skips_decided_clients(self):
+        first, second, third = (client.pk for client in self.queued[:3])
+        self.decide([first], "approve")
+        result = self.decide([first, second, third], "reject")
+        self.assertEqual((result["status"], result["processed"], result["skipped"]), ("rejected", [second, third], [first]))
+        statuses = self.statuses()
+        self.assertEqual([statuses[first], statuses[second], statuses[third]], ["approved", "rejected", "rejected"])
+        self.assertFalse(ApprovalHistory.objects.filter(client_id=first, action="rejected").exists())
+        self.assertEqual(ApprovalHistory.objects.filter(action="rejected").count(), 2)
+
+    def test_clients_locked_by_another_batch_are_skipped(self):
+        locked, free = self.queued[0].pk, self.queued[1].pk
+        # Another manager's batch holds the lock on ``locked``: SKIP LOCKED leaves it out of the SELECT
+        queue = approvals.pending_queue().exclude(pk=locked)
+        with mock.patch.object(approvals, "pending_queue", return_value=queue), \
+                CaptureQueriesContext(connection) as queries:
+            processed, skipped = approvals.decide([locked, free], "reject", self.manager)
+        self.assertEqual((processed, skipped), ([free], [locked]))
+        self.assertEqual(self.statuses()[locked], "pending")
+        self.assertFalse(ApprovalHistory.objects.filter(client_id=locked).exclude(action="submitted").exists())
+        if connection.features.has_select_for_update_skip_locked:
+            self.assertIn("SKIP LOCKED", queries[0]["sql"])
+
+
+class ClientImportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        cls.existing = make_client(0, assigned_employee=cls.employee)
+
+    def row(self, number, **overrides):
+        applicant = synthetic.client(number, **overrides)
+        return {field: getattr(applicant, field) for field in ClientApplicationView.required_fields}
+
+    def csv_file(self, rows):
+        output = StringIO()
+        writer = csv.DictWriter(output, fieldnames=ClientApplicationView.required_fields)
+        writer.writeheader()
+        writer.writerows(rows)
+        upload = BytesIO(output.getvalue().encode())
+        upload.name = "clients.csv"
+        return upload
+
+    def test_bad_rows_and_duplicates_are_reported_and_skipped(self):
+        first = self.row(1)
+        rows = [
+            first,
+            self.row(2, expected_loan_amount="lots"),
+            self.row(3, contact_number=self.existing.contact_number),  # already a client
+            self.row(4),
+            self.row(5, gmail=first["gmail"]),  # repeats row 1
+        ]
+        self.client.force_authenticate(self.manager)
+        report = self.client.post("/manage/clients/import/", {"file": self.csv_file(rows)}, format="multipart").json()
+
+        self.assertEqual({key: report[key] for key in ("total_rows", "created", "failed")},
+                         {"total_rows": 5, "created": 2, "failed": 3})
+        self.assertEqual([(error["row"], sorted(error["errors"])) for error in report["errors"]],
+                         [(2, ["expected_loan_amount"]), (3, ["contact_number"]), (5, ["gmail"])])
+        imported = Client.objects.exclude(pk=self.existing.pk)
+        self.assertEqual(sorted(imported.values_list("contact_number", flat=True)),
+                         [first["contact_number"], rows[3]["contact_number"]])
+        self.assertEqual(set(imported.values_list("client_type", "assigned_employee")), {("direct", self.employee.pk)})
+        self.assertEqual(User.objects.get(pk=self.employee.pk).open_client_count, 3)
+
+    def test_employees_import_their_own_clients(self):
+        self.client.force_authenticate(self.employee)
+        upload = BytesIO(("\n".join(json.dumps(self.row(number), default=str) for number in (1, 2)) + "\n{oops\n").encode())
+        upload.name = "clients.jsonl"
+        report = self.client.post("/manage/clients/import/", {"file": upload}, format="multipart").json()
+        self.assertEqual((report["created"], report["failed"], report["errors"][0]["row"]), (2, 1, 3))
+        self.assertEqual(Client.objects.filter(client_type="employee_registered", assigned_employee=self.employee).count(), 2)
+
+    def test_chunk_falls_back_to_row_by_row_after_a_conflict(self):
+        # A concurrent insert takes a contact number between the duplicate check and the bulk insert
+        rows = [(1, self.row(1)), (2, self.row(2, contact_number=self.existing.contact_number)), (3, self.row(3))]
+        with mock.patch.object(importing.ClientImporter, "drop_duplicates", lambda importer, valid: valid):
+            report = importing.ClientImporter(chunk_size=10).run(rows)
+        self.assertEqual((report["created"], report["failed"], report["errors"][0]["row"]), (2, 1, 2))
+        self.assertEqual(Client.objects.count(), 3)
+        self.assertEqual(ClientProfile.objects.count(), 3)
+
+
+class ClientExportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        cls.other = User.objects.create_user("emp2", "emp2@example.com", "9000000003", "1991-01-01", "employee", "pw")
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        cls.exported = [make_client(number, assigned_employee=cls.employee, approval_status="approved")
+                        for number in range(3)]
+        make_client(3, assigned_employee=cls.employee)
+        make_client(4, assigned_employee=cls.other, approval_status="approved")
+        EmployeeClientDetails.objects.create(
+            client=cls.exported[1], cibil_score=742, reference_number_1="9111111111", reference_number_2="9222222222",
+            filled_by=cls.employee,
+        )
+
+    def test_filtered_csv_export(self):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get(
+            f"/manage/clients/export/csv/?approval_status=approved&assigned_employee={self.employee.pk}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="clients-', response["Content-Disposition"])
+        header, *rows = list(csv.reader(StringIO(b"".join(response.streaming_content).decode())))
+
+        self.assertEqual(header, exporting.HEADER)
+        self.assertEqual(header[:3], ["id", "name", "contact_number"])
+        self.assertIn("details_cibil_score", header)
+        rows = [dict(zip(header, row)) for row in rows]
+        self.assertEqual([int(row["id"]) for row in rows], [client.pk for client in self.exported])
+        first, with_details = rows[0], rows[1]
+        self.assertEqual(
+            [first[column] for column in ("name", "contact_number", "father_name", "expected_loan_amount",
+                                          "approval_status", "assigned_employee_username", "details_cibil_score")],
+            ["Client 0", "9000000000", "Father", "150000.00", "approved", "emp", ""],
+        )
+        self.assertEqual((with_details["details_cibil_score"], with_details["details_filled_by_id"]),
+                         ("742", str(self.employee.pk)))
+
+        # Batched reads give the same rows
+        queryset = Client.objects.filter(approval_status="approved", assigned_employee=self.employee)
+        batched = list(exporting.iter_rows(queryset, batch_size=2))
+        self.assertEqual([row[0] for row in batched[1:]], [client.pk for client in self.exported])
+
+    def test_command_writes_csv_to_stdout(self):
+        out = StringIO()
+        call_command("export_clients", approval_status="approved", stdout=out)
+        header, *rows = list(csv.reader(StringIO(out.getvalue())))
+        self.assertEqual(header, exporting.HEADER)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0][:2], [str(self.exported[0].pk), "Client 0"])
+
+
+class LoginTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+
+    def setUp(self):
+        cache.clear()  # throttle history
+
+    def login(self, **overrides):
+        data = dict(email="emp@example.com", phone_number="9000000001", dob="1990-01-01", role="employee", password="pw")
+        data.update(overrides)
+        return self.client.post("/manage/login/", data, format="json")
+
+    def test_login(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertIn("access", response.data["tokens"])
+
+    def test_attributes_must_match(self):
+        for overrides in ({"phone_number": "9999999999"}, {"dob": "1991-01-01"}, {"role": "manager"}, {"password": "x"}):
+            self.assertEqual(self.login(**overrides).status_code, 401, overrides)
+        self.assertEqual(self.login(email="nobody@example.com").status_code, 401)
+
+    def test_rehash_when_preferred_hasher_changes(self):
+        with override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher",
+                                                 "api.hashers.TunedPBKDF2PasswordHasher"]):
+            self.assertEqual(self.login().status_code, 200)
+        self.employee.refresh_from_db()
+        self.assertTrue(self.employee.password.startswith("md5$"))
+
+    def test_account_throttle(self):
+        statuses = [self.login(password="wrong").status_code for _ in range(11)]
+        self.assertEqual(statuses[-1], 429)
+        self.assertNotIn(429, statuses[:-1])
+
+    def test_ip_throttle_ignores_spoofed_forwarded_for(self):
+        statuses = [self.client.post("/manage/login/", {"email": f"guess{i}@example.com", "password": "x"},
+                                     format="json", HTTP_X_FORWARDED_FOR=f"10.0.0.{i}").status_code
+                    for i in range(31)]
+        self.assertEqual(statuses[-1], 429)
+        self.assertNotIn(429, statuses[:-1])
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class CachedJWTAuthenticationTests(APITestCase):
+    url = "/manage/employee/clients/"
+
+    def setUp(self):
+        authentication.user_cache.clear()
+        self.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        self.headers = {"Authorization": f"Bearer {get_tokens_for_user(self.employee)['access']}"}
+
+    def get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, headers=self.headers)
+        return response.status_code, len(queries)
+
+    def cached(self):
+        return authentication.user_cache.get(str(self.employee.pk)) is not None
+
+    def test_user_row_is_cached(self):
+        status_code, queries = self.get()
+        self.assertEqual(status_code, 200)
+        self.assertTrue(self.cached())
+        self.assertEqual(self.get(), (200, queries - 1))
+
+    def test_saving_or_deleting_a_user_evicts_it(self):
+        self.get()
+        self.employee.save()
+        self.assertFalse(self.cached())
+        self.get()
+        self.employee.delete()
+        self.assertFalse(self.cached())
+        self.assertEqual(self.get()[0], 401)
+
+    def test_role_change_and_deactivation_apply_on_the_next_request(self):
+        self.get()
+        self.employee.role = "manager"
+        self.employee.save()
+        self.assertEqual(self.get()[0], 401)
+
+        self.employee.role, self.employee.is_active = "employee", False
+        self.employee.save()
+        self.assertEqual(self.get()[0], 401)
+
+    def test_ttl_bounds_changes_made_without_signals(self):
+        self.get()
+        User.objects.filter(pk=self.employee.pk).update(is_active=False)
+        self.assertEqual(self.get()[0], 200)  # cached until the entry expires
+
+        authentication.user_cache.clear()
+        with mock.patch.object(authentication.user_cache, "ttl", 0):
+            User.objects.filter(pk=self.employee.pk).update(is_active=True)
+            self.assertEqual(self.get()[0], 200)
+            User.objects.filter(pk=self.employee.pk).update(is_active=False)
+            self.assertEqual(self.get()[0], 401)
+
+
+class ResponseCacheTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        cls.other = User.objects.create_user("emp2", "emp2@example.com", "9000000003", "1990-01-01", "employee", "pw")
+        cls.clients = [make_client(number, assigned_employee=cls.employee, client_type="employee_registered")
+                       for number in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.employee)
+
+    def get(self, url, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, headers=headers)
+        return response, len(queries)
+
+    def test_repeat_request_is_served_from_cache(self):
+        first, _ = self.get("/manage/employee/clients/")
+        second, queries = self.get("/manage/employee/clients/")
+        self.assertEqual(queries, 0)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_if_none_match_returns_304(self):
+        first, _ = self.get("/manage/employee/clients/")
+        response, queries = self.get("/manage/employee/clients/", **{"If-None-Match": first["ETag"]})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(queries, 0)
+
+    def test_write_invalidates(self):
+        first, _ = self.get("/manage/employee/clients/?view=full")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/manage/clients/{self.clients[0].pk}/update/", {"name": "Renamed"})
+        self.assertEqual(response.status_code, 200, response.content)
+        response, _ = self.get("/manage/employee/clients/?view=full", **{"If-None-Match": first["ETag"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Renamed", [client["name"] for client in response.json()["results"]])
+
+    def test_keys_are_per_user(self):
+        self.get("/manage/employee/clients/")
+        self.client.force_authenticate(self.other)
+        response, _ = self.get("/manage/employee/clients/")
+        self.assertEqual(response.json()["results"], [])
+
+    def test_params_are_part_of_the_key(self):
+        first, _ = self.get("/manage/employee/clients/?page_size=1")
+        second, _ = self.get("/manage/employee/clients/?page_size=2")
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertEqual(len(second.json()["results"]), 2)
+
+
+class ClientSearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        cls.ramesh = make_client(1, name="Ramesh Kumar", contact_number="+91 98765-43210", office_name="Infosys")
+        cls.rajesh = make_client(2, name="Rajesh Kumar", gmail="rajesh.k@example.com", reference_number_1="9123456789")
+        cls.other = make_client(3, name="Priya Sharma")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.manager)
+
+    def search(self, query):
+        response = self.client.get("/manage/clients/search/", {"q": query})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [result["id"] for result in response.json()["results"]]
+
+    def test_partial_words(self):
+        self.assertEqual(self.search("rame"), [self.ramesh.pk])
+        self.assertEqual(set(self.search("kumar")), {self.ramesh.pk, self.rajesh.pk})
+        self.assertEqual(self.search("kum infos"), [self.ramesh.pk])
+
+    def test_phone_numbers_are_normalized(self):
+        for query in ("9876543210", "+91 98765 43210", "098765-43210", "43210"):
+            self.assertEqual(self.search(query), [self.ramesh.pk], query)
+        self.assertEqual(self.search("9123456789"), [self.rajesh.pk])
+
+    def test_email(self):
+        self.assertEqual(self.search("rajesh.k@example.com"), [self.rajesh.pk])
+
+    def test_ranking_prefers_whole_words(self):
+        exact = make_client(4, name="Raj Malhotra")
+        results = self.search("raj")
+        self.assertEqual(results[0], exact.pk)
+        self.assertEqual(set(results), {exact.pk, self.rajesh.pk})
+
+    def test_index_follows_updates(self):
+        self.other.name = "Priya Iyer"
+        self.other.save()
+        self.assertEqual(self.search("iyer"), [self.other.pk])
+        self.assertEqual(self.search("sharma"), [])
+
+    def test_index_follows_profile_updates(self):
+        response = self.client.patch(f"/manage/clients/{self.ramesh.pk}/manager-update/", {"office_name": "Wipro"})
+        self.assertEqual(response.status_code, 200, response.content)
+        cache.clear()
+        self.assertEqual(self.search("wipro"), [self.ramesh.pk])
+        self.assertEqual(self.search("infosys"), [])
+
+
+def applicant(number, **kwargs):
+    """ A client sharing nothing with the others unless told to. """
+    kwargs.setdefault("reference_number_1", f"81{number:08d}")
+    kwargs.setdefault("reference_number_2", f"82{number:08d}")
+    kwargs.setdefault("mother_name", f"Mother {number}")
+    return make_client(number, **kwargs)
+
+
+class DuplicateDetectionTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        cls.original = make_client(
+            1, name="Ramesh Kumar", father_name="Suresh Kumar", contact_number="9876543210",
+            gmail="ramesh.kumar@gmail.com", reference_number_1="9111111111", reference_number_2="9222222222",
+        )
+
+    def flags(self, client):
+        return list(DuplicateFlag.objects.filter(client=client).values_list("duplicate_of_id", "reasons"))
+
+    def test_reapplication_with_new_phone_and_email(self):
+        client = applicant(2, name="Kumar Ramesh", father_name="Suresh  Kumar")
+        self.assertEqual(self.flags(client), [(self.original.pk, ["name_father"])])
+
+    def test_same_number_in_another_format(self):
+        client = applicant(3, name="R. K.", father_name="X", alternative_number="+91 98765-43210")
+        self.assertEqual(self.flags(client), [(self.original.pk, ["phone"])])
+
+    def test_gmail_variant(self):
+        client = applicant(4, name="R", father_name="X", gmail="Rameshkumar+loans@googlemail.com")
+        self.assertEqual(self.flags(client), [])  # email alone scores below the threshold
+        client = applicant(
+            5, name="S", father_name="Y", gmail="rameshkumar+loans@googlemail.com",
+            reference_number_1="9222222222", reference_number_2="9111111111",
+        )
+        self.assertEqual(self.flags(client), [(self.original.pk, ["email", "reference", "references"])])
+
+    def test_unrelated_client_is_not_flagged(self):
+        self.assertEqual(self.flags(applicant(6, name="Priya Sharma", father_name="Anil Sharma")), [])
+
+    def test_manager_reviews_flags(self):
+        client = applicant(7, name="Ramesh Kumar", father_name="Suresh Kumar")
+        self.client.force_authenticate(self.manager)
+        response = self.client.get("/manage/clients/duplicates/")
+        self.assertEqual(response.status_code, 200, response.content)
+        [flag] = response.json()["results"]
+        self.assertEqual((flag["client"], flag["duplicate_of_detail"]["id"]), (client.pk, self.original.pk))
+
+        response = self.client.patch(f"/manage/clients/duplicates/{flag['id']}/", {"status": "dismissed"})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["reviewed_by"]["id"], self.manager.pk)
+        self.assertEqual(self.client.get("/manage/clients/duplicates/").json()["results"], [])
+
+
+class DailyStatsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+
+    def test_deltas_to_the_same_bucket_share_one_row(self):
+        today = timezone.localdate()
+        for employee_id in (self.employee.pk, None):
+            key = (today, "pending", "direct", employee_id)
+            stats.apply_deltas({key: [1, Decimal("100.00")]})
+            stats.apply_deltas({key: [1, Decimal("100.00")]})
+            row = ClientDailyStat.objects.get(day=today, employee_id=employee_id)
+            self.assertEqual((row.client_count, row.loan_amount_total), (2, Decimal("200.00")))
+        self.assertEqual(ClientDailyStat.objects.count(), 2)
+
+    def test_bucket_key_is_unique(self):
+        key = dict(day=timezone.localdate(), approval_status="pending", client_type="direct", employee=None)
+        ClientDailyStat.objects.create(**key)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ClientDailyStat.objects.create(**key)
+
+
+class AsyncViewTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        for number in range(3):
+            make_client(number, assigned_employee=cls.employee)
+
+    def setUp(self):
+        cache.clear()
+
+    def authorize(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(user)['access']}")
+
+    def test_apply_assigns_employee(self):
+        applicant = synthetic.client(500)
+        data = {field: getattr(applicant, field) for field in ClientApplicationView.required_fields}
+        response = self.client.post("/manage/async/client/apply/", data, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        client = Client.objects.get(pk=response.json()["client"]["id"])
+        self.assertEqual((client.client_type, client.assigned_employee), ("direct", self.employee))
+
+    async def test_apply_through_the_asgi_stack(self):
+        applicant = synthetic.client(501)
+        data = {field: getattr(applicant, field) for field in ClientApplicationView.required_fields}
+        response = await self.async_client.post("/manage/async/client/apply/", data, content_type="application/json")
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_apply_validates(self):
+        response = self.client.post("/manage/async/client/apply/", {"name": "x"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_employee_clients_match_sync_view(self):
+        self.authorize(self.employee)
+        for params in ("", "?view=full", "?page_size=2"):
+            expected = self.client.get(f"/manage/employee/clients/{params}").json()
+            response = self.client.get(f"/manage/async/employee/clients/{params}").json()
+            self.assertEqual(response["results"], expected["results"])
+            self.assertEqual(response["next"] is None, expected["next"] is None)
+
+    def test_client_detail(self):
+        client = Client.objects.first()
+        self.authorize(self.manager)
+        expected = self.client.get(f"/manage/clients/{client.pk}/manager-update/").json()
+        self.assertEqual(self.client.get(f"/manage/async/clients/{client.pk}/").json(), expected)
+        self.client.credentials()
+        self.assertEqual(self.client.get(f"/manage/async/clients/{client.pk}/").status_code, 401)
+
+
+class ReadReplicaRouterTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+
+    def setUp(self):
+        cache.clear()
+        self.replicas = mock.patch.object(routers, "replica_aliases", return_value=["replica_1"])
+
+    def test_primary_without_replicas(self):
+        with mock.patch.object(routers, "replica_aliases", return_value=[]), routers.replica_reads():
+            self.assertEqual(router.db_for_read(Client), "default")
+        self.assertEqual(router.db_for_write(Client), "default")
+
+    def test_only_marked_reads_use_replica(self):
+        with self.replicas:
+            self.assertEqual(router.db_for_read(Client), "default")
+            with routers.replica_reads():
+                self.assertEqual(router.db_for_read(Client), "replica_1")
+                self.assertEqual(router.db_for_write(Client), "default")
+            self.assertEqual(router.db_for_read(Client), "default")
+
+    def test_recent_writer_reads_from_primary(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(self.employee)['access']}")
+        request = mock.Mock(user=self.employee)
+        with self.replicas:
+            self.assertEqual(routers.replica_alias(request), "replica_1")
+            data = {field: getattr(synthetic.client(1), field) for field in ClientApplicationView.required_fields}
+            response = self.client.post("/manage/employee/clients/", data, format="json")
+            self.assertEqual(response.status_code, 201, response.content)
+            self.assertEqual(routers.replica_alias(request), "default")
+
+    def test_replica_responses_are_not_cached_right_after_a_write(self):
+        manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        self.client.force_authenticate(manager)
+
+        def list_clients():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/manage/clients/")
+            self.assertEqual(response.status_code, 200)
+            return response, len(queries)
+
+        # The primary stands in for the replica, so the reads run on the test database
+        with mock.patch.object(routers, "replica_aliases", return_value=["default"]):
+            self.assertIn("ETag", list_clients()[0])
+            self.assertEqual(list_clients()[1], 0)  # cached
+
+            with self.captureOnCommitCallbacks(execute=True):  # bumps the version
+                make_client(0)
+            for _ in range(2):
+                response, queries = list_clients()
+                self.assertNotIn("ETag", response)
+                self.assertGreater(queries, 0)  # served by the (possibly lagging) replica each time
+
+            cache.delete(routers.DATA_WRITE_KEY)  # the lag window is over
+            self.assertIn("ETag", list_clients()[0])
+            self.assertEqual(list_clients()[1], 0)
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class MetricsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        for number in range(3):
+            make_client(number)
+
+    def setUp(self):
+        metrics.reset()
+        self.authorization = f"Bearer {get_tokens_for_user(self.manager)['access']}"
+        self.client.credentials(HTTP_AUTHORIZATION=self.authorization)
+
+    def sample(self, text, name, route):
+        line = next(line for line in text.splitlines() if line.startswith(f'{name}{{view="{route}",method="GET"}}'))
+        return float(line.rsplit(" ", 1)[1])
+
+    def test_metrics_per_route(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get("/manage/clients/?view=full").status_code, 200)
+        self.client.get("/manage/clients/1/manager-update/")
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        text = response.content.decode()
+
+        route = "manage/clients/"
+        self.assertEqual(self.sample(text, "api_request_duration_seconds_count", route), 2)
+        self.assertGreaterEqual(self.sample(text, "api_request_db_queries_sum", route), 2)
+        self.assertGreater(self.sample(text, "api_request_serializer_seconds_sum", route), 0)
+        self.assertGreater(self.sample(text, "api_response_size_bytes_sum", route), 0)
+        self.assertEqual(self.sample(text, "api_request_duration_seconds_count", "manage/clients/<int:pk>/manager-update/"), 1)
+        self.assertIn('api_request_db_queries_bucket{view="manage/clients/",method="GET",le="+Inf"} 2', text)
+        self.assertNotIn('view="metrics"', text)
+
+    async def test_async_views_count_queries_run_in_threads(self):
+        client = await Client.objects.afirst()
+        response = await self.async_client.get(f"/manage/async/clients/{client.pk}/",
+                                               headers={"Authorization": self.authorization})
+        self.assertEqual(response.status_code, 200)
+        route = "manage/async/clients/<int:pk>/"
+        self.assertGreaterEqual(self.sample(metrics.render(), "api_request_db_queries_sum", route), 2)
+        self.assertGreater(self.sample(metrics.render(), "api_request_db_seconds_sum", route), 0)
+
+    @override_settings(DEBUG=True)
+    def test_asgi_middleware_stack_stays_async(self):
+        with self.assertNoLogs("django.request", "DEBUG"):  # "Asynchronous handler adapted for middleware ..."
+            ASGIHandler().load_middleware(is_async=True)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_request_is_logged_with_queries(self):
+        with self.assertLogs("api.metrics", "WARNING") as logs:
+            self.client.get("/manage/clients/")
+        self.assertIn("Slow request: GET /manage/clients/ -> 200", logs.output[0])
+        self.assertIn('FROM "api_client"', logs.output[0])
+
+
+class BenchmarkSuiteTests(APITestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+    def test_every_endpoint_answers_as_expected(self):
+        out = StringIO()
+        call_command("seed_synthetic", clients=40, employees=2, managers=1, duplicates=0.2, stdout=out)
+        self.assertEqual(Client.objects.count(), 40)
+        self.assertTrue(EmployeeClientDetails.objects.exists())
+        oldest = Client.objects.order_by("created_at").first().created_at
+        self.assertLess(oldest, timezone.now() - timedelta(days=300))  # spread over --days of history
+        self.assertTrue(Client._meta.get_field("created_at").auto_now_add)
+
+        # Raises CommandError if any endpoint returns an unexpected status
+        call_command("bench_api", iterations=1, warmup=0, stdout=out)
+        benchmarked = {line.split("  ")[0] for line in out.getvalue().splitlines()}
+        self.assertTrue({"clients list", "login", "document upload chunk", "async client detail"} <= benchmarked)
+        self.assertEqual(Client.objects.count(), 40)  # writes were rolled back
+
+    def test_auth_benchmark_bypasses_the_response_cache(self):
+        out = StringIO()
+        call_command("bench_auth", requests=2, stdout=out)
+        reports = dict(line.strip().split(": ", 1) for line in out.getvalue().splitlines())
+        # The list query still runs on every request, for both authentication classes
+        for label in ("JWTAuthentication", "CachedJWTAuthentication"):
+            self.assertNotIn(" 0 queries/request", reports[label])
+        self.assertFalse(User.objects.filter(username="bench-auth").exists())
+
+
+class QueryIndexTests(APITestCase):
+    """
+    Each hot query below must keep using the index it was designed for.
+
+    The check reads the plan from ``QuerySet.explain()`` and looks for the
+    index name, so it fails when a query or an index changes in a way that
+    makes the database fall back to a scan or another index. The querysets
+    are built the way the views build them (filters, keyset ordering,
+    LIMIT). Run it on the engine you deploy on as well, e.g.
+    ``DB_ENGINE=mysql manage.py test api.tests.QueryIndexTests``; on
+    MySQL, ``client_unassigned_idx`` is not created (no partial indexes), so
+    that entry expects ``client_type_created_idx`` there.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        for number in range(20):
+            make_client(number, assigned_employee=cls.employee if number % 2 else None)
+
+    def queries(self):
+        from . import dedup, search
+        from .models import ApprovalHistory, ClientBlockingKey, ClientSearchTerm
+
+        newest_first = ("-created_at", "-id")
+        unassigned_index = "client_unassigned_idx" if connection.features.supports_partial_indexes else "client_type_created_idx"
+        return [
+            ("client list", "client_created_idx", Client.objects.order_by(*newest_first)[:21]),
+            ("client list by status", "client_status_created_idx",
+             Client.objects.filter(approval_status="approved").order_by(*newest_first)[:21]),
+            ("client list by type", "client_type_created_idx",
+             Client.objects.filter(client_type="employee_registered").order_by(*newest_first)[:21]),
+            ("employee's clients", "client_employee_created_idx",
+             Client.objects.filter(assigned_employee=self.employee).order_by(*newest_first)[:21]),
+            ("employee's clients by status", "client_employee_status_idx",
+             Client.objects.filter(assigned_employee=self.employee, approval_status="pending")
+             .order_by(*newest_first)[:21]),
+            ("unassigned direct clients", unassigned_index,
+             Client.objects.filter(client_type="direct", assigned_employee__isnull=True).order_by("created_at", "id")),
+            ("approval queue", "client_approval_queue_idx",
+             approvals.pending_queue().order_by("submitted_at", "id")[:21]),
+            ("least-loaded employee", "user_assignment_idx", assignment.candidate_employees()[:1]),
+            ("approval history", "approval_history_client_idx",
+             ApprovalHistory.objects.filter(client_id=1).order_by("created_at", "id")),
+            ("duplicate review queue", "duplicate_flag_status_idx",
+             DuplicateFlag.objects.filter(status="open").order_by("-created_at", "-id")[:21]),
+            ("search driver term", "client_search_term_idx",
+             ClientSearchTerm.objects.filter(term="ram").order_by("-client_id").values_list("client_id", flat=True)
+             .distinct()[search.MAX_CANDIDATES - 1:search.MAX_CANDIDATES]),
+            ("duplicate candidates", "client_blocking_key_idx",
+             ClientBlockingKey.objects.filter(key__in=["0" * 32]).order_by("-client_id")
+             .values_list("client_id", "key")[:dedup.MAX_MATCHES]),
+        ]
+
+    def test_queries_use_their_indexes(self):
+        for name, index, queryset in self.queries():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertIn(index, plan, f"{name} no longer uses {index}:\n{plan}")
+
+
+class CompactChoiceFieldTests(APITestCase):
+    def test_values_are_strings_and_storage_is_codes(self):
+        client = make_client(1, approval_status="approved", client_type="employee_registered")
+        client.refresh_from_db()
+        self.assertEqual((client.approval_status, client.client_type), ("approved", "employee_registered"))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT approval_status, client_type FROM api_client WHERE id = %s", [client.pk])
+            self.assertEqual(cursor.fetchone(), (2, 2))
+
+        Client.objects.filter(approval_status__in=["approved"]).update(approval_status="rejected")
+        self.assertEqual(list(Client.objects.values_list("approval_status", flat=True)), ["rejected"])
+        with self.assertRaises(ValueError):
+            Client.objects.filter(approval_status="unknown").exists()
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class ClientProfileTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        cls.clients = [make_client(number, assigned_employee=cls.employee) for number in range(3)]
+
+    def setUp(self):
+        self.client.force_authenticate(self.employee)
+
+    def sql(self, url):
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return " ".join(query["sql"] for query in queries)
+
+    def test_create_and_update_keep_the_flat_contract(self):
+        applicant = synthetic.client(500)
+        data = {field: getattr(applicant, field) for field in ClientApplicationView.required_fields}
+        response = self.client.post("/manage/employee/clients/", data, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(list(response.json()), list(ClientSerializer().fields))
+        profile = ClientProfile.objects.get(client_id=response.json()["id"])
+        self.assertEqual((profile.father_name, profile.loan_purpose), (applicant.father_name, applicant.loan_purpose))
+
+        response = self.client.patch(f"/manage/clients/{profile.client_id}/update/", {"loan_purpose": "Education"})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["loan_purpose"], "Education")
+        profile.refresh_from_db()
+        self.assertEqual(profile.loan_purpose, "Education")
+
+    def test_profile_is_joined_only_when_rendered(self):
+        self.assertNotIn("api_clientprofile", self.sql("/manage/employee/clients/"))
+        self.assertIn("api_clientprofile", self.sql("/manage/employee/clients/?view=full"))
+        self.assertNotIn("api_clientprofile", self.sql("/manage/employee/clients/?fields=name,gmail"))
+
+    def test_profile_loads_lazily(self):
+        client = Client.objects.get(pk=self.clients[0].pk)
+        with self.assertNumQueries(1):
+            self.assertEqual((client.father_name, client.office_name), ("Father", "Office"))
+
+
+@override_settings(JOBS_RUN_IN_PROCESS=False)
+class JobTests(APITestCase):
+    def setUp(self):
+        self.calls = []
+        patcher = mock.patch.dict(jobs.TASKS, {"tests.record": (self.record, 3)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, value):
+        self.calls.append(value)
+        if value == "fail":
+            raise RuntimeError("boom")
+
+    def test_idempotency_key(self):
+        jobs.enqueue("tests.record", {"value": "a"}, key="once")
+        jobs.enqueue("tests.record", {"value": "b"}, key="once")
+        jobs.enqueue("tests.record", {"value": "c"})
+        self.assertEqual(jobs.run_pending(), 2)
+        self.assertEqual(self.calls, ["a", "c"])
+        self.assertEqual(set(Job.objects.values_list("status", flat=True)), {"done"})
+
+    def test_retries_with_backoff_then_fails(self):
+        jobs.enqueue("tests.record", {"value": "fail"})
+        with self.assertLogs("api.jobs", "WARNING"):
+            self.assertEqual(jobs.run_pending(), 1)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), ("queued", 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertEqual(jobs.run_pending(), 0)  # not due yet
+
+        with self.assertLogs("api.jobs", "ERROR"):
+            for _ in range(2):
+                Job.objects.update(run_at=timezone.now())
+                jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 3))
+        self.assertIn("boom", job.last_error)
+
+    def test_expired_lease_is_claimed_again(self):
+        jobs.enqueue("tests.record", {"value": "a"})
+        self.assertIsNotNone(jobs.claim("crashed worker"))
+        self.assertEqual(jobs.run_pending(), 0)
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(Job.objects.get().attempts, 2)
+
+
+@override_settings(JOBS_RUN_IN_PROCESS=False)
+class NotificationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+
+    def test_application_is_confirmed_by_a_job(self):
+        applicant = synthetic.client(500)
+        data = {field: getattr(applicant, field) for field in ClientApplicationView.required_fields}
+        response = self.client.post("/manage/client/apply/", data, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(mail.outbox[0].to, [applicant.gmail])
+
+    def test_batch_decision_notifies_each_client(self):
+        clients = [make_client(number, submitted_at=timezone.now()) for number in range(2)]
+        self.client.force_authenticate(self.manager)
+        response = self.client.post(
+            "/manage/approvals/batch/", {"ids": [client.pk for client in clients], "action": "approve"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(jobs.run_pending(), 2)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), sorted(c.gmail for c in clients))
+        self.assertIn("approved", mail.outbox[0].subject)
+
+
+class IdempotencyKeyTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+
+    def setUp(self):
+        cache.clear()
+        applicant = synthetic.client(500)
+        self.data = {field: getattr(applicant, field) for field in ClientApplicationView.required_fields}
+
+    def post(self, url, data, key):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data, format="json", headers={"Idempotency-Key": key})
+        return response, len(queries)
+
+    def test_replay_returns_the_original_response_without_queries(self):
+        for url in ("/manage/client/apply/", "/manage/async/client/apply/"):
+            Client.objects.all().delete()
+            first, _ = self.post(url, self.data, f"key-{url}")
+            self.assertEqual(first.status_code, 201, first.content)
+            replay, queries = self.post(url, self.data, f"key-{url}")
+            self.assertEqual((replay.status_code, queries), (201, 0))
+            self.assertEqual(replay.json(), first.json())
+            self.assertEqual(replay["Idempotent-Replayed"], "true")
+            self.assertEqual(Client.objects.count(), 1)
+
+    def test_key_reused_for_another_body_is_rejected(self):
+        self.post("/manage/client/apply/", self.data, "key")
+        response, _ = self.post("/manage/client/apply/", {**self.data, "name": "Someone else"}, "key")
+        self.assertEqual(response.status_code, 422)
+
+    def test_retry_while_in_progress_conflicts(self):
+        self.client.force_authenticate(self.employee)
+        retries, save = [], ClientSerializer.save
+
+        def save_after_retry(serializer, **kwargs):
+            retries.append(self.post("/manage/employee/clients/", self.data, "key")[0])
+            return save(serializer, **kwargs)
+
+        with mock.patch.object(ClientSerializer, "save", autospec=True, side_effect=save_after_retry):
+            first, _ = self.post("/manage/employee/clients/", self.data, "key")
+        self.assertEqual(first.status_code, 201, first.content)
+        self.assertEqual(retries[0].status_code, 409)
+        self.assertEqual(retries[0]["Retry-After"], "1")
+
+    def test_slow_request_keeps_its_key_until_it_finishes(self):
+        self.client.force_authenticate(self.employee)
+        retries, save = [], ClientSerializer.save
+
+        def save_after_slow_retry(serializer, **kwargs):
+            with mock.patch("time.time", return_value=time.time() + 600):  # ten minutes into the request
+                retries.append(self.post("/manage/employee/clients/", self.data, "key")[0])
+            return save(serializer, **kwargs)
+
+        with mock.patch.object(ClientSerializer, "save", autospec=True, side_effect=save_after_slow_retry):
+            first, _ = self.post("/manage/employee/clients/", self.data, "key")
+        self.assertEqual((first.status_code, retries[0].status_code), (201, 409))
+        self.assertEqual(Client.objects.count(), 1)
+
+    def test_failed_request_frees_its_key(self):
+        self.client.force_authenticate(self.employee)
+        with mock.patch.object(ClientSerializer, "save", autospec=True, side_effect=RuntimeError("boom")), \
+                self.assertRaises(RuntimeError):
+            self.post("/manage/employee/clients/", self.data, "key")
+        response, _ = self.post("/manage/employee/clients/", self.data, "key")
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_keys_are_scoped_to_the_user(self):
+        self.client.force_authenticate(self.employee)
+        first, _ = self.post("/manage/employee/clients/", self.data, "key")
+        self.assertEqual(first.status_code, 201, first.content)
+        self.client.force_authenticate(User.objects.create_user(
+            "emp2", "emp2@example.com", "9000000003", "1990-01-01", "employee", "pw"
+        ))
+        response, _ = self.post("/manage/employee/clients/", self.data, "key")
+        self.assertEqual(response.status_code, 400)  # ran (and hit the unique contact number)
+        self.assertNotIn("Idempotent-Replayed", response)
+
+
+class ArchiveTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        long_ago = timezone.now() - timedelta(days=400)
+        cls.old_rejected = make_client(0, assigned_employee=cls.employee, approval_status="rejected")
+        cls.old_pending = make_client(1, assigned_employee=cls.employee)
+        cls.new_approved = make_client(2, assigned_employee=cls.employee, approval_status="approved")
+        Client.objects.filter(pk__in=[cls.old_rejected.pk, cls.old_pending.pk]).update(created_at=long_ago)
+        ApprovalHistory.objects.create(
+            client=cls.old_rejected, action="rejected", from_status="pending", to_status="rejected", actor=cls.manager
+        )
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.client.force_authenticate(self.manager)
+        self.details = EmployeeClientDetails.objects.create(
+            client=self.old_rejected, cibil_score=710, reference_number_1="9111111111",
+            reference_number_2="9222222222", filled_by=self.employee,
+        )
+        self.details.pan_card.save("pan.jpg", ContentFile(b"pan"))
+
+    def archive(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return archive.archive()
+
+    def test_only_old_decided_clients_are_moved(self):
+        original = self.details.pan_card.name
+        self.assertEqual(self.archive(), 1)
+        self.assertEqual(set(ArchivedClient.objects.values_list("pk", flat=True)), {self.old_rejected.pk})
+        self.assertFalse(Client.objects.filter(pk=self.old_rejected.pk).exists())
+        self.assertFalse(EmployeeClientDetails.objects.exists())
+        self.assertTrue(ApprovalHistory.objects.filter(client_id=self.old_rejected.pk).exists())
+
+        row = ArchivedClient.objects.get()
+        self.assertEqual((row.profile["father_name"], row.details["cibil_score"]), ("Father", 710))
+        self.assertEqual(row.details["pan_card"], f"archive/{row.pk}/{original}")
+        self.assertTrue(default_storage.exists(row.details["pan_card"]))
+        self.assertEqual(DocumentBlob.objects.get(name=original).ref_count, 0)  # collected after the grace period
+
+    def test_managers_read_through_to_the_archive(self):
+        url = f"/manage/clients/{self.old_rejected.pk}/manager-update/"
+        before = self.client.get(url).json()
+        self.archive()
+
+        after = self.client.get(url).json()
+        self.assertEqual({**after, "extra_details": None}, {**before, "extra_details": None})
+        self.assertEqual(after["extra_details"]["cibil_score"], 710)
+        self.assertIn(f"/media/archive/{self.old_rejected.pk}/", after["extra_details"]["pan_card"])
+        token = get_tokens_for_user(self.manager)["access"]
+        headers = {"Authorization": f"Bearer {token}"}
+        response = self.client.get(f"/manage/async/clients/{self.old_rejected.pk}/", headers=headers)
+        self.assertEqual({**response.json(), "extra_details": None}, {**after, "extra_details": None})
+        self.assertEqual(self.client.patch(url, {"name": "x"}).status_code, 404)
+
+        listed = self.client.get("/manage/clients/archived/?approval_status=rejected").json()["results"]
+        self.assertEqual([client["id"] for client in listed], [self.old_rejected.pk])
+        self.client.force_authenticate(self.employee)
+        ids = [client["id"] for client in self.client.get("/manage/employee/clients/").json()["results"]]
+        self.assertNotIn(self.old_rejected.pk, ids)
+
+    def test_restore_moves_the_client_back(self):
+        self.archive()
+        with self.captureOnCommitCallbacks(execute=True):
+            client = archive.restore(self.old_rejected.pk)
+        self.assertEqual((client.father_name, client.extra_details.cibil_score), ("Father", 710))
+        self.assertEqual(client.extra_details.pan_card.read(), b"pan")
+        self.assertFalse(ArchivedClient.objects.exists())
+        self.assertFalse(default_storage.exists(f"archive/{client.pk}/{client.extra_details.pan_card.name}"))
+
+    def test_stats_rebuild_counts_archived_clients(self):
+        self.archive()
+        stats.rebuild()
+        self.assertEqual(sum(ClientDailyStat.objects.values_list("client_count", flat=True)), 3)
+
+    def test_command_reports_the_hot_table(self):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("archive_clients", report=True, stdout=out)
+        self.assertIn("Archived 1 clients.", out.getvalue())
+        self.assertRegex(out.getvalue(), r"api_client\s+3\s+2\s")
+        self.assertIn("employee list", out.getvalue())
+
+
+def jpeg(colour=(200, 180, 160), size=(600, 400)):
+    buffer = BytesIO()
+    Image.new("RGB", size, colour).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class DocumentStorageTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        cls.other = User.objects.create_user("emp2", "emp2@example.com", "9000000003", "1991-01-01", "employee", "pw")
+        cls.first = make_client(0, assigned_employee=cls.employee)
+        cls.second = make_client(1, assigned_employee=cls.other)
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.details = [
+            EmployeeClientDetails.objects.create(
+                client=client, cibil_score=700, reference_number_1="9111111111", reference_number_2="9222222222",
+            )
+            for client in (self.first, self.second)
+        ]
+        for details in self.details:
+            details.pan_card.save("pan.jpg", ContentFile(jpeg()))
+        self.name = self.details[0].pan_card.name
+
+    def test_same_bytes_are_stored_once(self):
+        self.assertEqual(self.details[1].pan_card.name, self.name)
+        self.assertTrue(self.name.startswith("cas/"))
+        self.assertEqual(len(os.listdir(os.path.dirname(document_storage().path(self.name)))), 1)
+        blob = DocumentBlob.objects.get()
+        self.assertEqual((blob.name, blob.ref_count), (self.name, 2))
+
+    def test_unreferenced_files_are_collected_after_the_grace_period(self):
+        self.details[0].delete()
+        self.details[1].pan_card = None
+        self.details[1].save()
+        self.assertEqual(DocumentBlob.objects.get().ref_count, 0)
+        self.assertEqual(documents.collect(), 0)  # still within the grace period
+        self.assertTrue(document_storage().exists(self.name))
+        self.assertEqual(Job.objects.filter(name="documents.collect").count(), 1)
+
+        with override_settings(DOCUMENT_GC_GRACE_SECONDS=0):
+            self.assertEqual(documents.collect(), 1)
+        self.assertFalse(document_storage().exists(self.name))
+        self.assertFalse(DocumentBlob.objects.exists())
+
+    def test_thumbnails_are_rendered_on_first_request_and_revalidated(self):
+        self.client.force_authenticate(self.employee)
+        url = f"/manage/documents/{self.details[0].pk}/pan_card/"
+        self.assertEqual(self.client.get(f"{url}?size=100").status_code, 400)
+
+        response = self.client.get(f"{url}?size=128")
+        self.assertEqual(response.status_code, 200)
+        with Image.open(BytesIO(b"".join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (128, 85))
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        again = self.client.get(f"{url}?size=128", headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+        thumbnails = self.client.get(f"/manage/clients/{self.details[0].pk}/details-update/").json()["thumbnails"]
+        response = self.client.get(thumbnails["pan_card"])
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_employees_only_get_documents_of_their_clients(self):
+        self.client.force_authenticate(self.employee)
+        self.assertEqual(self.client.get(f"/manage/documents/{self.details[0].pk}/pan_card/").status_code, 200)
+        self.assertEqual(self.client.get(f"/manage/documents/{self.details[1].pk}/pan_card/").status_code, 404)
+        self.assertEqual(self.client.get(f"/manage/documents/{self.details[0].pk}/gas_bill/").status_code, 404)
+
+    def test_saving_a_reference_to_a_missing_file_only_counts_it(self):
+        document_storage().delete(self.name)
+        self.details[0].gas_bill = self.name
+        self.details[0].save()
+        self.assertEqual(DocumentBlob.objects.get().ref_count, 3)
+
+    @override_settings(DOCUMENT_SENDFILE_HEADER="X-Accel-Redirect")
+    def test_web_server_sends_the_file(self):
+        self.client.force_authenticate(self.employee)
+        response = self.client.get(f"/manage/documents/{self.details[0].pk}/pan_card/")
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.name}")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+
+
+@override_settings(JOBS_RUN_IN_PROCESS=False)
+class DocumentUploadTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        cls.other = User.objects.create_user("emp2", "emp2@example.com", "9000000003", "1991-01-01", "employee", "pw")
+        cls.details = EmployeeClientDetails.objects.create(
+            client=make_client(0, assigned_employee=cls.employee), cibil_score=700,
+            reference_number_1="9111111111", reference_number_2="9222222222",
+        )
+        cls.image = jpeg()
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.client.force_authenticate(self.employee)
+
+    def start(self):
+        response = self.client.post("/manage/documents/uploads/", {
+            "details": self.details.pk, "field": "pan_card", "filename": "pan.jpg", "size": len(self.image),
+        }, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return f"/manage/documents/uploads/{response.json()['id']}/"
+
+    def put(self, url, offset, chunk):
+        return self.client.put(url, chunk, content_type="application/octet-stream", headers={"Upload-Offset": str(offset)})
+
+    def test_resumes_after_a_partial_upload_and_processes_the_document(self):
+        url, half = self.start(), len(self.image) // 2
+        response = self.put(url, 0, self.image[:half])
+        self.assertEqual((response.status_code, response.json()["received_size"]), (200, half))
+
+        # The connection dropped: ask where to resume, then send the rest
+        self.assertEqual(self.client.get(url).json()["received_size"], half)
+        response = self.put(url, half, self.image[half:])
+        self.assertEqual((response.status_code, response.json()["status"]), (202, "queued"))
+        self.assertEqual(Job.objects.filter(name="documents.process").count(), 1)
+
+        self.assertEqual(jobs.run_pending(), 1)
+        upload = self.client.get(url).json()
+        self.assertEqual(upload["status"], "ready")
+        self.details.refresh_from_db()
+        self.assertTrue(self.details.pan_card.name.startswith("cas/"))
+        self.assertEqual(DocumentBlob.objects.get().ref_count, 1)
+
+    def test_processing_stores_the_file_again_if_it_was_collected_meanwhile(self):
+        keep = documents.keep
+
+        def collected_first(name):
+            document_storage().delete(name)
+            return keep(name)
+
+        url = self.start()
+        self.put(url, 0, self.image)
+        with mock.patch.object(documents, "keep", side_effect=collected_first):
+            jobs.run_pending()
+        self.assertEqual(self.client.get(url).json()["status"], "ready")
+        self.details.refresh_from_db()
+        self.assertEqual(self.details.pan_card.read()[:2], b"\xff\xd8")
+
+    def test_command_queues_uploads_whose_job_is_gone(self):
+        url = self.start()
+        self.put(url, 0, self.image)
+        Job.objects.all().delete()  # e.g. purged, or lost with a restored database
+        out = StringIO()
+        call_command("process_document_uploads", stdout=out)
+        self.assertIn("Queued 1 pending document uploads.", out.getvalue())
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(self.client.get(url).json()["status"], "ready")
+
+    def test_offset_mismatch_is_a_conflict(self):
+        url, half = self.start(), len(self.image) // 2
+        self.put(url, 0, self.image[:half])
+        response = self.put(url, 0, self.image[:half])  # already received
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["received_size"], half)
+        self.assertEqual(self.put(url, half + 1, self.image[half + 1:]).status_code, 409)
+        self.assertEqual(self.client.get(url).json()["received_size"], half)
+
+    def test_employees_cannot_use_other_employees_uploads(self):
+        url = self.start()
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.put(url, 0, self.image).status_code, 404)
+        response = self.client.post("/manage/documents/uploads/", {
+            "details": self.details.pk, "field": "pan_card", "filename": "pan.jpg", "size": len(self.image),
+        }, format="json")
+        self.assertEqual(response.status_code, 404)
+        self.client.force_authenticate(self.employee)
+        self.assertEqual(self.client.get(url).json()["received_size"], 0)
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class CompiledSerializerTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user("emp", "emp@example.com", "9000000001", "1990-01-01", "employee", "pw")
+        cls.manager = User.objects.create_user("mgr", "mgr@example.com", "9000000002", "1985-01-01", "manager", "pw")
+        make_client(0, name="Zoë \u2028 Rao", expected_loan_amount="1234.50", assigned_employee=cls.employee,
+                    client_type="employee_registered", submitted_at=timezone.now())
+        make_client(1, approval_status="approved")  # unassigned, no details
+        make_client(2, assigned_employee=cls.employee, client_type="employee_registered")
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        details = EmployeeClientDetails.objects.create(
+            client=Client.objects.get(contact_number="9000000000"), cibil_score=700, filled_by=self.employee,
+            reference_number_1="9111111111", reference_number_2="9222222222", gas_bill="documents/gas/old.jpg",
+        )
+        details.pan_card.save("pan.jpg", ContentFile(jpeg()))
+
+    def assertSameContent(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with override_settings(API_COMPILED_SERIALIZERS=False):
+            expected = self.client.get(url)
+        self.assertEqual(response.content, expected.content, url)
+        return response
+
+    def test_client_lists_render_the_same_bytes(self):
+        self.client.force_authenticate(self.manager)
+        for url in (
+            "/manage/clients/", "/manage/clients/?view=full", "/manage/clients/?fields=extra_details,gmail,id",
+            "/manage/clients/?view=full&page_size=1", "/manage/approvals/pending/?view=full",
+            "/manage/clients/search/?q=Zo&view=full",
+        ):
+            self.assertSameContent(url)
+        self.assertIn(b"\\u2028", self.assertSameContent("/manage/clients/?view=full").content)
+
+        self.client.force_authenticate(self.employee)
+        results = self.assertSameContent("/manage/employee/clients/?view=full").json()["results"]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/manage/employee/clients/?view=full")
+        self.assertEqual(len(queries), 1)  # one values() query, joins included
+        self.assertEqual(results[-1]["extra_details"]["gas_bill"], "/media/documents/gas/old.jpg")
+        self.assertEqual(list(results[-1]["extra_details"]["thumbnails"]), ["pan_card"])
+
+    def test_user_serializer_compiles(self):
+        users = User.objects.order_by("id")
+        compiled_users = compiled.compile_serializer(UserSerializer)
+        self.assertEqual(compiled_users.data(compiled_users.rows(users)), UserSerializer(users, many=True).data)
+
+    def test_serializers_it_cannot_compile_fall_back(self):
+        class Greeting(serializers.ModelSerializer):
+            greeting = serializers.SerializerMethodField()
+
+            class Meta:
+                model = User
+                fields = ["id", "greeting"]
+
+        self.assertIsNone(compiled.compile_serializer(Greeting))
+
+    def test_fast_renderer_matches_json_renderer(self):
+        data = {
+            "at": timezone.now(), "day": timezone.now().date(), "amount": 12, "text": "a\u2029b é",
+            "nested": [{"none": None, "flag": True}], 7: "integer key",
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        del data[7]
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_benchmark_checks_both_paths(self):
+        out = StringIO()
+        call_command("bench_serializers", rows=20, iterations=1, stdout=out)
+        self.assertIn("client full      compiled", out.getvalue())
@@ -0,0 +1,20 @@
+from rest_framework.throttling import SimpleRateThrottle
+
+
+# ✅ Login throttles run in APIView.initial(), i.e. before any password hashing
+class LoginIPThrottle(SimpleRateThrottle):
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class LoginAccountThrottle(SimpleRateThrottle):
+    """ Caps guesses against one account, however many IPs they come from. """
+    scope = "login_account"
+
+    def get_cache_key(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not email:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": str(email).strip().lower()}
@@ -1,11 +1,21 @@
 from django.urls import path
+from . import async_views
 from .views import (
     ClientListCreateView, EmployeeClientUpdateView, ManagerClientUpdateView,
-    EmployeeClientDetailsUpdateView,ClientApplicationView
+    EmployeeClientDetailsUpdateView,ClientApplicationView, ClientImportView,
+    ClientExportView, SendApprovalRequestView, ApprovalQueueView, ApprovalBatchView,
+    ApprovalHistoryView, DashboardStatsView, DocumentUploadStartView, DocumentUploadView,
+    ClientSearchView, DuplicateFlagListView, DuplicateFlagUpdateView, ArchivedClientListView, DocumentView,
 )
 from .views import RegisterEmployeeView, LoginEmployeeView,EmployeeClientManageView
 urlpatterns = [
     path('clients/', ClientListCreateView.as_view(), name='client-list-create'),
+    path('clients/import/', ClientImportView.as_view(), name='client-import'),
+    path('clients/export/<str:fmt>/', ClientExportView.as_view(), name='client-export'),
+    path('clients/search/', ClientSearchView.as_view(), name='client-search'),
+    path('clients/archived/', ArchivedClientListView.as_view(), name='archived-clients'),
+    path('clients/duplicates/', DuplicateFlagListView.as_view(), name='duplicate-flags'),
+    path('clients/duplicates/<int:pk>/', DuplicateFlagUpdateView.as_view(), name='duplicate-flag-update'),
     path('clients/<int:pk>/update/', EmployeeClientUpdateView.as_view(), name='employee-client-update'),
     path('clients/<int:pk>/manager-update/', ManagerClientUpdateView.as_view(), name='manager-client-update'),
     path('clients/<int:pk>/details-update/', EmployeeClientDetailsUpdateView.as_view(), name='employee-client-details-update'),
@@ -14,6 +24,18 @@ urlpatterns = [
     path("employee/clients/", EmployeeClientManageView.as_view(), name="employee-clients"),
     path("employee/clients/<int:pk>/", EmployeeClientManageView.as_view(), name="employee-client-update"),
     path("client/apply/", ClientApplicationView.as_view(), name="client-apply"),
+    path("employee/clients/<int:client_id>/send-approval/", SendApprovalRequestView.as_view(), name="send-approval"),
+    path("approvals/pending/", ApprovalQueueView.as_view(), name="approval-queue"),
+    path("approvals/batch/", ApprovalBatchView.as_view(), name="approval-batch"),
+    path("approvals/history/<int:client_id>/", ApprovalHistoryView.as_view(), name="approval-history"),
+    path("dashboard/stats/", DashboardStatsView.as_view(), name="dashboard-stats"),
+    path("documents/uploads/", DocumentUploadStartView.as_view(), name="document-upload-start"),
+    path("documents/uploads/<uuid:pk>/", DocumentUploadView.as_view(), name="document-upload"),
+    path("documents/<int:pk>/<str:field>/", DocumentView.as_view(), name="document"),
+    # ✅ Async (ASGI) variants of the busiest endpoints
+    path("async/client/apply/", async_views.client_apply, name="async-client-apply"),
+    path("async/employee/clients/", async_views.employee_clients, name="async-employee-clients"),
+    path("async/clients/<int:pk>/", async_views.client_detail, name="async-client-detail"),
 
 
 
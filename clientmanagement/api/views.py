@@ -1,10 +1,16 @@
+import mimetypes
+
 from django.shortcuts import render
 from rest_framework.permissions import BasePermission
 # Create your views here.
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import CachedJWTAuthentication
+from .caching import cache_response
+from .idempotency import idempotent
+from .routers import reads_from_replica, replica_alias
+from .throttling import LoginAccountThrottle, LoginIPThrottle
 from .models import Client, EmployeeClientDetails
 from .serializers import ClientSerializer, EmployeeClientDetailsSerializer
 from rest_framework.views import APIView
@@ -14,9 +20,27 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from .models import User
 from .serializers import UserRegisterSerializer, UserLoginSerializer, UserSerializer
-import random
 from .serializers import EmployeeClientDetailsSerializer
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from .assignment import pick_employee
+from .fieldsets import CLIENT_RELATED, ClientFieldset, ClientFieldsetMixin
+from .importing import ClientImporter, detect_format, read_rows
+from rest_framework.parsers import MultiPartParser
+from . import approvals, archive, documents, exporting, metrics, notifications, search, stats
+from .pagination import ApprovalQueuePagination, ArchivedClientPagination, DuplicateFlagPagination
+from .serializers import ApprovalDecisionSerializer, ApprovalHistorySerializer, DashboardQuerySerializer
+from .models import ApprovalHistory, ArchivedClient, DocumentUpload, DuplicateFlag
+from .serializers import DocumentUploadSerializer, DuplicateFlagSerializer
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags
+from django.utils.crypto import constant_time_compare
+from django.utils import timezone
+from .filters import filter_clients
+from .storage import document_storage
+from .pagination import ClientCursorPagination
+from .renderers import CLIENT_LIST_RENDERERS
 
 
 
@@ -24,6 +48,7 @@ from django.core.exceptions import ObjectDoesNotExist
 # ✅ Generate JWT Token
 def get_tokens_for_user(user):
     refresh = RefreshToken.for_user(user)
+    refresh["role"] = user.role  # ✅ lets CachedJWTAuthentication spot role changes
     return {
         "refresh": str(refresh),
         "access": str(refresh.access_token),
@@ -46,6 +71,8 @@ class RegisterEmployeeView(APIView):
 
 # ✅ Employee & Manager Login API
 class LoginEmployeeView(APIView):
+    throttle_classes = [LoginIPThrottle, LoginAccountThrottle]
+
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
@@ -55,9 +82,15 @@ class LoginEmployeeView(APIView):
             role = serializer.validated_data["role"]
             password = serializer.validated_data["password"]
 
-            user = User.objects.filter(email=email, phone_number=phone_number, dob=dob, role=role).first()
+            # ✅ Single lookup on the unique email index; the other attributes are compared in Python
+            user = User.objects.filter(email=email).first()
+            if user and (user.phone_number, user.dob, user.role) != (phone_number, dob, role):
+                user = None
 
-            if user and user.check_password(password):
+            if user is None:
+                # Hash anyway so response time does not reveal whether the account exists
+                User().set_password(password)
+            elif user.check_password(password):  # rehashes if the hasher or its cost changed
                 tokens = get_tokens_for_user(user)
                 return Response(
                     {"message": "Login successful", "tokens": tokens, "user": UserSerializer(user).data},
@@ -87,11 +120,22 @@ class IsManager(BasePermission):
 
 
 # ✅ Create & View Clients (Employees & Managers)
-class ClientListCreateView(generics.ListCreateAPIView):
-    queryset = Client.objects.all()
+class ClientListCreateView(ClientFieldsetMixin, generics.ListCreateAPIView):
     serializer_class = ClientSerializer
-    authentication_classes = [JWTAuthentication]
+    renderer_classes = CLIENT_LIST_RENDERERS
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ClientCursorPagination
+    default_client_view = "summary"
+    required_columns = ("id", "created_at")
+
+    def get_queryset(self):
+        return filter_clients(Client.objects.all(), self.request.query_params)
+
+    @cache_response
+    @reads_from_replica
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """ Assign an employee dynamically in API View """
@@ -101,45 +145,124 @@ class ClientListCreateView(generics.ListCreateAPIView):
         else:
             serializer.save(assigned_employee=self.request.user)
 
+# ✅ Ranked client search over names, emails, office names and phone / reference numbers
+class ClientSearchView(APIView):
+    """
+    ?q=<words or a phone number>&limit=20 (max 100); accepts the same
+    ?view= / ?fields= options as the client list. Every word must match
+    (as a prefix); results come best match first with a ``score``.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @cache_response
+    @reads_from_replica
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get("limit", search.DEFAULT_LIMIT)), search.MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ranked = search.search(request.query_params.get("q", ""), limit=max(limit, 1))
+        fieldset = ClientFieldset(request.query_params, default_view="summary")
+        clients = fieldset.apply(Client.objects.filter(id__in=[client_id for client_id, _ in ranked]), "id")
+        clients_by_id = {client.id: client for client in fieldset.rows(clients, "id")}
+
+        ranked = [(client_id, score) for client_id, score in ranked if client_id in clients_by_id]
+        results = fieldset.render([clients_by_id[client_id] for client_id, _ in ranked])
+        for item, (_, score) in zip(results, ranked):
+            item["score"] = score
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
 # ✅ Employee: View & Update Only Their Clients
-class EmployeeClientUpdateView(generics.RetrieveUpdateAPIView):
+class EmployeeClientUpdateView(ClientFieldsetMixin, generics.RetrieveUpdateAPIView):
     serializer_class = ClientSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsEmployee]
 
     def get_queryset(self):
         return Client.objects.filter(assigned_employee=self.request.user)
 
+    @cache_response
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 # ✅ Manager: View & Update Any Client
-class ManagerClientUpdateView(generics.RetrieveUpdateAPIView):
+class ManagerClientUpdateView(ClientFieldsetMixin, generics.RetrieveUpdateAPIView):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsManager]
+
+    @cache_response
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_object(self):
+        """ Archived clients read through to the archive (read-only: updates still 404). """
+        try:
+            return super().get_object()
+        except Http404:
+            client = archive.lookup(self.kwargs["pk"]) if self.request.method == "GET" else None
+            if client is None:
+                raise
+            return client
+
+    def perform_update(self, serializer):
+        from_status = serializer.instance.approval_status
+        with transaction.atomic():
+            client = serializer.save()
+            approvals.record_decision(client, from_status, self.request.user)
+
+# ✅ Manager: archived (decided, old) clients; same filters and ?view= / ?fields= as the client list
+class ArchivedClientListView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsManager]
 
+    @cache_response
+    def get(self, request):
+        fieldset = ClientFieldset(request.query_params, default_view="summary")
+        rows = filter_clients(ArchivedClient.objects.select_related("assigned_employee"), request.query_params)
+        paginator = ArchivedClientPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        serializer = fieldset.serializer(archive.as_clients(page), many=True)
+        return paginator.get_paginated_response(serializer.data)
+
 # ✅ Employee & Manager: Update Employee Client Details (CIBIL, Aadhaar, PAN, etc.)
 class EmployeeClientDetailsUpdateView(generics.RetrieveUpdateAPIView):
-    queryset = EmployeeClientDetails.objects.all()
+    queryset = EmployeeClientDetails.objects.select_related("filled_by")
     serializer_class = EmployeeClientDetailsSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]  # Both Employees & Managers can update
 
+    @cache_response
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 
 
 class EmployeeClientManageView(APIView):
-    authentication_classes = [JWTAuthentication]
+    renderer_classes = CLIENT_LIST_RENDERERS
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
+    @cache_response
+    @reads_from_replica
     def get(self, request):
-        """Retrieve all clients assigned to the logged-in employee."""
+        """Retrieve a page of clients assigned to the logged-in employee."""
         if request.user.role != 'employee':
             return Response({"error": "Access denied"}, status=status.HTTP_403_FORBIDDEN)
 
-        clients = Client.objects.filter(assigned_employee=request.user)
-        serializer = ClientSerializer(clients, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        fieldset = ClientFieldset(request.query_params, default_view="summary")
+        clients = filter_clients(Client.objects.all(), request.query_params)
+        clients = fieldset.apply(clients.filter(assigned_employee=request.user), "id", "created_at")
+        paginator = ClientCursorPagination()
+        page = paginator.paginate_queryset(fieldset.rows(clients, "id", "created_at"), request, view=self)
+        return paginator.get_paginated_response(fieldset.render(page))
 
+    @idempotent
     def post(self, request):
         """Create a new employee-registered client."""
         if request.user.role != 'employee':
@@ -162,7 +285,7 @@ class EmployeeClientManageView(APIView):
             return Response({"error": "Access denied"}, status=status.HTTP_403_FORBIDDEN)
 
         try:
-            client = Client.objects.get(id=pk, assigned_employee=request.user)
+            client = Client.objects.select_related(*CLIENT_RELATED).get(id=pk, assigned_employee=request.user)
         except Client.DoesNotExist:
             return Response({"error": "Client not found or unauthorized"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -178,18 +301,21 @@ class EmployeeClientManageView(APIView):
 class ClientApplicationView(APIView):
     permission_classes = [permissions.AllowAny]  # No authentication required
 
+    required_fields = [
+        "name", "contact_number", "father_name", "mother_name",
+        "qualifications", "married_status", "current_address",
+        "landmark", "years_at_address", "gmail", "office_name",
+        "office_address", "designation", "department",
+        "current_experience", "overall_experience",
+        "reference_name_1", "reference_number_1",
+        "reference_name_2", "reference_number_2",
+        "expected_loan_amount", "loan_purpose"
+    ]
+
+    @idempotent
     def post(self, request):
         """Client can apply without login. The system will auto-assign an employee."""
-        required_fields = [
-            "name", "contact_number", "father_name", "mother_name",
-            "qualifications", "married_status", "current_address",
-            "landmark", "years_at_address", "gmail", "office_name",
-            "office_address", "designation", "department",
-            "current_experience", "overall_experience",
-            "reference_name_1", "reference_number_1",
-            "reference_name_2", "reference_number_2",
-            "expected_loan_amount", "loan_purpose"
-        ]
+        required_fields = self.required_fields
 
         # ✅ Validate request data (Only accept required fields)
         data = {key: request.data.get(key) for key in required_fields if key in request.data}
@@ -197,16 +323,15 @@ class ClientApplicationView(APIView):
         if len(data) != len(required_fields):
             return Response({"error": "Missing required fields"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # ✅ Auto-assign to a registered employee
-        employees = User.objects.filter(role="employee")
-        assigned_employee = random.choice(employees) if employees.exists() else None
-
         data["client_type"] = "direct"
-        data["assigned_employee"] = assigned_employee.id if assigned_employee else None
 
         serializer = ClientSerializer(data=data)
         if serializer.is_valid():
-            serializer.save(assigned_employee=assigned_employee)
+            # ✅ Auto-assign to the least-loaded employee (one indexed, row-locked query)
+            with transaction.atomic():
+                assigned_employee = pick_employee()
+                client = serializer.save(assigned_employee=assigned_employee)
+                notifications.application_received(client)  # sent by a background job
             return Response(
                 {
                     "message": "Client application submitted successfully",
@@ -219,16 +344,76 @@ class ClientApplicationView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 
+# ✅ Bulk import of clients from an uploaded CSV / JSON Lines file
+class ClientImportView(APIView):
+    """
+    Managers import direct clients (auto-assigned to employees); employees
+    import their own employee-registered clients. Bad rows are reported
+    per row and skipped.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "Upload a CSV or JSONL file as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.data.get("format") or detect_format(upload.name)
+        if fmt not in ("csv", "jsonl"):
+            return Response({"error": "format must be 'csv' or 'jsonl'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        employee = request.user if request.user.role == 'employee' else None
+        report = ClientImporter(employee=employee).run(read_rows(upload, fmt))
+        return Response(report, status=status.HTTP_200_OK)
+
+
+# ✅ Manager-only export of every client (with employee & document details)
+class ClientExportView(APIView):
+    """
+    Streams clients as CSV, or as an XLSX workbook when openpyxl is
+    installed. Accepts the same filters as the client list.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsManager]
+
+    def get(self, request, fmt):
+        if fmt not in exporting.FORMATS:
+            return Response({"error": "Export format must be 'csv' or 'xlsx'."}, status=status.HTTP_404_NOT_FOUND)
+
+        # The CSV body is generated after get() returns, so the replica is chosen explicitly
+        clients = Client.objects.using(replica_alias(request))
+        rows = exporting.iter_rows(filter_clients(clients, request.query_params))
+        filename = f"clients-{timezone.now():%Y%m%d-%H%M%S}.{fmt}"
+
+        if fmt == "csv":
+            response = StreamingHttpResponse(exporting.stream_csv(rows), content_type="text/csv")
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+            return response
+
+        try:
+            workbook = exporting.xlsx_tempfile(rows)
+        except ImportError:
+            return Response({"error": "XLSX export requires openpyxl."}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        return FileResponse(
+            workbook,
+            as_attachment=True,
+            filename=filename,
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
+
 class SendApprovalRequestView(APIView):
     """
     Employee sends client details to Manager (MD) for loan approval.
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsEmployee]  # Only employees can send requests
 
     def post(self, request, client_id):
         try:
-            client = Client.objects.get(id=client_id, assigned_employee=request.user)
+            client = Client.objects.select_related("extra_details", "profile").get(id=client_id, assigned_employee=request.user)
 
             # Ensure only employee-registered clients are sent for approval
             if client.client_type != "employee_registered":
@@ -247,9 +432,8 @@ class SendApprovalRequestView(APIView):
             if missing_fields:
                 return Response({"error": f"Missing fields: {', '.join(missing_fields)}"}, status=status.HTTP_400_BAD_REQUEST)
 
-            # ✅ Mark client as pending approval
-            client.approval_status = "pending"
-            client.save()
+            # ✅ Mark client as pending approval and put it on the manager queue
+            approvals.submit(client, request.user)
 
             # ✅ Get Employee (Sender) Details
             employee = request.user  # Employee sending the request
@@ -265,11 +449,12 @@ class SendApprovalRequestView(APIView):
                         "address": client.current_address,
                         "loan_amount": client.expected_loan_amount,
                         "loan_purpose": client.loan_purpose,
-                        "status": client.approval_status
+                        "status": client.approval_status,
+                        "submitted_at": client.submitted_at
                     },
                     "employee_details": {
                         "employee_id": employee.id,
-                        "employee_name": employee.name,
+                        "employee_name": employee.username,
                         "email": employee.email,
                         "phone_number": employee.phone_number,
                         "role": employee.role
@@ -279,4 +464,234 @@ class SendApprovalRequestView(APIView):
             )
 
         except Client.DoesNotExist:
-            return Response({"error": "Client not found or not assigned to you."}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            return Response({"error": "Client not found or not assigned to you."}, status=status.HTTP_404_NOT_FOUND)
+
+
+# ✅ Manager: pending approval queue, oldest submission first
+class ApprovalQueueView(ClientFieldsetMixin, generics.ListAPIView):
+    renderer_classes = CLIENT_LIST_RENDERERS
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsManager]
+    pagination_class = ApprovalQueuePagination
+    default_client_view = "summary"
+    required_columns = ("id", "submitted_at")
+
+    def get_queryset(self):
+        return filter_clients(approvals.pending_queue(), self.request.query_params)
+
+    @cache_response
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+# ✅ Manager: approve / reject many queued clients at once
+class ApprovalBatchView(APIView):
+    """
+    Several managers can work the queue concurrently: clients another
+    manager is deciding right now are skipped and reported back.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsManager]
+
+    def post(self, request):
+        serializer = ApprovalDecisionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        processed, skipped = approvals.decide(
+            serializer.validated_data["ids"],
+            serializer.validated_data["action"],
+            request.user,
+            note=serializer.validated_data["note"],
+        )
+        return Response(
+            {"status": approvals.DECISIONS[serializer.validated_data["action"]], "processed": processed, "skipped": skipped},
+            status=status.HTTP_200_OK
+        )
+
+
+# ✅ Manager: approval audit trail for one client
+class ApprovalHistoryView(generics.ListAPIView):
+    serializer_class = ApprovalHistorySerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsManager]
+
+    def get_queryset(self):
+        return ApprovalHistory.objects.filter(client_id=self.kwargs["client_id"]).select_related("actor").order_by("created_at", "id")
+
+    @cache_response
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+# ✅ Manager: probable duplicate applications flagged at intake
+class DuplicateFlagListView(generics.ListAPIView):
+    """ ?status=open (default) | confirmed | dismissed """
+    serializer_class = DuplicateFlagSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsManager]
+    pagination_class = DuplicateFlagPagination
+
+    def get_queryset(self):
+        return DuplicateFlag.objects.filter(
+            status=self.request.query_params.get("status", "open")
+        ).select_related("client", "duplicate_of", "reviewed_by")
+
+
+# ✅ Manager: confirm or dismiss a duplicate flag
+class DuplicateFlagUpdateView(generics.UpdateAPIView):
+    queryset = DuplicateFlag.objects.select_related("client", "duplicate_of", "reviewed_by")
+    serializer_class = DuplicateFlagSerializer
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsManager]
+
+    def perform_update(self, serializer):
+        serializer.save(reviewed_by=self.request.user)
+
+
+# ✅ Manager dashboard: client counts and loan totals from pre-aggregated buckets
+class DashboardStatsView(APIView):
+    """
+    ?group_by=approval_status,client_type,employee,day (any combination)
+    &date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsManager]
+
+    @cache_response
+    def get(self, request):
+        query = DashboardQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = stats.summarize(
+            query.validated_data["group_by"],
+            date_from=query.validated_data.get("date_from"),
+            date_to=query.validated_data.get("date_to"),
+        )
+        return Response({"group_by": query.validated_data["group_by"], "results": results}, status=status.HTTP_200_OK)
+
+
+# ✅ Start a chunked document upload for EmployeeClientDetails
+class DocumentUploadStartView(APIView):
+    """
+    POST {"details": <id>, "field": "pan_card", "filename": "pan.jpg", "size": <bytes>}
+    then PUT the bytes to documents/uploads/<id>/ in chunks.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]  # Both Employees & Managers can upload
+
+    def post(self, request):
+        serializer = DocumentUploadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        if request.user.role != 'manager' and data["details"].client.assigned_employee_id != request.user.pk:
+            return Response({"error": "Details not found"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            upload = documents.start(data["details"], data["field"], data["filename"], data["total_size"], request.user)
+        except documents.UploadError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(DocumentUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+
+# ✅ Upload progress (GET) and chunk upload (PUT with an Upload-Offset header)
+class DocumentUploadView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_upload(self, request, pk):
+        uploads = DocumentUpload.objects.filter(pk=pk)
+        if request.user.role != 'manager':  # Employees only see uploads for their own clients
+            uploads = uploads.filter(details__client__assigned_employee=request.user)
+        return uploads.first()
+
+    def get(self, request, pk):
+        upload = self.get_upload(request, pk)
+        if upload is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(DocumentUploadSerializer(upload).data, status=status.HTTP_200_OK)
+
+    def put(self, request, pk):
+        upload = self.get_upload(request, pk)
+        if upload is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.headers.get("Content-Length", ""))
+        except ValueError:
+            return Response({"error": "Upload-Offset and Content-Length headers are required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            complete = documents.append_chunk(upload, offset, request._request, length)
+        except documents.UploadError as exc:
+            return Response(
+                {"error": str(exc), "received_size": upload.received_size},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(
+            DocumentUploadSerializer(upload).data,
+            status=status.HTTP_202_ACCEPTED if complete else status.HTTP_200_OK
+        )
+
+
+# ✅ A client document, or a thumbnail of it (?size=<one of DOCUMENT_THUMBNAIL_SIZES>)
+class DocumentView(APIView):
+    """
+    Employees get the documents of their own clients, managers any document.
+    The stored name is the ETag, so a repeat view is a 304; URLs carrying
+    ``?v=`` (as rendered by the details serializer) may be cached for good.
+    With DOCUMENT_SENDFILE_HEADER set, the web server sends the file.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk, field):
+        details = EmployeeClientDetails.objects.filter(pk=pk)
+        if request.user.role != 'manager':
+            details = details.filter(client__assigned_employee=request.user)
+        name = None
+        if field in EmployeeClientDetails.DOCUMENT_FIELDS:
+            name = details.values_list(field, flat=True).first()
+        if not name:
+            return Response({"error": "Document not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        current = documents.version(name)
+        size = request.query_params.get("size")
+        if size is not None:
+            if size not in {str(choice) for choice in settings.DOCUMENT_THUMBNAIL_SIZES}:
+                return Response({"error": f"size must be one of {list(settings.DOCUMENT_THUMBNAIL_SIZES)}."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            try:
+                name = documents.thumbnail(name, int(size)) or name  # files from before content addressing: full size
+            except OSError:
+                return Response({"error": "Document not found"}, status=status.HTTP_404_NOT_FOUND)
+        storage = document_storage()
+        if not storage.exists(name):
+            return Response({"error": "Document not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = f'"{documents.version(name)}"'
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponseNotModified()
+        elif settings.DOCUMENT_SENDFILE_HEADER:
+            response = HttpResponse(content_type=mimetypes.guess_type(name)[0] or "application/octet-stream")
+            if settings.DOCUMENT_SENDFILE_HEADER.lower() == "x-accel-redirect":
+                response[settings.DOCUMENT_SENDFILE_HEADER] = settings.DOCUMENT_SENDFILE_ROOT + name
+            else:
+                response[settings.DOCUMENT_SENDFILE_HEADER] = storage.path(name)
+        else:
+            response = FileResponse(storage.open(name))
+        response["ETag"] = etag
+        immutable = request.query_params.get("v") == current
+        response["Cache-Control"] = "private, max-age=31536000, immutable" if immutable else "private, no-cache"
+        return response
+
+
+# ✅ Prometheus scrape endpoint; set METRICS_TOKEN to require "Authorization: Bearer <token>"
+def metrics_view(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
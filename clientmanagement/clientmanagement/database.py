@@ -0,0 +1,99 @@
+"""
+Environment-driven ``DATABASES``.
+
+Primary (``default``)::
+
+    DB_ENGINE            mysql (default) | postgresql | sqlite
+    DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+    DB_CONN_MAX_AGE      seconds a connection is reused across requests (default 60; 0 = per request)
+    DB_CONN_HEALTH_CHECKS  ping reused connections before use (default on)
+
+Optional pool (``DB_POOL=1``): MySQL uses django-db-connection-pool and
+PostgreSQL uses Django's psycopg pool, when those packages are installed;
+otherwise persistent connections are used. Sized by ``DB_POOL_SIZE``,
+``DB_POOL_MAX_OVERFLOW`` and ``DB_POOL_RECYCLE``.
+
+Read replicas: ``DB_REPLICAS`` is a comma-separated list of hosts (file
+names for SQLite) that otherwise share the primary's settings, with
+``DB_REPLICA_USER``/``DB_REPLICA_PASSWORD`` overrides. They become the
+``replica_1``, ``replica_2``, ... aliases used by ``api.routers`` and
+mirror ``default`` in tests.
+"""
+import os
+from importlib.util import find_spec
+
+ENGINES = {
+    "mysql": "django.db.backends.mysql",
+    "postgresql": "django.db.backends.postgresql",
+    "sqlite": "django.db.backends.sqlite3",
+}
+
+
+def env(name, default=None):
+    return os.environ.get(name, default)
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def pooled(database):
+    """ Switch ``database`` to a connection pool when one is available for its engine. """
+    size, overflow = env_int("DB_POOL_SIZE", 10), env_int("DB_POOL_MAX_OVERFLOW", 10)
+    if database["ENGINE"] == ENGINES["mysql"] and find_spec("dj_db_conn_pool"):
+        database["ENGINE"] = "dj_db_conn_pool.backends.mysql"
+        database["POOL_OPTIONS"] = {
+            "POOL_SIZE": size,
+            "MAX_OVERFLOW": overflow,
+            "RECYCLE": env_int("DB_POOL_RECYCLE", 3600),
+        }
+    elif database["ENGINE"] == ENGINES["postgresql"] and find_spec("psycopg_pool"):
+        database["OPTIONS"] = {**database.get("OPTIONS", {}), "pool": {"min_size": 1, "max_size": size + overflow}}
+    else:
+        return database
+    database["CONN_MAX_AGE"] = 0  # the pool owns connection lifetime
+    return database
+
+
+def primary():
+    engine = ENGINES.get(env("DB_ENGINE", "mysql"), env("DB_ENGINE", "mysql"))
+    database = {
+        "ENGINE": engine,
+        "NAME": env("DB_NAME", "db.sqlite3" if engine == ENGINES["sqlite"] else "la"),
+        "USER": env("DB_USER", "root"),
+        "PASSWORD": env("DB_PASSWORD", "santhosh"),
+        "HOST": env("DB_HOST", "localhost"),
+        "PORT": env("DB_PORT", "3306"),
+        "CONN_MAX_AGE": env_int("DB_CONN_MAX_AGE", 60),
+        "CONN_HEALTH_CHECKS": env_bool("DB_CONN_HEALTH_CHECKS", True),
+    }
+    if database["ENGINE"] == ENGINES["sqlite"]:
+        database.update(HOST="", PORT="", USER="", PASSWORD="")
+    if env_bool("DB_POOL", False):
+        database = pooled(database)
+    return database
+
+
+def databases():
+    default = primary()
+    result = {"default": default}
+    replicas = [host.strip() for host in env("DB_REPLICAS", "").split(",") if host.strip()]
+    for number, host in enumerate(replicas, 1):
+        replica = {**default, "TEST": {"MIRROR": "default"}}
+        if default["ENGINE"] == ENGINES["sqlite"]:
+            replica["NAME"] = host
+        else:
+            replica.update(
+                HOST=host,
+                USER=env("DB_REPLICA_USER", default["USER"]),
+                PASSWORD=env("DB_REPLICA_PASSWORD", default["PASSWORD"]),
+            )
+        result[f"replica_{number}"] = replica
+    return result
@@ -10,9 +10,15 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+
+from . import database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -49,11 +55,17 @@ AUTH_USER_MODEL = "api.User"
 # AUTH_USER_MODEL = "api.CustomUser"
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ),
     # "DEFAULT_PERMISSION_CLASSES": [
     #     "rest_framework.permissions.IsAuthenticated",
     # ],
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": "30/min",       # per client IP
+        "login_account": "10/min",  # per email address being tried
+    },
+    # Reverse proxies in front of the app; X-Forwarded-For is ignored unless this is set
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", 0)),
 }
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),  # or any expiration time you prefer
@@ -65,7 +77,29 @@ SIMPLE_JWT = {
     'VERIFYING_KEY': None,  # You don't need this unless you're using public/private key pair
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+# In-process cache of authenticated users (api/authentication.py)
+AUTH_USER_CACHE_SIZE = 10000
+AUTH_USER_CACHE_TTL = 60  # seconds; bounds staleness across worker processes
+
+# Response cache for the client read endpoints (api/caching.py). Multi-process
+# deployments need a shared backend (file, Redis, Memcached) so the data version is shared.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "clientmanagement"),
+    }
+}
+API_RESPONSE_CACHE_ENABLED = True
+API_RESPONSE_CACHE_TIMEOUT = 3600  # only reclaims entries of superseded versions
+# Client lists render from values() rows through compiled serializers (api/compiled.py)
+API_COMPILED_SERIALIZERS = True
+
+# Idempotency-Key replays for client creation (api/idempotency.py), kept in the cache above
+IDEMPOTENCY_KEY_TTL = 24 * 3600    # how long a response is replayed for its key
+IDEMPOTENCY_LOCK_TIMEOUT = 3600    # outlives any request; only frees keys of workers that died mid-request
+
 MIDDLEWARE = [
+    "api.middleware.MetricsMiddleware",  # first, so it times everything below
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,6 +108,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
      "corsheaders.middleware.CorsMiddleware",
+    "api.middleware.ReplicaStickinessMiddleware",
 ]
 
 ROOT_URLCONF = 'clientmanagement.urls'
@@ -100,16 +135,39 @@ WSGI_APPLICATION = 'clientmanagement.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME':  'la',
-        'USER':"root",
-        "PASSWORD":"santhosh",
-        'HOST':"localhost",
-        "PORT":"3306"
-    }
+# Configured from DB_* environment variables (see clientmanagement/database.py);
+# the defaults are the local MySQL database with persistent connections.
+DATABASES = database.databases()
+
+# MySQL has no partial indexes; it skips client_unassigned_idx and uses the full composite ones
+SILENCED_SYSTEM_CHECKS = ["models.W037"]
+
+# Replicas serve list / search / export reads; everything else uses the primary
+DATABASE_ROUTERS = ["api.routers.ReadReplicaRouter"]
+REPLICA_LAG_WINDOW = 5  # seconds after a write during which reads stay on the primary
+
+# Request metrics at /metrics (api/metrics.py)
+API_METRICS_ENABLED = True
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get("SLOW_REQUEST_THRESHOLD_MS", 500))
+SLOW_REQUEST_ROUTE_THRESHOLDS_MS = {
+    # Password hashing is slow on purpose (see PASSWORD_HASH_COSTS)
+    "manage/login/": 2000,
+    "manage/register/": 2000,
 }
+SLOW_REQUEST_LOG_QUERIES = 10  # slowest queries included in a slow-request warning
+
+# Background jobs (api/jobs.py); `manage.py run_jobs` runs the worker pool
+JOBS_RUN_IN_PROCESS = True     # also start new jobs on a web-process thread pool right after commit
+JOB_IN_PROCESS_WORKERS = 2
+JOB_LEASE_SECONDS = 300        # a running job not finished by then is assumed lost and run again
+JOB_RETRY_BASE_DELAY = 10      # seconds before the first retry; doubles with every attempt
+JOB_RETRY_MAX_DELAY = 3600
+JOB_RETENTION_DAYS = 7         # finished jobs (and their idempotency keys) kept this long
+
+# Notification emails (api/notifications.py)
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "loans@example.com")
 
 
 # Password validation
@@ -131,6 +189,28 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing: Argon2 or bcrypt when installed, tuned PBKDF2 otherwise.
+# The first hasher hashes new passwords; the rest only verify (and upgrade) old ones.
+# Calibrate costs for this hardware with `manage.py calibrate_password_hasher`.
+
+PASSWORD_HASH_COSTS = {
+    "ARGON2_TIME_COST": int(os.environ.get("ARGON2_TIME_COST", 2)),
+    "ARGON2_MEMORY_COST": int(os.environ.get("ARGON2_MEMORY_COST", 65536)),  # KiB
+    "ARGON2_PARALLELISM": int(os.environ.get("ARGON2_PARALLELISM", 2)),
+    "BCRYPT_ROUNDS": int(os.environ.get("BCRYPT_ROUNDS", 12)),
+    "PBKDF2_ITERATIONS": int(os.environ.get("PBKDF2_ITERATIONS", 870000)),
+}
+
+PASSWORD_HASHERS = [
+    "api.hashers.TunedPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+if find_spec("bcrypt"):
+    PASSWORD_HASHERS.insert(0, "api.hashers.TunedBCryptSHA256PasswordHasher")
+if find_spec("argon2"):
+    PASSWORD_HASHERS.insert(0, "api.hashers.TunedArgon2PasswordHasher")
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -148,8 +228,40 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded documents
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Client documents are stored by content hash under MEDIA_ROOT/cas/ (api/storage.py)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    "documents": {"BACKEND": "api.storage.ContentAddressedStorage"},
+}
+
+# Document ingestion pipeline (api/documents.py)
+DOCUMENT_UPLOAD_MAX_SIZE = 25 * 1024 * 1024           # whole document
+DOCUMENT_UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024      # single PUT
+DOCUMENT_MAX_DIMENSION = 2048                         # longest side after downscaling, in px
+DOCUMENT_THUMBNAIL_SIZE = 256                         # rendered while processing; the preview size
+DOCUMENT_THUMBNAIL_SIZES = (128, 256, 512)            # ?size= values served (rendered on first request)
+DOCUMENT_GC_GRACE_SECONDS = 3600                      # unreferenced files are deleted after this
+# Let the web server send document files: "X-Accel-Redirect" (nginx, with an internal
+# location for DOCUMENT_SENDFILE_ROOT aliased to MEDIA_ROOT) or "X-Sendfile" (Apache, lighttpd).
+# Unset, files are streamed with FileResponse (sendfile() where the WSGI server supports it).
+DOCUMENT_SENDFILE_HEADER = os.environ.get("DOCUMENT_SENDFILE_HEADER", "")
+DOCUMENT_SENDFILE_ROOT = os.environ.get("DOCUMENT_SENDFILE_ROOT", "/protected-media/")
+
+# Archive tier for decided clients (api/archive.py, manage.py archive_clients)
+ARCHIVE_AFTER_DAYS = {"rejected": 90, "approved": 365}  # by created_at; only decided statuses
+ARCHIVE_BATCH_SIZE = 500                                # clients per transaction
+ARCHIVE_STORAGE = "default"                             # STORAGES alias for archived documents (e.g. a cold bucket)
+ARCHIVE_FILE_PREFIX = "archive/"                        # archived files live under <prefix><client id>/
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed", "Retry-After"]
@@ -17,8 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path , include
 
+from api.views import metrics_view
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path("manage/",include('api.urls'))
+    path("manage/",include('api.urls')),
+    path("metrics", metrics_view, name="metrics"),
 ]